@@ -8,9 +8,9 @@ from pydantic import ValidationError
 
 from app.api.deps.user_deps import get_current_user
 from app.core.config import settings
-from app.core.security import create_access_token, create_refresh_token
+from app.core.security import create_access_token, create_refresh_token, decode_token
 from app.models.user_model import User
-from app.schemas.auth_schema import TokenSchema, TokenPayload
+from app.schemas.auth_schema import TokenSchema
 from app.schemas.user_schema import UserOut
 from app.services.user_service import UserService
 
@@ -41,10 +41,7 @@ async def test_token(user: User = Depends(get_current_user)):
 @auth_router.post('/refresh', summary="Refresh token", response_model=TokenSchema)
 async def refresh_token(refresh_token: str = Body(...)):
     try:
-        payload = jwt.decode(
-            token=refresh_token, key=settings.JWT_REFRESH_SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        token_data = decode_token(refresh_token, settings.JWT_REFRESH_SECRET_KEY)
 
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
@@ -53,7 +50,7 @@ async def refresh_token(refresh_token: str = Body(...)):
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    user = await UserService.get_user_by_id(token_data.sub)
+    user = await UserService.get_user_by_id(token_data.sub, projection=UserOut)
 
     if not user:
         raise HTTPException(
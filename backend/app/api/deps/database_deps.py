@@ -0,0 +1,18 @@
+from fastapi import HTTPException, status
+
+from app.core.indexes import index_reconciler
+
+
+async def require_database() -> None:
+    """
+    Turn requests away until the document models are registered with Beanie, which happens in the background after
+    startup.
+
+    :raises HTTPException: 503 with Retry-After while the models are not registered yet.
+    """
+    if not index_reconciler.initialized:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The database is not available yet, try again shortly.",
+            headers={"Retry-After": "1"}
+        )
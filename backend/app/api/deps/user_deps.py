@@ -1,18 +1,27 @@
 from datetime import datetime
+from typing import Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
 
 from app.core.config import settings
+from app.core.security import decode_token
 from app.models.user_model import User
-from app.schemas.auth_schema import TokenPayload
+
+# scope of the short-lived tokens the task feed accepts in its query string
+TASK_FEED_SCOPE = "task_feed"
 
 reuseable_oauth = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login",
     scheme_name="JWT"
 )
+optional_oauth = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/login",
+    scheme_name="JWT",
+    auto_error=False
+)
 
 
 async def get_current_user(token: str = Depends(reuseable_oauth)) -> User:
@@ -25,12 +34,44 @@ async def get_current_user(token: str = Depends(reuseable_oauth)) -> User:
     :rtype: User
     :raises HTTPException: If the token is invalid or expired, or if the user cannot be found.
     """
+    return await get_token_user(token)
+
+
+async def get_feed_user(token: Optional[str] = Depends(optional_oauth),
+                        feed_token: Optional[str] = Query(None, alias="token")) -> User:
+    """
+    Get the user opening the task feed, from a Bearer token or, for browsers whose EventSource cannot send one, a
+    task feed token in the token query parameter.
+
+    :param token: The authentication token, if the Authorization header carries one.
+    :param feed_token: A token issued by POST /task/feed/token.
+    :return: The current user.
+    :raises HTTPException: If neither token is given, the token is invalid or expired, or if the user cannot be found.
+    """
+    if token is not None:
+        return await get_token_user(token)
+    if feed_token is not None:
+        return await get_token_user(feed_token, scope=TASK_FEED_SCOPE)
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+
+async def get_token_user(token: str, scope: Optional[str] = None) -> User:
+    """
+    Get the user an access token was issued to.
+
+    :param token: The authentication token.
+    :param scope: The scope the token must carry, None for a general access token. A token issued for a scope is
+        accepted for that scope only.
+    :return: The user.
+    :raises HTTPException: If the token is invalid, expired or of another scope, or if the user cannot be found.
+    """
     from app.services.user_service import UserService
     try:
-        payload = jwt.decode(
-            token=token, key=settings.JWT_SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        token_data = decode_token(token, settings.JWT_SECRET_KEY)
 
         if datetime.fromtimestamp(token_data.exp) < datetime.now():
             raise HTTPException(
@@ -45,7 +86,14 @@ async def get_current_user(token: str = Depends(reuseable_oauth)) -> User:
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    user = await UserService.get_user_by_id(token_data.sub)
+    if token_data.scope != scope:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    user = await UserService.get_cached_user_by_id(token_data.sub)
 
     if not user:
         raise HTTPException(
@@ -0,0 +1,44 @@
+import asyncio
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.indexes import index_reconciler
+from app.models.user_model import User
+
+health_router = APIRouter()
+
+
+@health_router.get('/healthz', summary="Liveness probe")
+async def healthz():
+    """
+    Report that the process is up and serving requests. Does not touch the database.
+    """
+    return {"status": "ok"}
+
+
+@health_router.get('/readyz', summary="Readiness probe")
+async def readyz():
+    """
+    Report whether the document models are registered, the database is reachable and every declared index has been
+    built.
+
+    Responds with 503 until all three hold, so a load balancer only routes traffic to instances that can serve it at
+    full speed.
+    """
+    checks = {"initialized": index_reconciler.initialized, "database": False, "indexes": index_reconciler.ready}
+    if index_reconciler.initialized:
+        try:
+            await asyncio.wait_for(User.get_motor_collection().database.command("ping"),
+                                   settings.READINESS_TIMEOUT_SECONDS)
+            checks["database"] = True
+        except Exception:
+            # unreachable or too slow both mean not ready
+            pass
+
+    ready = all(checks.values())
+    body = {"status": "ready" if ready else "not ready", **checks}
+    if index_reconciler.error:
+        body["index_error"] = index_reconciler.error
+    return JSONResponse(body, status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,42 @@
+from typing import Dict, Iterable, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.core.cache import TTLCache
+from app.core.database import pool_metrics
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, registry
+from app.core.security import token_cache
+from app.services.email_service import mail_queue
+from app.services.task_feed_service import task_feed
+from app.services.task_service import task_stats_cache
+from app.services.user_service import user_cache
+
+metrics_router = APIRouter()
+
+CACHES: Dict[str, TTLCache] = {
+    "user": user_cache,
+    "token": token_cache,
+    "task_stats": task_stats_cache,
+}
+
+
+def _gauges(prefix: str, documentation: str, stats: Dict[str, float]) -> Iterable[Tuple[str, str, float]]:
+    return ((f"{prefix}_{name}", f"{documentation}: {name}.", value) for name, value in stats.items())
+
+
+registry.register_collector(lambda: _gauges("kakari_mongo_pool", "MongoDB connection pool", pool_metrics.stats()))
+registry.register_collector(lambda: _gauges("kakari_mail_queue", "Outgoing mail queue", mail_queue.stats()))
+registry.register_collector(lambda: _gauges("kakari_task_feed", "Task change feed", task_feed.stats()))
+for _name, _cache in CACHES.items():
+    registry.register_collector(
+        lambda name=_name, cache=_cache: _gauges(f"kakari_{name}_cache", f"In-process {name} cache", cache.stats()))
+
+
+@metrics_router.get('/metrics', summary="Prometheus metrics", include_in_schema=False)
+async def metrics():
+    """
+    Report request, MongoDB command, connection pool, mail queue, task feed and cache metrics in the Prometheus text
+    format.
+    """
+    return Response(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
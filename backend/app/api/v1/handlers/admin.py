@@ -0,0 +1,47 @@
+from typing import List, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.api.deps.user_deps import get_current_user
+from app.core.slow_queries import slow_query_log
+from app.models.user_model import User
+from app.schemas.admin_schema import SlowQueryShapeOut
+
+admin_router = APIRouter()
+
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """
+    FastAPI dependency returning the current user if they have the "admin" role.
+
+    :raises HTTPException: 403 for any other user.
+    """
+    if "admin" not in current_user.roles:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required")
+    return current_user
+
+
+@admin_router.get('/slow-queries', summary="List the slowest query shapes", response_model=List[SlowQueryShapeOut])
+async def get_slow_queries(limit: int = Query(20, ge=1, le=500),
+                           sort: Literal["total_ms", "max_ms", "count"] = "total_ms",
+                           current_user: User = Depends(require_admin)):
+    """
+    List the MongoDB query shapes that ran slower than SLOW_QUERY_THRESHOLD_MS in this process, worst first.
+
+    Parameters:
+    - limit (int): The number of shapes to return.
+    - sort (str): Rank shapes by total time (total_ms), slowest run (max_ms) or number of slow runs (count).
+
+    Returns:
+    - List[SlowQueryShapeOut]: The shapes, with the routes that issued them and, once a sample has been explained,
+      the winning plan and the documents examined versus returned.
+    """
+    return slow_query_log.top(limit, sort)
+
+
+@admin_router.delete('/slow-queries', summary="Clear the slow query shapes", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries(current_user: User = Depends(require_admin)):
+    """
+    Forget the slow query shapes recorded so far, e.g. after adding an index.
+    """
+    slow_query_log.reset()
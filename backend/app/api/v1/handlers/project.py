@@ -1,27 +1,62 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from beanie import Link
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 
 from app.api.deps.user_deps import get_current_user
+from app.core.config import settings
 from app.models.project_model import Project
 from app.models.task_model import Task
 from app.models.user_model import User
+from app.schemas.pagination_schema import Page
 from app.schemas.project_schema import ProjectCreate, ProjectUpdate
+from app.schemas.task_schema import TaskStats
 from app.services.project_service import ProjectService
+from app.services.task_service import TaskService
+from app.utils.expansion import Expansion, expand_query
+from app.utils.preconditions import (expected_version, is_conditional, is_not_modified, not_modified,
+                                     validator_headers, version_etag)
+from app.utils.streaming import wants_ndjson, ndjson_response
 
 project_router = APIRouter()
 
 
 @project_router.get('/', summary="Get all projects")
-async def get_all_projects() -> List[Project]:
-    return await ProjectService.list_projects()
+async def get_all_projects(request: Request, cursor: Optional[str] = None,
+                           limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1,
+                                              le=settings.MAX_PAGE_SIZE),
+                           expansion: Expansion = Depends(expand_query(Project))) -> Page[Project]:
+    if wants_ndjson(request):
+        return ndjson_response(await ProjectService.list_projects(stream=True))
+    page = await ProjectService.list_projects(cursor=cursor, limit=limit, projection=expansion.projection)
+    return await expansion.page(page)
 
 
 @project_router.get('/{project_id}', summary="Get a single project by id")
-async def get_project_by_id(project_id: UUID) -> Project:
-    return await ProjectService.get_project_by_id(project_id)
+async def get_project_by_id(request: Request, project_id: UUID,
+                            expansion: Expansion = Depends(expand_query(Project))) -> Project:
+    """
+    Get a project by id.
+
+    The response carries an ETag (the project version); a request whose If-None-Match still matches gets an empty
+    304 without the project being loaded. Responses with expanded links or a sparse field set carry none.
+    """
+    if not expansion.reshaped and is_conditional(request):
+        version = await ProjectService.get_project_version(project_id)
+        if version is not None and is_not_modified(request, version_etag(version)):
+            return not_modified(version_etag(version))
+
+    project = await ProjectService.get_project_by_id(project_id, projection=expansion.projection)
+    response = await expansion.one(project)
+    if project is not None and not expansion.reshaped:
+        response.headers.update(validator_headers(version_etag(project.version or 0)))
+    return response
+
+
+@project_router.get('/{project_id}/stats', summary="Count a project's tasks")
+async def get_project_stats(project_id: UUID) -> TaskStats:
+    return await TaskService.get_project_task_stats(project_id)
 
 
 @project_router.post('/', summary="Create a new project")
@@ -30,8 +65,9 @@ async def create_project(project: ProjectCreate, current_user: User = Depends(ge
 
 
 @project_router.put('/{project_id}', summary="Update project by id")
-async def update_project(project_id: UUID, project: ProjectUpdate, current_user: User = Depends(get_current_user)):
-    return await ProjectService.update_project(project_id, project, current_user)
+async def update_project(project_id: UUID, project: ProjectUpdate, current_user: User = Depends(get_current_user),
+                         version: Optional[int] = Depends(expected_version)):
+    return await ProjectService.update_project(project_id, project, current_user, expected_version=version)
 
 
 @project_router.delete('/{project_id}', summary="Delete project by id")
@@ -40,9 +76,15 @@ async def delete_project(project_id: UUID, current_user: User = Depends(get_curr
 
 
 @project_router.get('/tasks/{project_id}', summary="Get all tasks for a project")
-async def get_project_tasks(project_id: UUID) -> List[Link[Task]]:
-    project = await ProjectService.get_project_by_id(project_id)
-    return project.tasks
+async def get_project_tasks(request: Request, project_id: UUID, cursor: Optional[str] = None,
+                            limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1,
+                                               le=settings.MAX_PAGE_SIZE),
+                            expansion: Expansion = Depends(expand_query(Task))) -> Page[Task]:
+    if wants_ndjson(request):
+        return ndjson_response(await TaskService.list_tasks_by_project(project_id, stream=True))
+    page = await TaskService.list_tasks_by_project(project_id, cursor=cursor, limit=limit,
+                                                   projection=expansion.projection)
+    return await expansion.page(page)
 
 
 @project_router.get('/members/{project_id}', summary="Get all project members")
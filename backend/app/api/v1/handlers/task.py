@@ -1,30 +1,131 @@
-from datetime import datetime
-from typing import List
+from datetime import datetime, timedelta
+from typing import Any, List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request
 
-from app.api.deps.user_deps import get_current_user
-from app.models.task_model import Task
+from app.api.deps.user_deps import TASK_FEED_SCOPE, get_current_user, get_feed_user
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.task_model import StatusEnum, Task
 from app.models.user_model import User
-from app.schemas.task_schema import TaskOut, TaskCreate, TaskUpdate
+from app.schemas.pagination_schema import Page
+from app.schemas.task_schema import (BulkItemResult, TaskFeedToken, TaskOut, TaskCreate, TaskSearchHit, TaskUpdate,
+                                     UserTaskStats)
+from app.services.task_feed_service import resume_token, task_feed
 from app.services.task_service import TaskService
+from app.utils.expansion import Expansion, expand_query
+from app.utils.preconditions import (expected_version, is_conditional, is_not_modified, listing_etag, not_modified,
+                                     validator_headers, version_etag)
+from app.utils.responses import model_response
+from app.utils.streaming import wants_ndjson, ndjson_response, sse_response
 
 task_router = APIRouter()
 
 
-@task_router.get('/created/{user_id}', summary="Get all tasks created by user", response_model=List[TaskOut])
-async def list_user_created_tasks(user_id: UUID):
+@task_router.get('/created/{user_id}', summary="Get all tasks created by user", response_model=Page[TaskOut])
+async def list_user_created_tasks(request: Request, user_id: UUID, cursor: Optional[str] = None,
+                                  limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+                                  expansion: Expansion = Depends(expand_query(Task, TaskOut))):
     """
-    Get all tasks created by a user.
+    Get all tasks created by a user, one page at a time.
 
     Args:
         user_id (UUID): The ID of the user.
+        cursor (Optional[str]): The next_cursor of the previous page, omitted for the first page.
+        limit (int): The maximum number of tasks to return.
+        expansion (Expansion): Links to resolve, from the expand query parameter.
 
     Returns:
-        List[TaskOut]: A list of tasks created by the user.
+        Page[TaskOut]: A page of tasks created by the user.
     """
-    return await TaskService.list_tasks_by_creator(user_id)
+    if wants_ndjson(request):
+        return ndjson_response(await TaskService.list_tasks_by_creator(user_id, stream=True), TaskOut)
+    page = await TaskService.list_tasks_by_creator(user_id, cursor=cursor, limit=limit, projection=expansion.projection)
+    return await expansion.page(page, TaskOut)
+
+
+@task_router.get('/stats', summary="Count the current user's tasks", response_model=UserTaskStats)
+async def get_task_stats(current_user: User = Depends(get_current_user)):
+    """
+    Count the tasks assigned to and created by the current user, by status and by overdue or not.
+
+    Args:
+        current_user (User): The authenticated user.
+
+    Returns:
+        UserTaskStats: The task counts of the current user.
+    """
+    return await TaskService.get_user_task_stats(current_user.user_id)
+
+
+@task_router.get('/search', summary="Search the current user's tasks", response_model=Page[TaskSearchHit])
+async def search_tasks(q: str = Query(..., min_length=1, max_length=settings.TASK_SEARCH_MAX_QUERY_LENGTH),
+                       project_id: Optional[UUID] = None, status: Optional[StatusEnum] = None,
+                       cursor: Optional[str] = None,
+                       limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+                       current_user: User = Depends(get_current_user)):
+    """
+    Search the titles and descriptions of the tasks the current user created or is assigned to, most relevant first.
+
+    Args:
+        q (str): The search terms; "quoted phrases" must match exactly and -terms exclude tasks.
+        project_id (Optional[UUID]): Only search the tasks of this project.
+        status (Optional[StatusEnum]): Only search tasks with this status.
+        cursor (Optional[str]): The next_cursor of the previous page, omitted for the first page.
+        limit (int): The maximum number of tasks to return.
+        current_user (User): The authenticated user.
+
+    Returns:
+        Page[TaskSearchHit]: A page of matching tasks with their relevance score.
+    """
+    page = await TaskService.search_tasks(current_user.user_id, q, project_id=project_id, status=status,
+                                          cursor=cursor, limit=limit)
+    return model_response(Page[TaskSearchHit], page)
+
+
+@task_router.post('/feed/token', summary="Issue a token to open the task feed with", response_model=TaskFeedToken)
+async def issue_task_feed_token(current_user: User = Depends(get_current_user)):
+    """
+    Issue a short-lived token that opens the current user's task feed from its token query parameter, for browsers,
+    whose EventSource cannot send an Authorization header. The token is good for nothing else.
+
+    Args:
+        current_user (User): The authenticated user.
+
+    Returns:
+        TaskFeedToken: The token and the number of seconds it can be used for.
+    """
+    expires_in = settings.TASK_FEED_TOKEN_EXPIRATION_SECONDS
+    token = create_access_token(str(current_user.user_id), timedelta(seconds=expires_in), scope=TASK_FEED_SCOPE)
+    return TaskFeedToken(token=token, expires_in=expires_in)
+
+
+@task_router.get('/feed', summary="Stream changes to the current user's tasks")
+async def stream_task_changes(last_event_id: Optional[str] = Header(None),
+                              resume_from: Optional[str] = Query(None, alias="last_event_id"),
+                              current_user: User = Depends(get_feed_user)):
+    """
+    Stream changes to the tasks the current user created, is assigned or whose project they own or belong to, as
+    server-sent events.
+
+    Each change is a "task" event holding a TaskChange, with its id set to the change's resume token. A client
+    reconnecting with the Last-Event-ID header, or the last_event_id query parameter, receives the changes it missed
+    first. A "reset" event means missed changes could not be recovered and the client should reload its tasks.
+
+    Browsers authenticate with ``?token=`` and a token from POST /task/feed/token. EventSource reconnects on its own
+    with the same URL while that token is valid; once it has expired the reconnect is refused, and the client opens a
+    new EventSource with a fresh token and ``last_event_id``.
+
+    Args:
+        last_event_id (Optional[str]): The id of the last event received before reconnecting.
+        resume_from (Optional[str]): The same, for clients that cannot set the header.
+        current_user (User): The authenticated user.
+
+    Returns:
+        StreamingResponse: The text/event-stream of task changes.
+    """
+    return sse_response(await task_feed.stream(current_user, resume_token(last_event_id or resume_from)))
 
 
 @task_router.post('create', summary="Create a new task", response_model=TaskOut)
@@ -45,40 +146,51 @@ async def create_task(data: TaskCreate, current_user: User = Depends(get_current
 
 
 @task_router.get('/tasks/{task_id}', summary="Get a task by id", response_model=TaskOut)
-async def get_task_by_id(task_id: UUID):
+async def get_task_by_id(request: Request, task_id: UUID,
+                         expansion: Expansion = Depends(expand_query(Task, TaskOut))):
     """
        Get a task by id.
 
+       The response carries an ETag (the task version) and Last-Modified (its updated_at). A request whose
+       If-None-Match or If-Modified-Since still matches gets an empty 304 without the task being loaded. Responses
+       with expanded links or a sparse field set carry neither.
+
        :param task_id: The id of the task to retrieve.
        :type task_id: :class:`UUID`
+       :param expansion: Links to resolve, from the expand query parameter.
 
        :return: The task with the specified id.
        :rtype: :class:`TaskOut`
 
     """
-    return await TaskService.get_task_by_id(task_id)
+    if not expansion.reshaped and is_conditional(request):
+        validator = await TaskService.get_task_validator(task_id)
+        if validator is not None:
+            version, updated_at = validator
+            if is_not_modified(request, version_etag(version), updated_at):
+                return not_modified(version_etag(version), updated_at)
+
+    task = await TaskService.get_task_by_id(task_id, projection=expansion.projection)
+    response = await expansion.one(task, TaskOut)
+    if task is not None and not expansion.reshaped:
+        response.headers.update(validator_headers(version_etag(task.version or 0), task.updated_at))
+    return response
 
 
 @task_router.put('/tasks/{task_id}', summary="Update task by id", response_model=TaskOut)
-async def update_task(task_id: UUID, data: TaskUpdate, current_user: User = Depends(get_current_user)):
+async def update_task(task_id: UUID, data: TaskUpdate, current_user: User = Depends(get_current_user),
+                      version: Optional[int] = Depends(expected_version)):
     """
     Update a task based on task_id.
 
     :param task_id: The ID of the task to update.
     :param data: The updated task data.
     :param current_user: The current user making the request.
+    :param version: The task version the update is conditional on, from If-Match or the version parameter.
     :return: The updated task.
     """
-    task = await TaskService.get_task_by_id(task_id)
-
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    if 'due_date' in data.dict():
-        if current_user.id != task.created_by or current_user.role != 'admin':
-            raise HTTPException(status_code=403,
-                                detail="You do not have permission to update the due date of this task")
-    return await TaskService.update_task(task_id=task_id, data=data)
+    return await TaskService.update_task(task_id=task_id, data=data, current_user=current_user,
+                                         expected_version=version)
 
 
 @task_router.delete('/tasks/{task_id}', summary="Delete task by id")
@@ -94,74 +206,176 @@ async def delete_task(task_id: UUID):
     return None
 
 
+@task_router.post('/bulk/create', summary="Create many tasks", response_model=List[BulkItemResult])
+async def bulk_create_tasks(items: List[Any] = Body(..., max_length=settings.BULK_MAX_ITEMS),
+                            current_user: User = Depends(get_current_user)):
+    """
+    Create many tasks in one request.
+
+    :param items: The tasks to create, each in the shape of TaskCreate.
+    :param current_user: The current user who is creating the tasks.
+    :return: One result per item, in item order.
+    """
+    return await TaskService.bulk_create_tasks(user=current_user, items=items)
+
+
+@task_router.post('/bulk/update', summary="Update many tasks", response_model=List[BulkItemResult])
+async def bulk_update_tasks(items: List[Any] = Body(..., max_length=settings.BULK_MAX_ITEMS),
+                            current_user: User = Depends(get_current_user)):
+    """
+    Update many tasks in one request.
+
+    :param items: The updates, each a TaskUpdate with the task_id of the task to update.
+    :param current_user: The current user making the request.
+    :return: One result per item, in item order.
+    """
+    return await TaskService.bulk_update_tasks(current_user=current_user, items=items)
+
+
+@task_router.post('/bulk/delete', summary="Delete many tasks", response_model=List[BulkItemResult])
+async def bulk_delete_tasks(items: List[Any] = Body(..., max_length=settings.BULK_MAX_ITEMS),
+                            current_user: User = Depends(get_current_user)):
+    """
+    Delete many tasks in one request.
+
+    :param items: The task_ids of the tasks to delete.
+    :param current_user: The current user making the request.
+    :return: One result per item, in item order.
+    """
+    return await TaskService.bulk_delete_tasks(items=items)
+
+
 @task_router.get('/assigned/{user_id}', summary="Get tasks assigned to user")
-async def get_assigned_tasks(user_id: UUID) -> List[Task]:
+async def get_assigned_tasks(request: Request, user_id: UUID, cursor: Optional[str] = None,
+                             limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1,
+                                                le=settings.MAX_PAGE_SIZE),
+                             expansion: Expansion = Depends(expand_query(Task))) -> Page[Task]:
     """
-    Get tasks assigned to user.
+    Get tasks assigned to user, one page at a time.
+
+    The response carries an ETag derived from the number of tasks that left the user's listing and the latest
+    updated_at of those still in it, each a single index seek, so a request whose If-None-Match still matches gets an
+    empty 304 without the page being read. Responses with expanded links or a sparse field set carry none.
 
     :param user_id: The unique identifier of the user.
     :type user_id: UUID
-    :return: The list of tasks assigned to the user.
-    :rtype: List[Task]
+    :param cursor: The next_cursor of the previous page, omitted for the first page.
+    :param limit: The maximum number of tasks to return.
+    :param expansion: Links to resolve, from the expand query parameter.
+    :return: A page of tasks assigned to the user.
+    :rtype: Page[Task]
     """
-    return await TaskService.list_tasks_by_assignee_id(user_id)
+    if wants_ndjson(request):
+        return ndjson_response(await TaskService.list_tasks_by_assignee_id(user_id, stream=True))
+    etag = None
+    if not expansion.reshaped:
+        # read before the page, so a concurrent write can only make the tag older than the body, never newer
+        etag = listing_etag(*await TaskService.get_assignee_listing_validator(user_id), cursor, limit)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+
+    page = await TaskService.list_tasks_by_assignee_id(user_id, cursor=cursor, limit=limit,
+                                                       projection=expansion.projection)
+    response = await expansion.page(page)
+    if etag is not None:
+        response.headers.update(validator_headers(etag))
+    return response
 
 
 @task_router.get('/overdue', summary="Get all overdue tasks")
-async def get_all_overdue_tasks() -> List[Task]:
+async def get_all_overdue_tasks(request: Request, cursor: Optional[str] = None,
+                                limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1,
+                                                   le=settings.MAX_PAGE_SIZE),
+                                expansion: Expansion = Depends(expand_query(Task))) -> Page[Task]:
     """
-    Get all overdue tasks.
+    Get all overdue tasks, one page at a time.
 
-    :return: A list of all overdue tasks.
-    :rtype: List[Task]
+    :param cursor: The next_cursor of the previous page, omitted for the first page.
+    :param limit: The maximum number of tasks to return.
+    :param expansion: Links to resolve, from the expand query parameter.
+    :return: A page of overdue tasks.
+    :rtype: Page[Task]
     """
-    return await TaskService.list_all_overdue_tasks()
+    if wants_ndjson(request):
+        return ndjson_response(await TaskService.list_all_overdue_tasks(stream=True))
+    page = await TaskService.list_all_overdue_tasks(cursor=cursor, limit=limit, projection=expansion.projection)
+    return await expansion.page(page)
 
 
 @task_router.get('/overdue/{assignee_id}', summary="Get all overdue tasks for an assignee")
-async def get_overdue_tasks_by_assignee_id(assignee_id: UUID) -> List[Task]:
+async def get_overdue_tasks_by_assignee_id(request: Request, assignee_id: UUID, cursor: Optional[str] = None,
+                                           limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1,
+                                                              le=settings.MAX_PAGE_SIZE),
+                                           expansion: Expansion = Depends(expand_query(Task))) -> Page[Task]:
     """
 
-    Get all overdue tasks for an assignee by assignee ID.
+    Get all overdue tasks for an assignee by assignee ID, one page at a time.
 
     Parameters:
     - assignee_id (UUID): The identifier of the assignee.
+    - cursor (Optional[str]): The next_cursor of the previous page, omitted for the first page.
+    - limit (int): The maximum number of tasks to return.
+    - expansion (Expansion): Links to resolve, from the expand query parameter.
 
     Returns:
-    - List[Task]: A list of overdue tasks associated with the given assignee.
+    - Page[Task]: A page of overdue tasks associated with the given assignee.
 
     """
-    return await TaskService.list_overdue_tasks_by_assignee(assignee_id)
+    if wants_ndjson(request):
+        return ndjson_response(await TaskService.list_overdue_tasks_by_assignee(assignee_id, stream=True))
+    page = await TaskService.list_overdue_tasks_by_assignee(assignee_id, cursor=cursor, limit=limit,
+                                                            projection=expansion.projection)
+    return await expansion.page(page)
 
 
 @task_router.get('/due/{date}', summary="Get tasks by due date")
-async def get_tasks_by_due_date(date: datetime) -> List[Task]:
+async def get_tasks_by_due_date(request: Request, date: datetime, cursor: Optional[str] = None,
+                                limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1,
+                                                   le=settings.MAX_PAGE_SIZE),
+                                expansion: Expansion = Depends(expand_query(Task))) -> Page[Task]:
     """
 
     Get tasks by due date.
 
-    This method is used to retrieve a list of tasks based on their due date.
+    This method is used to retrieve a page of tasks based on their due date.
 
     Parameters:
     - date (datetime): The due date for which to retrieve tasks.
+    - cursor (Optional[str]): The next_cursor of the previous page, omitted for the first page.
+    - limit (int): The maximum number of tasks to return.
+    - expansion (Expansion): Links to resolve, from the expand query parameter.
 
     Returns:
-    - List[Task]: A list of tasks that are due on the specified date.
+    - Page[Task]: A page of tasks that are due on the specified date.
 
     """
-    return await TaskService.get_tasks_by_due_date(date)
+    if wants_ndjson(request):
+        return ndjson_response(await TaskService.get_tasks_by_due_date(date, stream=True))
+    page = await TaskService.get_tasks_by_due_date(date, cursor=cursor, limit=limit, projection=expansion.projection)
+    return await expansion.page(page)
 
 
 @task_router.get('/due/{date}/{assignee_id}', summary="Get tasks by due date")
-async def get_tasks_by_due_date_and_assignee(date: datetime, assignee_id: UUID) -> List[Task]:
+async def get_tasks_by_due_date_and_assignee(request: Request, date: datetime, assignee_id: UUID,
+                                             cursor: Optional[str] = None,
+                                             limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1,
+                                                                le=settings.MAX_PAGE_SIZE),
+                                             expansion: Expansion = Depends(expand_query(Task))) -> Page[Task]:
     """
     Get tasks by due date and assignee.
 
     Parameters:
     - date (datetime): The due date of the tasks.
     - assignee_id (UUID): The ID of the assignee.
+    - cursor (Optional[str]): The next_cursor of the previous page, omitted for the first page.
+    - limit (int): The maximum number of tasks to return.
+    - expansion (Expansion): Links to resolve, from the expand query parameter.
 
     Returns:
-    - List[Task]: A list of Task objects matching the given due date and assignee ID.
+    - Page[Task]: A page of Task objects matching the given due date and assignee ID.
     """
-    return await TaskService.get_tasks_by_due_date_and_assignee(date, assignee_id)
+    if wants_ndjson(request):
+        return ndjson_response(await TaskService.get_tasks_by_due_date_and_assignee(date, assignee_id, stream=True))
+    page = await TaskService.get_tasks_by_due_date_and_assignee(date, assignee_id, cursor=cursor, limit=limit,
+                                                                projection=expansion.projection)
+    return await expansion.page(page)
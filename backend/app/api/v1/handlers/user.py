@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 import pymongo.errors
@@ -10,6 +10,7 @@ from app.schemas.password_reset_schema import PasswordResetSchema
 from app.schemas.user_schema import UserAuth
 from app.schemas.user_schema import UserOut, UserUpdate
 from app.services.user_service import UserService
+from app.utils.preconditions import expected_version
 from app.utils.utils import validate_uuid
 
 user_router = APIRouter()
@@ -42,23 +43,27 @@ async def get_me(user: User = Depends(get_current_user)):
 
 
 @user_router.put('/', summary="Update user", response_model=UserOut)
-async def update_user(user_id: UUID, data: UserUpdate, current_user: User):
+async def update_user(user_id: UUID, data: UserUpdate, current_user: User = Depends(get_current_user),
+                      version: Optional[int] = Depends(expected_version)):
     """
     Update user.
 
     Parameters:
     - user_id (UUID): The ID of the user to update.
     - data (UserUpdate): The data with which to update the user.
+    - current_user (User): The authenticated user making the request.
+    - version (Optional[int]): The user version the update is conditional on, from If-Match or the version parameter.
 
     Returns:
     - UserOut: The updated user.
     """
     validate_uuid(user_id)
-    return await UserService.update_user_by_id(user_id=user_id, user_update=data, current_user=current_user)
+    return await UserService.update_user_by_id(user_id=user_id, user_update=data, current_user=current_user,
+                                               expected_version=version)
 
 
 @user_router.put('/update-roles/{user_id}', summary="Update user roles", response_model=UserOut)
-async def update_user_roles(user_id: UUID, roles: List[str], current_user: User):
+async def update_user_roles(user_id: UUID, roles: List[str], current_user: User = Depends(get_current_user)):
     """
     Update User Roles
 
@@ -92,7 +97,7 @@ async def send_forgot_password(email: str):
     user = await UserService.get_user_by_email(email=email)
     if not user:
         raise HTTPException(status_code=404, detail="Email does not exist")
-    return UserService.send_password_reset_email(email)
+    return await UserService.send_password_reset_email(email)
 
 
 @user_router.post('/reset-password/{token}', summary="Reset password")
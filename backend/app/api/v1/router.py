@@ -1,10 +1,13 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from app.api.auth.jwt import auth_router
-from app.api.v1.handlers import user, task, project
+from app.api.deps.database_deps import require_database
+from app.api.v1.handlers import admin, user, task, project
 
-router = APIRouter()
+# every v1 route reads or writes the database
+router = APIRouter(dependencies=[Depends(require_database)])
 router.include_router(user.user_router, prefix="/user", tags=["user"])
 router.include_router(auth_router, prefix="/auth", tags=["auth"])
 router.include_router(task.task_router, prefix="/task", tags=["task"])
 router.include_router(project.project_router, prefix="/project", tags=["project"])
+router.include_router(admin.admin_router, prefix="/admin", tags=["admin"])
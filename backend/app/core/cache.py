@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    A bounded, in-process cache whose entries expire after a fixed time-to-live.
+
+    Entries are evicted in least-recently-used order once ``maxsize`` is reached. The cache is meant to be used from
+    the event loop thread only, so it does no locking of its own.
+
+    :param maxsize: The maximum number of entries kept in the cache.
+    :param ttl: The number of seconds an entry stays valid after it was set.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for ``key``, or None if it is missing or expired.
+
+        :param key: The cache key.
+        :return: The cached value if present and fresh, otherwise None.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store ``value`` under ``key``, evicting the least recently used entry if the cache is full.
+
+        :param key: The cache key.
+        :param value: The value to cache.
+        :param ttl: Optional per-entry time-to-live in seconds, overriding the cache default.
+        """
+        if self.maxsize <= 0:
+            return
+
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Remove ``key`` from the cache if it is present.
+
+        :param key: The cache key.
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache.
+        """
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the cache size and its hit and miss counters.
+
+        :return: A dict with ``size``, ``maxsize``, ``hits`` and ``misses`` keys.
+        """
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
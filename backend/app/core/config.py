@@ -1,7 +1,10 @@
 from pydantic import AnyHttpUrl
 from pydantic_settings import BaseSettings
 from decouple import config
-from typing import List
+from typing import List, Literal, Optional
+
+# MongoDB read preference modes, by their connection string names; a typo fails at startup rather than on every read
+ReadPreferenceName = Literal["primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"]
 
 
 class Settings(BaseSettings):
@@ -16,10 +19,85 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "KAKARI"
     MONGO_USERNAME: str = config("MONGO_USERNAME", cast=str)
     MONGO_PASSWORD: str = config("MONGO_PASSWORD", cast=str)
+    # replaces the Atlas URI built from MONGO_USERNAME and MONGO_PASSWORD, e.g. mongodb://localhost:27017
+    MONGO_URI: Optional[str] = None
+    MONGO_DATABASE: str = "kakari"
+    MONGO_SERVER_API_VERSION: Optional[str] = "1"
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    # how long an operation waits for a pooled connection before failing, unbounded if unset
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGO_CONNECT_TIMEOUT_MS: int = 20000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = None
+    # comma separated, by preference: zstd (needs zstandard), snappy (needs python-snappy), zlib
+    MONGO_COMPRESSORS: str = ""
+    MONGO_READ_PREFERENCE: ReadPreferenceName = "primary"
+    # read preference of the read-only listings; secondaryPreferred moves them off the primary
+    MONGO_LIST_READ_PREFERENCE: ReadPreferenceName = "primary"
     MAILTRAP_USERNAME: str = config("MAILTRAP_USERNAME")
     MAILTRAP_PASSWORD: str = config("MAILTRAP_PASSWORD")
     BASE_URL: str = config("BASE_URL")
     DOMAIN: str = config("DOMAIN")
+    USER_CACHE_MAX_SIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: int = 60
+    TOKEN_CACHE_MAX_SIZE: int = 4096
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 500
+    # documents fetched per getMore when streaming NDJSON listings
+    STREAM_BATCH_SIZE: int = 500
+    # "thread" or "process"
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    # hashing jobs allowed to run or wait for a worker before new ones are rejected with a 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # a local aiosmtpd stand-in works with MAIL_HOST=localhost, MAIL_PORT=8025, MAIL_USE_TLS=False and no credentials
+    MAIL_HOST: str = "smtp.mailtrap.io"
+    MAIL_PORT: int = 587
+    MAIL_USE_TLS: bool = True
+    MAIL_WORKERS: int = 2
+    MAIL_BATCH_SIZE: int = 20
+    MAIL_QUEUE_MAX_SIZE: int = 1000
+    MAIL_MAX_RETRIES: int = 5
+    MAIL_RETRY_BACKOFF_SECONDS: float = 1.0
+    MAIL_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
+    REMINDERS_ENABLED: bool = True
+    REMINDER_INTERVAL_SECONDS: int = 300
+    # tasks due within this many hours get a "due soon" reminder
+    REMINDER_DUE_SOON_HOURS: int = 24
+    # tasks that became overdue within this many hours get an "overdue" reminder
+    REMINDER_OVERDUE_LOOKBACK_HOURS: int = 24 * 7
+    REMINDER_BATCH_SIZE: int = 500
+    TASK_STATS_CACHE_MAX_SIZE: int = 4096
+    # task writes invalidate their rollups, the TTL bounds how far overdue counts lag behind the clock
+    TASK_STATS_CACHE_TTL_SECONDS: int = 60
+    BULK_MAX_ITEMS: int = 500
+    TASK_SEARCH_MAX_QUERY_LENGTH: int = 200
+    # register the models and build indexes in the background after startup instead of before serving the first request;
+    # the API routes answer 503 until the models are registered
+    DEFER_INDEX_BUILDS: bool = True
+    INDEX_BUILD_RETRY_SECONDS: float = 30.0
+    READINESS_TIMEOUT_SECONDS: float = 2.0
+    # MongoDB commands slower than this are logged and counted per query shape
+    SLOW_QUERY_THRESHOLD_MS: float = 100.0
+    # share of slow read commands re-run under explain("executionStats"), at most one per shape per interval
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = 300.0
+    SLOW_QUERY_MAX_SHAPES: int = 500
+    # streams task changes at /task/feed; change streams need MongoDB to run as a replica set, a single node will do
+    TASK_FEED_ENABLED: bool = True
+    # events a client may fall behind by before it is disconnected to catch up from its last event
+    TASK_FEED_QUEUE_SIZE: int = 1000
+    TASK_FEED_HEARTBEAT_SECONDS: float = 15.0
+    TASK_FEED_RETRY_SECONDS: float = 5.0
+    # events a reconnecting client may catch up on before it is told to reload its tasks instead
+    TASK_FEED_MAX_CATCH_UP: int = 10000
+    # lifetime of the tokens browsers open the feed with, in its query string since EventSource cannot send headers
+    TASK_FEED_TOKEN_EXPIRATION_SECONDS: int = 60
+    # send deletes and reassignments to the task's old audience too, from change stream pre-images; needs MongoDB 6.0+
+    # and a one-off python -m app.migrations.enable_task_pre_images first
+    TASK_FEED_PRE_IMAGES: bool = False
 
 
 class Config:
@@ -0,0 +1,255 @@
+"""
+Reconcile the declared MongoDB indexes and check that task queries use them.
+
+The application registers its models and builds the indexes in the background, through index_reconciler.
+
+Run from the backend directory::
+
+    python -m app.core.indexes            # create missing indexes
+    python -m app.core.indexes --drop     # also drop indexes that are no longer declared
+    python -m app.core.indexes --explain  # fail if any TaskService query shape is a collection scan
+
+tests/test_indexes.py runs the --explain check against a scratch database whenever a mongod is available.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime, time, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import pymongo
+from beanie import init_beanie
+from beanie.odm.utils.init import Initializer
+from beanie.operators import Or, Text
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.core.database import create_motor_client, get_database
+from app.models.password_reset_model import PasswordReset
+from app.models.project_model import Project
+from app.models.task_comment_model import TaskComment
+from app.models.task_listing_model import AssigneeListingVersion
+from app.models.task_model import Task
+from app.models.task_reminder_model import TaskReminder
+from app.models.user_model import User
+from app.services.task_service import OPEN_TASK
+
+logger = logging.getLogger(__name__)
+
+INDEXED_MODELS = [User, Task, TaskComment, Project, PasswordReset, TaskReminder, AssigneeListingVersion]
+
+
+def _collection_name(model) -> str:
+    # beanie only resolves collection names during init_beanie, which is what creates the indexes
+    return getattr(getattr(model, "Settings", None), "name", None) or model.__name__
+
+
+async def reconcile_indexes(database: AsyncIOMotorDatabase, drop: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Bring the indexes of every model collection in line with the models' declarations.
+
+    Missing indexes are created; with ``drop`` set, indexes that are no longer declared are removed as well.
+
+    :param database: The application database.
+    :param drop: Whether to drop undeclared indexes.
+    :return: The created and dropped index names, keyed by collection name.
+    """
+    before = {model: set(await database[_collection_name(model)].index_information()) for model in INDEXED_MODELS}
+    await init_beanie(database=database, document_models=INDEXED_MODELS, allow_index_dropping=drop)
+
+    report = {}
+    for model in INDEXED_MODELS:
+        collection = model.get_motor_collection()
+        existing = before.get(model, set())
+        current = set(await collection.index_information())
+        report[collection.name] = {
+            "created": sorted(current - existing),
+            "dropped": sorted(existing - current),
+        }
+    return report
+
+
+class _DeferredIndexInitializer(Initializer):
+    # init_beanie without the index builds: models are registered and those needing indexes are remembered
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pending_indexes = []
+
+    async def init_indexes(self, cls, allow_index_dropping: bool = False):
+        self.pending_indexes.append(cls)
+
+    async def build_indexes(self) -> None:
+        for cls in self.pending_indexes:
+            await Initializer.init_indexes(self, cls, self.allow_index_dropping)
+
+
+class IndexReconciler:
+    """
+    Registers the document models with Beanie and builds their indexes in a background task, so the application
+    starts serving, /healthz included, without waiting for the database, and before index builds on large collections
+    finish.
+
+    ``initialized`` turns True once the models are registered, which the database-backed routes wait for, and
+    ``ready`` once every declared index exists. A failed step, e.g. while the cluster is unreachable, is logged and
+    retried every ``retry_seconds``; until then ``error`` holds the reason.
+    """
+
+    def __init__(self, retry_seconds: float):
+        self.retry_seconds = retry_seconds
+        self.initialized = False
+        self.ready = False
+        self.error: Optional[str] = None
+        self._initialized = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, database: AsyncIOMotorDatabase, defer: bool = True) -> None:
+        """
+        Register every model in INDEXED_MODELS and build their indexes.
+
+        :param database: The application database.
+        :param defer: Do both in the background; if False, wait for them like init_beanie does.
+        """
+        if defer:
+            self._task = asyncio.create_task(self._run(database), name="index-reconciler")
+        else:
+            initializer = await self._initialize(database)
+            await initializer.build_indexes()
+            self.ready = True
+
+    async def wait_initialized(self) -> None:
+        """
+        Wait until the models are registered with Beanie and can be queried.
+        """
+        await self._initialized.wait()
+
+    async def stop(self) -> None:
+        """
+        Stop registering the models or building the indexes if that is still going on. Builds already sent to the
+        server carry on there.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _initialize(self, database: AsyncIOMotorDatabase) -> _DeferredIndexInitializer:
+        initializer = _DeferredIndexInitializer(database=database, document_models=INDEXED_MODELS)
+        await initializer
+        self.initialized = True
+        self._initialized.set()
+        logger.info("Document models are registered")
+        return initializer
+
+    async def _run(self, database: AsyncIOMotorDatabase) -> None:
+        initializer = await self._retrying("Registering the document models", lambda: self._initialize(database))
+        await self._retrying("Building indexes", initializer.build_indexes)
+        self.ready = True
+        logger.info("Indexes are ready")
+
+    async def _retrying(self, step: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            try:
+                result = await func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.error = str(e)
+                logger.exception("%s failed, retrying in %s seconds", step, self.retry_seconds)
+                await asyncio.sleep(self.retry_seconds)
+            else:
+                self.error = None
+                return result
+
+index_reconciler = IndexReconciler(retry_seconds=settings.INDEX_BUILD_RETRY_SECONDS)
+
+
+def task_query_shapes() -> List[Tuple[str, Dict[str, Any], List[Tuple[str, int]]]]:
+    """
+    Return the filter and sort of every query TaskService issues, filled with placeholder values.
+
+    :return: A list of (name, filter, sort) tuples.
+    """
+    user_id = uuid4()
+    now = datetime.utcnow()
+    start_of_day = datetime.combine(now.date(), time.min)
+    end_of_day = start_of_day + timedelta(days=1)
+    task_sort = [("due_date", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)]
+
+    shapes = [
+        ("get_task_by_id", Task.find(Task.task_id == uuid4()), []),
+        ("list_tasks_by_creator", Task.find(Task.task_creator_id == user_id), task_sort),
+        ("list_tasks_by_assignee_id", Task.find(Task.task_assignee_id == user_id), task_sort),
+        ("get_assignee_listing_validator", Task.find(Task.task_assignee_id == user_id),
+         [("updated_at", pymongo.DESCENDING)]),
+        ("list_tasks_by_project", Task.find(Task.project_id == uuid4()), task_sort),
+        ("list_all_overdue_tasks", Task.find(*OPEN_TASK, Task.due_date < now), task_sort),
+        ("list_overdue_tasks_by_assignee",
+         Task.find(*OPEN_TASK, Task.task_assignee_id == user_id, Task.due_date < now), task_sort),
+        ("get_tasks_by_due_date", Task.find(Task.due_date >= start_of_day, Task.due_date <= end_of_day), task_sort),
+        ("get_tasks_by_due_date_and_assignee",
+         Task.find(Task.due_date >= start_of_day, Task.due_date <= end_of_day, Task.task_assignee_id == user_id),
+         task_sort),
+        ("search_tasks",
+         Task.find(Text("placeholder"), Or(Task.task_creator_id == user_id, Task.task_assignee_id == user_id)), []),
+        ("reminder_window",
+         Task.find(*OPEN_TASK, Task.due_date >= now, Task.due_date < end_of_day,
+                   Task.task_assignee_id != None),  # noqa: E711
+         task_sort),
+    ]
+    return [(name, query.get_filter_query(), sort) for name, query, sort in shapes]
+
+
+def _has_collection_scan(plan: Any) -> bool:
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(_has_collection_scan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_collection_scan(value) for value in plan)
+    return False
+
+
+async def find_collection_scans() -> List[str]:
+    """
+    Explain every TaskService query shape and return the names of those whose winning plan is a collection scan.
+
+    Beanie must already be initialised.
+
+    :return: The names of the offending query shapes.
+    """
+    collection = Task.get_motor_collection()
+    offenders = []
+    for name, query_filter, sort in task_query_shapes():
+        cursor = collection.find(query_filter).limit(settings.DEFAULT_PAGE_SIZE + 1)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        if _has_collection_scan(explain["queryPlanner"]["winningPlan"]):
+            offenders.append(name)
+    return offenders
+
+
+async def main(drop: bool, explain: bool) -> int:
+    database = get_database(create_motor_client())
+
+    for collection, changes in (await reconcile_indexes(database, drop=drop)).items():
+        print(f"{collection}: created={changes['created']} dropped={changes['dropped']}")
+
+    if explain:
+        offenders = await find_collection_scans()
+        for name in offenders:
+            print(f"COLLSCAN: TaskService.{name}")
+        if offenders:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile MongoDB indexes")
+    parser.add_argument("--drop", action="store_true", help="drop indexes that are no longer declared")
+    parser.add_argument("--explain", action="store_true", help="fail if a TaskService query is a collection scan")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.drop, args.explain)))
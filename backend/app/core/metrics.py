@@ -0,0 +1,263 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+# seconds; spans a cached lookup up to a request that should have been a background job
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ASGI scope of the request being handled; Motor copies the context into the threads running pymongo, so monitoring
+# listeners can tell which route issued a command
+request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    A Prometheus counter with labels. Updates take a lock, so they are safe from pymongo's monitoring threads.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        lines.extend(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}" for labels, value in values)
+        return lines
+
+
+class Gauge(Counter):
+    """
+    A Prometheus gauge with labels.
+    """
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """
+    A Prometheus histogram with labels and fixed buckets.
+
+    Each observation costs a bisect over the bucket bounds and a few additions under a lock; cumulative bucket counts
+    are only computed when the histogram is rendered.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # per label set: [count per bucket (the last one is +Inf), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._values.items()]
+        for labels, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The metrics exposed at /metrics.
+
+    Besides the metrics registered up front, ``collectors`` are called at render time to report gauges of state kept
+    elsewhere, e.g. pool and queue statistics; each returns (name, documentation, value) tuples.
+    """
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, float]]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, float]]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Return every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, documentation, value in collector():
+                lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} gauge", f"{name} {_number(value)}"])
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    "kakari_http_requests_total", "HTTP requests by route template, method and status code.",
+    ("route", "method", "status")))
+http_request_duration = registry.register(Histogram(
+    "kakari_http_request_duration_seconds", "HTTP request latency by route template and method.",
+    ("route", "method")))
+http_in_flight = registry.register(Gauge(
+    "kakari_http_requests_in_flight", "HTTP requests being handled."))
+mongo_command_duration = registry.register(Histogram(
+    "kakari_mongo_command_duration_seconds", "MongoDB command latency by collection and command.",
+    ("collection", "command")))
+mongo_command_failures = registry.register(Counter(
+    "kakari_mongo_command_failures_total", "Failed MongoDB commands by collection and command.",
+    ("collection", "command")))
+
+
+def route_template(scope: Optional[dict]) -> str:
+    """
+    Return the template of the route that matched a request, ``unmatched`` if none did yet.
+    """
+    route = scope.get("route") if scope is not None else None
+    return route.path_format if route is not None else "unmatched"
+
+
+def current_route() -> str:
+    """
+    Return the route template of the request being handled, or an empty string outside of a request.
+    """
+    scope = request_scope.get()
+    return route_template(scope) if scope is not None else ""
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts, latency and in-flight requests.
+
+    Requests are labelled with the template of the route that handled them (``/task/tasks/{task_id}``), read from
+    the scope after routing, so the number of label sets stays bounded; requests no route matched share the
+    ``unmatched`` label. The scope is also published in ``request_scope`` for the duration of the request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        token = request_scope.set(scope)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_scope.reset(token)
+            http_in_flight.dec()
+            template = route_template(scope)
+            http_request_duration.observe((template, scope["method"]), elapsed)
+            http_requests.inc((template, scope["method"], str(status_code)))
+
+
+# commands whose first field is not the collection name
+_COLLECTION_FIELDS = {"getMore": "collection"}
+
+
+def command_collection(command_name: str, command: dict) -> str:
+    """
+    Return the collection a MongoDB command targets, or an empty string for database and admin commands.
+    """
+    value = command.get(_COLLECTION_FIELDS.get(command_name, command_name))
+    return value if isinstance(value, str) else ""
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    pymongo command listener recording the latency and failures of every command, per collection and command name.
+
+    The collection is only known from the started event, so it is kept until the matching succeeded or failed event
+    arrives; pymongo reports both with the same request and connection ids.
+    """
+
+    def __init__(self):
+        self._collections: Dict[Tuple[int, Optional[tuple]], str] = {}
+
+    def started(self, event):
+        self._collections[(event.request_id, event.connection_id)] = command_collection(event.command_name,
+                                                                                        event.command)
+
+    def succeeded(self, event):
+        collection = self._collections.pop((event.request_id, event.connection_id), "")
+        mongo_command_duration.observe((collection, event.command_name), event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection = self._collections.pop((event.request_id, event.connection_id), "")
+        mongo_command_duration.observe((collection, event.command_name), event.duration_micros / 1e6)
+        mongo_command_failures.inc((collection, event.command_name))
+
+
+command_metrics = CommandMetrics()
@@ -1,15 +1,28 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Union, Any
+from typing import Union, Any, Callable, Optional
 
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.schemas.auth_schema import TokenPayload
 
 password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+_password_executor: Optional[Executor] = None
+_pending_password_jobs = 0
 
-def create_access_token(subject: Union[str, Any], expires_delta: int = None) -> str:
+# verified token payloads keyed by (signing key, sha256 of the token); every entry expires at the token's own exp
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=settings.ACCESS_TOKEN_EXPIRATION_MINUTES * 60)
+
+
+def create_access_token(subject: Union[str, Any], expires_delta: int = None, scope: Optional[str] = None) -> str:
     """
     Create Access Token
 
@@ -18,6 +31,7 @@ def create_access_token(subject: Union[str, Any], expires_delta: int = None) ->
     :param subject: The subject of the token. It can be a string or any other object.
     :param expires_delta: The expiration time delta in seconds. If not provided, the default expiration time from the
     settings will be used.
+    :param scope: If given, the token is only accepted where this scope is, never as a general access token.
     :return: The generated JWT access token as a string.
 
     """
@@ -27,6 +41,8 @@ def create_access_token(subject: Union[str, Any], expires_delta: int = None) ->
         expires_delta = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRATION_MINUTES)
 
     to_encode = {"exp": expires_delta, "sub": subject}
+    if scope is not None:
+        to_encode["scope"] = scope
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -53,25 +69,114 @@ def create_refresh_token(subject: Union[str, Any], expires_delta: int = None) ->
     return encoded_jwt
 
 
-def get_password(password: str) -> str:
+def decode_token(token: str, secret_key: str) -> TokenPayload:
+    """
+    Verify a JWT and return its parsed payload, reusing earlier verifications of the same token.
+
+    Tokens that were already verified are served from token_cache until their own expiry, skipping the signature check
+    and the payload validation. Tokens without an exp claim are never cached.
+
+    :param token: The encoded JWT.
+    :param secret_key: The key the token must be signed with.
+    :return: The token payload.
+    :raises jwt.JWTError: If the token is invalid or expired.
+    :raises ValidationError: If the payload does not match TokenPayload.
+    """
+    cache_key = (secret_key, hashlib.sha256(token.encode()).digest())
+    now = time.time()
+
+    payload = token_cache.get(cache_key)
+    if payload is not None and payload.exp > now:
+        return payload
+
+    payload = TokenPayload(**jwt.decode(token=token, key=secret_key, algorithms=[settings.ALGORITHM]))
+    if payload.exp is not None and payload.exp > now:
+        token_cache.set(cache_key, payload, ttl=payload.exp - now)
+    return payload
+
+
+def _hash_password(password: str) -> str:
+    return password_context.hash(password)
+
+
+def _verify_password(password: str, hashed_password: str) -> bool:
+    return password_context.verify(password, hashed_password)
+
+
+def get_password_executor() -> Executor:
     """
-    Hashes a password using the password_context object.
+    Return the executor bcrypt work is sent to, creating it on first use.
+
+    The executor kind and size come from settings.PASSWORD_HASH_EXECUTOR and settings.PASSWORD_HASH_WORKERS.
+
+    :return: The password hashing executor.
+    """
+    global _password_executor
+    if _password_executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _password_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS,
+                                                    thread_name_prefix="password-hash")
+    return _password_executor
+
+
+def shutdown_password_executor() -> None:
+    """
+    Shut down the password hashing executor, if it was started.
+    """
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+
+
+async def _run_password_job(func: Callable, *args) -> Any:
+    """
+    Run a bcrypt job on the password executor without blocking the event loop.
+
+    At most settings.PASSWORD_HASH_MAX_PENDING jobs may be running or queued at once; beyond that the request is shed
+    so a login flood cannot starve the rest of the API.
+
+    :raises HTTPException: 503 if the admission limit has been reached.
+    """
+    global _pending_password_jobs
+    if _pending_password_jobs >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent authentication requests, please retry shortly.",
+            headers={"Retry-After": "1"}
+        )
+
+    _pending_password_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_password_executor(), func, *args)
+    finally:
+        _pending_password_jobs -= 1
+
+
+async def get_password(password: str) -> str:
+    """
+    Hashes a password using the password_context object, on the password hashing executor.
 
     :param password: The password to be hashed.
     :type password: str
     :return: The hashed password.
     :rtype: str
+    :raises HTTPException: 503 if too many hashing jobs are already pending.
     """
-    return password_context.hash(password)
+    return await _run_password_job(_hash_password, password)
 
 
-def verify_password(password: str, hashed_password: str) -> bool:
+async def verify_password(password: str, hashed_password: str) -> bool:
     """
-    Verifies if a given password matches a hashed password.
+    Verifies if a given password matches a hashed password, on the password hashing executor.
 
     :param password: The password to be verified.
     :param hashed_password: The hashed password to be compared against.
 
     :return: True if the password matches the hashed password, False otherwise.
+    :raises HTTPException: 503 if too many hashing jobs are already pending.
     """
-    return password_context.verify(password, hashed_password)
+    return await _run_password_job(_verify_password, password, hashed_password)
@@ -0,0 +1,316 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.core.config import settings
+from app.core.metrics import command_collection, current_route
+
+logger = logging.getLogger(__name__)
+
+# the parts of a command that make up its query shape, per command name
+SHAPE_FIELDS = {
+    "find": ("filter", "sort", "projection"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+}
+# read commands that are safe to run again under explain
+EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+# fields the driver adds to a command that explain must not carry
+DRIVER_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "readConcern"}
+# fields of an update or delete statement that are part of its shape
+STATEMENT_FIELDS = ("q", "u", "multi", "upsert", "limit")
+# field names whose value is a field name or a flag, not a query value
+KEPT_VALUES = {"key", "sort", "projection", "$project", "$sort", "$group", "$unwind", "$lookup", "$count",
+               "multi", "upsert", "limit"}
+
+
+def normalize(value: Any, keep: bool = False) -> Any:
+    """
+    Return ``value`` with every query value replaced by ``"?"``, keeping field names and operators.
+
+    Values of stages and options naming fields (``$sort``, ``$group``, a projection, ...) are kept as they are, since
+    they are part of the shape; so are the elements of lists of documents such as ``$or`` clauses or a pipeline.
+    """
+    if isinstance(value, dict):
+        return {key: normalize(item, keep or key in KEPT_VALUES) for key, item in value.items()}
+    if isinstance(value, list):
+        if value and all(isinstance(item, dict) for item in value):
+            return [normalize(item, keep) for item in value]
+        return value if keep else "?"
+    return value if keep else "?"
+
+
+def query_shape(command_name: str, command: dict) -> Dict[str, Any]:
+    """
+    Return the normalized shape of a MongoDB command: its filter, sort and similar parts, with the values stripped.
+    """
+    shape: Dict[str, Any] = {}
+    for field in SHAPE_FIELDS.get(command_name, ()):
+        if field not in command:
+            continue
+        if field in ("updates", "deletes"):
+            statements = command[field] or [{}]
+            # one statement stands for the batch; a bulk write usually repeats the same shape
+            shape[field] = normalize({name: statements[0][name] for name in STATEMENT_FIELDS if name in statements[0]})
+        else:
+            shape[field] = normalize(command[field], keep=field in KEPT_VALUES)
+    return shape
+
+
+def explain_command(command_name: str, command: dict) -> Optional[dict]:
+    """
+    Return the explain command for a slow read command, or None if it should not be re-run.
+
+    Aggregations writing with ``$out`` or ``$merge`` are never explained, as explain would still need write access.
+    """
+    if command_name not in EXPLAINABLE:
+        return None
+    pipeline = command.get("pipeline", []) if command_name == "aggregate" else []
+    if any("$out" in stage or "$merge" in stage for stage in pipeline):
+        return None
+    explained = {key: value for key, value in command.items() if key not in DRIVER_FIELDS}
+    return {"explain": explained, "verbosity": "executionStats"}
+
+
+def _execution_stats(explain: dict) -> Optional[dict]:
+    if "executionStats" in explain:
+        return explain["executionStats"]
+    # aggregations that are not pushed down to the query layer report their $cursor stage
+    for stage in explain.get("stages", []):
+        if "$cursor" in stage and "executionStats" in stage["$cursor"]:
+            return stage["$cursor"]["executionStats"]
+    return None
+
+
+def _winning_plan(explain: dict) -> Optional[dict]:
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        for stage in explain.get("stages", []):
+            planner = stage.get("$cursor", {}).get("queryPlanner")
+            if planner is not None:
+                break
+    if planner is None:
+        return None
+    plan = planner.get("winningPlan", {})
+    # the slot based engine nests the classic plan tree one level down
+    return plan.get("queryPlan", plan)
+
+
+def plan_summary(explain: dict) -> Optional[str]:
+    """
+    Return the stages of the winning plan from the root down, e.g. ``FETCH > IXSCAN``, or ``COLLSCAN``.
+    """
+    plan = _winning_plan(explain)
+    stages = []
+    while plan:
+        stages.append(plan.get("stage", "?"))
+        children = plan.get("inputStages") or [plan.get("inputStage")]
+        plan = children[0]
+    return " > ".join(stages) if stages else None
+
+
+class SlowQueryShape:
+    """
+    Counters of the slow commands sharing one query shape.
+    """
+
+    def __init__(self, collection: str, command: str, shape: Dict[str, Any]):
+        self.collection = collection
+        self.command = command
+        self.shape = shape
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_seen = 0.0
+        self.routes: Dict[str, int] = {}
+        self.docs_examined: Optional[int] = None
+        self.keys_examined: Optional[int] = None
+        self.docs_returned: Optional[int] = None
+        self.plan: Optional[str] = None
+        self.explained_at: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "collection": self.collection,
+            "command": self.command,
+            "shape": self.shape,
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "max_ms": self.max_ms,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "last_seen": self.last_seen,
+            "routes": dict(self.routes),
+            "docs_examined": self.docs_examined,
+            "keys_examined": self.keys_examined,
+            "docs_returned": self.docs_returned,
+            "plan": self.plan,
+        }
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """
+    pymongo command listener logging every command slower than ``threshold_ms``.
+
+    Slow commands are logged with their normalized query shape, collection, duration and the route template of the
+    request that issued them, and counted per shape; ``top`` returns the worst shapes. A sample of slow read commands,
+    ``explain_sample_rate`` of them and at most one per shape every ``explain_interval_seconds``, is re-run under
+    ``explain("executionStats")`` by a background task, so the log and the counters show the winning plan and the
+    documents examined versus returned.
+
+    The listener only remembers the command of each started event until it finishes; the shape is computed for slow
+    commands alone, so fast commands cost a dictionary insert and pop.
+    """
+
+    def __init__(self, threshold_ms: float, explain_sample_rate: float, explain_interval_seconds: float,
+                 max_shapes: int, explain_queue_size: int = 100):
+        self.threshold_ms = threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_interval_seconds = explain_interval_seconds
+        self.max_shapes = max_shapes
+        self.explain_queue_size = explain_queue_size
+        self._started: Dict[Tuple[int, Optional[tuple]], Tuple[dict, str]] = {}
+        self._shapes: Dict[Tuple[str, str, str], SlowQueryShape] = {}
+        self._lock = threading.Lock()
+        self._client: Optional[AsyncIOMotorClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, client: AsyncIOMotorClient) -> None:
+        """
+        Start explaining sampled slow commands through ``client``. Without it slow commands are still logged.
+        """
+        self._client = client
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.explain_queue_size)
+        self._task = asyncio.create_task(self._explain_forever(), name="slow-query-explain")
+
+    async def stop(self) -> None:
+        """
+        Stop the explain task, dropping the commands still waiting to be explained.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = self._queue = self._loop = self._client = None
+
+    def top(self, limit: int, sort: str = "total_ms") -> List[Dict[str, Any]]:
+        """
+        Return the ``limit`` slow query shapes with the highest ``sort`` (total_ms, max_ms or count).
+        """
+        with self._lock:
+            shapes = [shape.as_dict() for shape in self._shapes.values()]
+        return sorted(shapes, key=lambda shape: shape[sort], reverse=True)[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+
+    def started(self, event):
+        if event.command_name == "explain":
+            return
+        self._started[(event.request_id, event.connection_id)] = (event.command, current_route())
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+    def _finished(self, event) -> None:
+        started = self._started.pop((event.request_id, event.connection_id), None)
+        if started is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+        command, route = started
+        try:
+            self._record(event.command_name, event.database_name, command, route, duration_ms)
+        except Exception:
+            # a monitoring listener must never fail the command it observes
+            logger.exception("Could not record slow %s command", event.command_name)
+
+    def _record(self, command_name: str, database_name: str, command: dict, route: str, duration_ms: float) -> None:
+        collection = command_collection(command_name, command)
+        shape = query_shape(command_name, command)
+        shape_key = json.dumps(shape, sort_keys=True, default=str)
+        now = time.time()
+        with self._lock:
+            entry = self._shapes.get((collection, command_name, shape_key))
+            if entry is None:
+                if len(self._shapes) >= self.max_shapes:
+                    del self._shapes[min(self._shapes, key=lambda key: self._shapes[key].total_ms)]
+                entry = self._shapes[(collection, command_name, shape_key)] = SlowQueryShape(collection,
+                                                                                            command_name, shape)
+            entry.count += 1
+            entry.total_ms += duration_ms
+            entry.max_ms = max(entry.max_ms, duration_ms)
+            entry.last_seen = now
+            entry.routes[route] = entry.routes.get(route, 0) + 1
+            explain = explain_command(command_name, command) if self._should_explain(entry, now) else None
+            if explain is not None:
+                entry.explained_at = now
+
+        logger.warning("Slow %s on %s took %.1fms (route %s): %s", command_name, collection, duration_ms,
+                       route or "-", shape_key)
+        loop = self._loop
+        if explain is not None and loop is not None:
+            loop.call_soon_threadsafe(self._enqueue, (entry, database_name, explain))
+
+    def _should_explain(self, entry: SlowQueryShape, now: float) -> bool:
+        if self._loop is None or self._loop.is_closed():
+            return False
+        if entry.explained_at is not None and now - entry.explained_at < self.explain_interval_seconds:
+            return False
+        return random.random() < self.explain_sample_rate
+
+    def _enqueue(self, item) -> None:
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # explains are samples, losing some under load is fine
+            pass
+
+    async def _explain_forever(self) -> None:
+        while True:
+            entry, database_name, explain = await self._queue.get()
+            try:
+                result = await self._client[database_name].command(explain)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Could not explain slow %s on %s: %s", entry.command, entry.collection, e)
+                continue
+            self._apply_explain(entry, result)
+
+    def _apply_explain(self, entry: SlowQueryShape, result: dict) -> None:
+        stats = _execution_stats(result) or {}
+        with self._lock:
+            entry.docs_examined = stats.get("totalDocsExamined")
+            entry.keys_examined = stats.get("totalKeysExamined")
+            entry.docs_returned = stats.get("nReturned")
+            entry.plan = plan_summary(result)
+        logger.warning("Explained slow %s on %s: plan %s, %s docs and %s keys examined, %s returned: %s",
+                       entry.command, entry.collection, entry.plan, entry.docs_examined, entry.keys_examined,
+                       entry.docs_returned, json.dumps(entry.shape, sort_keys=True, default=str))
+
+
+slow_query_log = SlowQueryLog(threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+                              explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+                              explain_interval_seconds=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+                              max_shapes=settings.SLOW_QUERY_MAX_SHAPES)
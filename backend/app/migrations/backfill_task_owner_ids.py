@@ -0,0 +1,70 @@
+"""
+Backfill Task.task_creator_id and Task.task_assignee_id on tasks written before those fields existed.
+
+Tasks are processed in _id order and in fixed-size batches; each batch costs one users query and one bulk write. The
+script is idempotent and can be re-run or interrupted at any point.
+
+Run from the backend directory::
+
+    python -m app.migrations.backfill_task_owner_ids
+"""
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from app.core.database import create_motor_client, get_database
+
+
+async def backfill_task_owner_ids(database, batch_size: int = 1000) -> int:
+    """
+    Copy each task creator's and assignee's public user_id onto the task.
+
+    :param database: The application database.
+    :param batch_size: The number of tasks handled per round trip.
+    :return: The number of tasks updated.
+    """
+    tasks = database["tasks"]
+    users = database["users"]
+    pending = {"$or": [
+        {"task_creator_id": {"$exists": False}},
+        {"task_assignee_id": {"$exists": False}},
+    ]}
+
+    updated = 0
+    last_id = None
+    while True:
+        query = pending if last_id is None else {"$and": [pending, {"_id": {"$gt": last_id}}]}
+        batch = await tasks.find(query, {"task_creator": 1, "task_assignee": 1}) \
+            .sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            return updated
+        last_id = batch[-1]["_id"]
+
+        object_ids = {link.id for task in batch for link in (task.get("task_creator"), task.get("task_assignee"))
+                      if link is not None}
+        user_ids = {user["_id"]: user.get("user_id")
+                    async for user in users.find({"_id": {"$in": list(object_ids)}}, {"user_id": 1})}
+
+        operations = []
+        for task in batch:
+            creator, assignee = task.get("task_creator"), task.get("task_assignee")
+            operations.append(UpdateOne({"_id": task["_id"]}, {"$set": {
+                "task_creator_id": user_ids.get(creator.id) if creator is not None else None,
+                "task_assignee_id": user_ids.get(assignee.id) if assignee is not None else None,
+            }}))
+        result = await tasks.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+
+
+async def main(batch_size: int) -> None:
+    database = get_database(create_motor_client())
+    updated = await backfill_task_owner_ids(database, batch_size=batch_size)
+    print(f"Backfilled owner ids on {updated} tasks")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill task creator and assignee user ids")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
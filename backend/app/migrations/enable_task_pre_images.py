@@ -0,0 +1,43 @@
+"""
+Turn on change stream pre-images for the tasks collection, so the task feed can send deletes and reassignments to
+the users who could see the task before the change.
+
+Needs MongoDB 6.0+ and a user allowed to run create and collMod (dbAdmin), which the application itself does not
+need. Set TASK_FEED_PRE_IMAGES=True once it has run. The script is idempotent.
+
+Run from the backend directory::
+
+    python -m app.migrations.enable_task_pre_images
+"""
+import asyncio
+
+from pymongo.errors import OperationFailure
+
+from app.core.database import create_motor_client, get_database
+
+# server error code of create on a collection that already exists
+NAMESPACE_EXISTS = 48
+
+
+async def enable_task_pre_images(database) -> None:
+    """
+    Create the tasks collection if it does not exist yet and enable its change stream pre- and post-images.
+
+    :param database: The application database.
+    """
+    try:
+        await database.command("create", "tasks")
+    except OperationFailure as e:
+        if e.code != NAMESPACE_EXISTS:
+            raise
+    await database.command("collMod", "tasks", changeStreamPreAndPostImages={"enabled": True})
+
+
+async def main() -> None:
+    database = get_database(create_motor_client())
+    await enable_task_pre_images(database)
+    print("Enabled change stream pre-images on tasks")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
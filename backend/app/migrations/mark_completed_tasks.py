@@ -0,0 +1,37 @@
+"""
+Set complete on tasks whose status is Completed but that were never marked complete.
+
+The open_* partial task indexes only cover tasks with complete == False, so such tasks would otherwise keep
+occupying them. The script is a single update_many and is idempotent.
+
+Run from the backend directory::
+
+    python -m app.migrations.mark_completed_tasks
+"""
+import asyncio
+
+from app.core.database import create_motor_client, get_database
+
+
+async def mark_completed_tasks(database) -> int:
+    """
+    Mark every task with status Completed as complete.
+
+    :param database: The application database.
+    :return: The number of tasks updated.
+    """
+    result = await database["tasks"].update_many(
+        {"status": "Completed", "complete": {"$ne": True}},
+        {"$set": {"complete": True}}
+    )
+    return result.modified_count
+
+
+async def main() -> None:
+    database = get_database(create_motor_client())
+    updated = await mark_completed_tasks(database)
+    print(f"Marked {updated} completed tasks as complete")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+"""
+Move project task lists from the embedded Project.tasks link arrays onto Task.project_id.
+
+For every project that still has a ``tasks`` array, the referenced tasks get the project's project_id and the array
+is removed from the project. Each project costs one updateMany on tasks and one update on the project, and the script
+is idempotent and can be re-run or interrupted at any point.
+
+Run from the backend directory::
+
+    python -m app.migrations.move_project_tasks
+"""
+import asyncio
+
+from app.core.database import create_motor_client, get_database
+
+
+async def move_project_tasks(database) -> int:
+    """
+    Copy each project's embedded task links onto the tasks and drop the embedded array.
+
+    :param database: The application database.
+    :return: The number of tasks moved.
+    """
+    projects = database["Project"]
+    tasks = database["tasks"]
+
+    moved = 0
+    async for project in projects.find({"tasks": {"$exists": True}}, {"project_id": 1, "tasks": 1}):
+        task_ids = [link.id for link in project.get("tasks") or []]
+        if task_ids:
+            result = await tasks.update_many({"_id": {"$in": task_ids}},
+                                             {"$set": {"project_id": project["project_id"]}})
+            moved += result.modified_count
+        await projects.update_one({"_id": project["_id"]}, {"$unset": {"tasks": ""}})
+    return moved
+
+
+async def main() -> None:
+    database = get_database(create_motor_client())
+    moved = await move_project_tasks(database)
+    print(f"Moved {moved} tasks onto Task.project_id")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
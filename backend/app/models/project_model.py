@@ -1,17 +1,23 @@
 from typing import List
 from uuid import UUID, uuid4
 
+import pymongo
 from beanie import Document, Indexed, Link
 from pydantic import Field
+from pymongo import IndexModel
 
-from app.models.task_model import Task
 from app.models.user_model import User
 
 
 class Project(Document):
-    project_id: UUID = Field(default_factory=uuid4, unique=True)
+    project_id: UUID = Field(default_factory=uuid4)
     project_name: Indexed(str)
     description: str = None
     project_owner: Link[User]
     project_members: List[Link[User]]
-    tasks: List[Link[Task]]
+    version: int = 0
+
+    class Settings:
+        indexes = [
+            IndexModel([("project_id", pymongo.ASCENDING)], name="project_id_unique", unique=True),
+        ]
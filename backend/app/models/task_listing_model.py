@@ -0,0 +1,22 @@
+from uuid import UUID
+
+import pymongo
+from beanie import Document
+from pymongo import IndexModel
+
+
+class AssigneeListingVersion(Document):
+    """
+    Counts the tasks that left a user's assigned-task listing, by deletion or reassignment.
+
+    Every other change to the listing moves the latest updated_at of its tasks, so the two together are what the
+    listing's ETag is derived from.
+    """
+    assignee_id: UUID
+    removals: int = 0
+
+    class Settings:
+        name = "assignee_listing_versions"
+        indexes = [
+            IndexModel([("assignee_id", pymongo.ASCENDING)], name="assignee_id_unique", unique=True),
+        ]
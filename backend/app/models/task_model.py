@@ -1,10 +1,12 @@
 from datetime import datetime
 from enum import Enum
-from typing import Any, List
+from typing import Any, List, Optional
 from uuid import UUID, uuid4
 
+import pymongo
 from beanie import Document, Indexed, Link, Replace, before_event, Insert
 from pydantic import Field
+from pymongo import IndexModel
 
 from app.models.task_comment_model import TaskComment
 from app.models.user_model import User
@@ -17,7 +19,7 @@ class StatusEnum(str, Enum):
 
 
 class Task(Document):
-    task_id: UUID = Field(default_factory=uuid4, unique=True)
+    task_id: UUID = Field(default_factory=uuid4)
     complete: bool = False
     status: StatusEnum = StatusEnum.NOT_STARTED
     title: Indexed(str)
@@ -27,7 +29,13 @@ class Task(Document):
     due_date: datetime = Field(default_factory=datetime.utcnow)
     task_creator: Link[User]
     task_assignee: Link[User] = None
+    # public user_id of the creator and assignee, kept next to the links so listings need no user lookup
+    task_creator_id: Optional[UUID] = None
+    task_assignee_id: Optional[UUID] = None
+    project_id: Optional[UUID] = None
     comments: List[Link[TaskComment]] = []
+    # incremented by every update, for optimistic concurrency
+    version: int = 0
 
     def __eq__(self, other: Any) -> bool:
         if isinstance(other, Task):
@@ -53,3 +61,27 @@ class Task(Document):
 
     class Settings:
         name = "tasks"
+        indexes = [
+            IndexModel([("task_id", pymongo.ASCENDING)], name="task_id_unique", unique=True),
+            # listings are paged on (due_date, _id), so the equality field is followed by the full sort key
+            IndexModel([("task_assignee_id", pymongo.ASCENDING), ("due_date", pymongo.ASCENDING),
+                        ("_id", pymongo.ASCENDING)], name="assignee_id_due_date"),
+            # backs /task/search; a collection holds at most one text index
+            IndexModel([("title", pymongo.TEXT), ("description", pymongo.TEXT)], name="title_description_text",
+                       weights={"title": 10, "description": 1}, default_language="english"),
+            IndexModel([("task_creator_id", pymongo.ASCENDING), ("due_date", pymongo.ASCENDING),
+                        ("_id", pymongo.ASCENDING)], name="creator_id_due_date"),
+            IndexModel([("project_id", pymongo.ASCENDING), ("due_date", pymongo.ASCENDING),
+                        ("_id", pymongo.ASCENDING)], name="project_id_due_date"),
+            IndexModel([("due_date", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)], name="due_date"),
+            # the latest updated_at of an assignee's tasks, half of their listing's ETag, is read from this index alone
+            IndexModel([("task_assignee_id", pymongo.ASCENDING), ("updated_at", pymongo.ASCENDING)],
+                       name="assignee_id_updated_at"),
+            # overdue queries only look at open tasks, so these stay as small as the open working set; a query must
+            # include complete == False for the planner to consider them
+            IndexModel([("due_date", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)], name="open_due_date",
+                       partialFilterExpression={"complete": False}),
+            IndexModel([("task_assignee_id", pymongo.ASCENDING), ("due_date", pymongo.ASCENDING),
+                        ("_id", pymongo.ASCENDING)], name="open_assignee_id_due_date",
+                       partialFilterExpression={"complete": False}),
+        ]
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+from enum import Enum
+from uuid import UUID
+
+import pymongo
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel
+
+
+# reminder records expire after this long; it must exceed both reminder windows, or a task still inside one is
+# reminded about again
+RETENTION = timedelta(days=30)
+
+
+class ReminderKind(str, Enum):
+    DUE_SOON = "due_soon"
+    OVERDUE = "overdue"
+
+
+class TaskReminder(Document):
+    """
+    Records that a reminder of a given kind was sent for a task, so it is never sent twice.
+    """
+    task_id: UUID
+    kind: ReminderKind
+    sent_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "task_reminders"
+        indexes = [
+            IndexModel([("task_id", pymongo.ASCENDING), ("kind", pymongo.ASCENDING)], name="task_id_kind_unique",
+                       unique=True),
+            IndexModel([("sent_at", pymongo.ASCENDING)], name="sent_at_ttl",
+                       expireAfterSeconds=int(RETENTION.total_seconds())),
+        ]
@@ -1,6 +1,8 @@
 import datetime
+import pymongo
 from beanie import Document, Indexed
 from pydantic import Field, EmailStr
+from pymongo import IndexModel
 from uuid import UUID, uuid4
 from typing import Optional, List
 
@@ -13,6 +15,7 @@ class User(Document):
     disabled: Optional[bool] = None
     activated: Optional[bool] = None
     roles: List[str] = Field(default_factory=list)
+    version: int = 0
 
     def __repr__(self) -> str:
         return f"<User {self.email}>"
@@ -44,3 +47,6 @@ class User(Document):
 
     class Settings:
         name = "users"
+        indexes = [
+            IndexModel([("user_id", pymongo.ASCENDING)], name="user_id_unique", unique=True),
+        ]
@@ -0,0 +1,19 @@
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+
+class SlowQueryShapeOut(BaseModel):
+    collection: str
+    command: str
+    shape: Dict[str, Any]
+    count: int
+    total_ms: float
+    max_ms: float
+    mean_ms: float
+    last_seen: float
+    routes: Dict[str, int]
+    docs_examined: Optional[int] = None
+    keys_examined: Optional[int] = None
+    docs_returned: Optional[int] = None
+    plan: Optional[str] = None
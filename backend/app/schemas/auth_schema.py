@@ -1,3 +1,4 @@
+from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -11,3 +12,5 @@ class TokenSchema(BaseModel):
 class TokenPayload(BaseModel):
     sub: UUID = None
     exp: int = None
+    # set on tokens good for a single purpose only, e.g. opening the task feed
+    scope: Optional[str] = None
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Literal, Optional
 from uuid import UUID
 
 from beanie import Link
@@ -15,6 +15,7 @@ class TaskCreate(BaseModel):
     complete: Optional[bool] = False
     due_date: Optional[datetime] = None
     task_assignee: Optional[Link[User]] = None
+    project_id: Optional[UUID] = None
 
 
 class TaskUpdate(BaseModel):
@@ -24,6 +25,18 @@ class TaskUpdate(BaseModel):
     status: Optional[StatusEnum] = None
     due_date: Optional[datetime] = None
     task_assignee: Optional[Link[User]] = None
+    project_id: Optional[UUID] = None
+
+
+class TaskBulkUpdate(TaskUpdate):
+    task_id: UUID
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    status_code: int
+    task_id: Optional[UUID] = None
+    detail: Optional[Any] = None
 
 
 class TaskOut(BaseModel):
@@ -34,3 +47,56 @@ class TaskOut(BaseModel):
     created_at: datetime
     updated_at: datetime
     task_assignee: Link[User]
+    version: int = 0
+
+
+class TaskSearchHit(BaseModel):
+    task_id: UUID
+    title: str
+    status: StatusEnum
+    complete: bool
+    due_date: datetime
+    project_id: Optional[UUID] = None
+    task_creator_id: Optional[UUID] = None
+    task_assignee_id: Optional[UUID] = None
+    # relevance from the text index, title matches weigh more than description matches
+    score: float
+
+
+class TaskSnapshot(BaseModel):
+    task_id: UUID
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[StatusEnum] = None
+    complete: Optional[bool] = None
+    due_date: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    project_id: Optional[UUID] = None
+    task_creator_id: Optional[UUID] = None
+    task_assignee_id: Optional[UUID] = None
+    version: int = 0
+
+
+class TaskChange(BaseModel):
+    operation: Literal["insert", "update", "replace", "delete"]
+    task_id: UUID
+    # the task as read when the change was, so possibly with later changes applied; None for deletes
+    task: Optional[TaskSnapshot] = None
+
+
+class TaskFeedToken(BaseModel):
+    token: str
+    # seconds the token may be used to open the feed for; an open feed outlives it
+    expires_in: int
+
+
+class TaskStats(BaseModel):
+    total: int = 0
+    by_status: Dict[StatusEnum, int] = Field(default_factory=lambda: {status: 0 for status in StatusEnum})
+    overdue: int = 0
+    not_overdue: int = 0
+
+
+class UserTaskStats(BaseModel):
+    assigned: TaskStats
+    created: TaskStats
@@ -18,6 +18,7 @@ class UserOut(BaseModel):
     disabled: Optional[bool] = False
     activated: Optional[bool] = False
     roles: List[str]
+    version: int = 0
 
 
 class UserUpdate(BaseModel):
@@ -1,16 +1,207 @@
+import asyncio
+import logging
 import smtplib
+import time
+from dataclasses import dataclass, field
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from typing import Dict, List, Optional, Set
+
+from fastapi import HTTPException, status
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingMail:
+    sender: str
+    recipient: str
+    text: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+class MailQueue:
+    """
+    Delivers outgoing mail in the background over persistent SMTP connections.
+
+    Messages are queued by enqueue() and picked up by ``workers`` worker tasks. Each worker owns one SMTP connection,
+    which stays open between batches and is re-opened when the server drops it. A worker takes up to ``batch_size``
+    queued messages at a time and sends them over its connection. Failed messages are retried with exponential
+    backoff up to ``max_retries`` times. The blocking smtplib calls run in the default executor, so the event loop
+    is never blocked.
+    """
+
+    def __init__(self, host: str, port: int, username: Optional[str], password: Optional[str], use_tls: bool,
+                 workers: int, batch_size: int, max_size: int, max_retries: int, backoff_seconds: float):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_size = max_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.latency_seconds_total = 0.0
+        self.latency_seconds_max = 0.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retries: Set[asyncio.Task] = set()
+
+    def enqueue(self, mail: OutgoingMail) -> None:
+        """
+        Queue a message for delivery and return immediately.
+
+        :param mail: The message to send.
+        :raises HTTPException: 503 if the queue is full or the queue is not running.
+        """
+        if self._queue is None:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Mail delivery is not running")
+        try:
+            self._queue.put_nowait(mail)
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many outgoing emails, please retry shortly.",
+                headers={"Retry-After": "5"}
+            )
+
+    async def start(self) -> None:
+        """
+        Start the delivery workers.
+        """
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._worker(), name=f"mail-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self, timeout: float) -> None:
+        """
+        Give queued messages up to ``timeout`` seconds to be delivered, then stop the workers.
+
+        :param timeout: The number of seconds to wait for the queue to drain.
+        """
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Stopping mail delivery with %d messages still queued", self._queue.qsize())
+        for task in self._tasks + list(self._retries):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retries, return_exceptions=True)
+        self._tasks = []
+        self._retries = set()
+        self._queue = None
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return the queue depth and the delivery counters and latencies (from enqueue to accepted by the server).
+        """
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "latency_seconds_total": self.latency_seconds_total,
+            "latency_seconds_max": self.latency_seconds_max,
+        }
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    @staticmethod
+    def _close(server: Optional[smtplib.SMTP]) -> None:
+        if server is None:
+            return
+        try:
+            server.quit()
+        except smtplib.SMTPException:
+            server.close()
+        except OSError:
+            pass
+
+    def _retry_later(self, mail: OutgoingMail) -> None:
+        async def requeue():
+            await asyncio.sleep(self.backoff_seconds * 2 ** (mail.attempts - 1))
+            try:
+                self._queue.put_nowait(mail)
+            except asyncio.QueueFull:
+                self.failed += 1
+                logger.error("Dropping email to %s, the mail queue is full", mail.recipient)
+
+        self.retried += 1
+        task = asyncio.create_task(requeue())
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _worker(self) -> None:
+        server: Optional[smtplib.SMTP] = None
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+                for mail in batch:
+                    mail.attempts += 1
+                    try:
+                        if server is None:
+                            server = await asyncio.to_thread(self._connect)
+                        await asyncio.to_thread(server.sendmail, mail.sender, mail.recipient, mail.text)
+                    except (smtplib.SMTPException, OSError) as e:
+                        # the connection may be the problem, so the next attempt starts from a fresh one
+                        await asyncio.to_thread(self._close, server)
+                        server = None
+                        if mail.attempts <= self.max_retries:
+                            self._retry_later(mail)
+                        else:
+                            self.failed += 1
+                            logger.error("Giving up on email to %s after %d attempts: %s",
+                                         mail.recipient, mail.attempts, e)
+                    else:
+                        latency = time.monotonic() - mail.enqueued_at
+                        self.sent += 1
+                        self.latency_seconds_total += latency
+                        self.latency_seconds_max = max(self.latency_seconds_max, latency)
+                    finally:
+                        self._queue.task_done()
+        finally:
+            await asyncio.to_thread(self._close, server)
+
+
+mail_queue = MailQueue(
+    host=settings.MAIL_HOST,
+    port=settings.MAIL_PORT,
+    username=settings.MAILTRAP_USERNAME,
+    password=settings.MAILTRAP_PASSWORD,
+    use_tls=settings.MAIL_USE_TLS,
+    workers=settings.MAIL_WORKERS,
+    batch_size=settings.MAIL_BATCH_SIZE,
+    max_size=settings.MAIL_QUEUE_MAX_SIZE,
+    max_retries=settings.MAIL_MAX_RETRIES,
+    backoff_seconds=settings.MAIL_RETRY_BACKOFF_SECONDS,
+)
+
 
 class EmailService:
 
     @staticmethod
     async def send_email(to, subject, body):
         """
-        Sends an email using the provided parameters.
+        Queues an email using the provided parameters.
 
         Parameters:
         - to (str): The recipient's email address.
@@ -21,16 +212,16 @@ class EmailService:
         - None
 
         Note:
-        - This method uses settings.MAILTRAP_USERNAME and settings.MAILTRAP_PASSWORD to authenticate with the email server.
-        - The email is sent from 'password-reset@{settings.BASE_URL}'.
-        - The email server used is 'smtp.mailtrap.io' on port 587.
-        - If an error occurs during the email sending process, an exception is raised and an error message is printed.
+        - The email is handed to the background mail_queue and this method returns without waiting for delivery.
+        - The email is sent from 'password-reset@{settings.BASE_URL}' through settings.MAIL_HOST and
+          settings.MAIL_PORT, authenticating with settings.MAILTRAP_USERNAME and settings.MAILTRAP_PASSWORD.
+        - Delivery failures are retried with backoff and logged once retries are exhausted.
+        - Raises HTTPException 503 if the mail queue is full.
 
         """
         mail_content = body
 
         sender_address = settings.MAILTRAP_USERNAME
-        sender_pass = settings.MAILTRAP_PASSWORD
         receiver_address = to
 
         message = MIMEMultipart()
@@ -41,11 +232,4 @@ class EmailService:
         message.attach(MIMEText(mail_content, 'plain'))
         text = message.as_string()
 
-        try:
-            with smtplib.SMTP('smtp.mailtrap.io', 587) as server:
-                server.starttls()
-                server.login(sender_address, sender_pass)
-                server.sendmail(sender_address, receiver_address, text)
-                print('Email sent successfully')
-        except Exception as e:
-            print('Error, email not sent: ', e)
+        mail_queue.enqueue(OutgoingMail(sender=sender_address, recipient=receiver_address, text=text))
@@ -1,25 +1,50 @@
-from typing import List
+from datetime import datetime
+from typing import AsyncIterator, Optional, Type, Union
 from uuid import UUID
 
+from beanie import UpdateResponse
 from fastapi import HTTPException
+from pydantic import BaseModel
 
+from app.core.config import settings
 from app.models.project_model import Project
+from app.models.task_model import Task
 from app.models.user_model import User
+from app.schemas.pagination_schema import Page
 from app.schemas.project_schema import ProjectCreate, ProjectUpdate
+from app.services.task_service import invalidate_task_stats
+from app.utils.pagination import paginate
+from app.utils.preconditions import precondition_failed, version_condition
+from app.utils.projection import projection_model
+from app.utils.streaming import iterate_documents
+
+# the project field its ETag is derived from
+ProjectVersion = projection_model(Project, ("version",))
 
 
 class ProjectService:
 
     @staticmethod
-    async def list_projects() -> List[Project]:
+    async def list_projects(cursor: Optional[str] = None, limit: int = settings.DEFAULT_PAGE_SIZE,
+                            stream: bool = False, projection: Optional[Type[BaseModel]] = None
+                            ) -> Union[Page[Project], AsyncIterator[Project]]:
         """
-        Retrieve a list of all projects.
+        Retrieve a page of projects, in insertion order.
+
+        Args:
+            cursor (Optional[str]): The next_cursor of the previous page, or None for the first page.
+            limit (int): The maximum number of projects to return.
+            stream (bool): If True, return an iterator over every project instead of a page.
+            projection (Optional[Type[BaseModel]]): Optional model to project the projects to.
 
         Returns:
-            List[Project]: A list of Project objects representing all projects stored in the database.
+            Page[Project]: A page of Project objects stored in the database.
 
         """
-        return await Project.find_all().to_list()
+        if stream:
+            return iterate_documents(Project.find_all(), ("_id",))
+        projects, next_cursor = await paginate(Project.find_all(), ("_id",), cursor, limit, projection)
+        return Page(items=projects, next_cursor=next_cursor)
 
     @staticmethod
     async def create_project(data: ProjectCreate, user: User) -> Project:
@@ -37,7 +62,7 @@ class ProjectService:
         return await project.insert()
 
     @staticmethod
-    async def get_project_by_id(project_id: UUID) -> Project:
+    async def get_project_by_id(project_id: UUID, projection: Optional[Type[BaseModel]] = None) -> Project:
         """
         Get project by ID.
 
@@ -45,44 +70,73 @@ class ProjectService:
 
         Parameters:
             project_id (UUID): The ID of the project.
+            projection (Optional[Type[BaseModel]]): Optional model to project the project to.
 
         Returns:
             Project: The project object matching the provided ID.
 
         """
-        return await Project.find_one(project_id=project_id)
+        query = Project.find_one(Project.project_id == project_id)
+        return await (query.project(projection) if projection is not None else query)
+
+    @staticmethod
+    async def get_project_version(project_id: UUID) -> Optional[int]:
+        """
+        Get the version of a project, what its ETag is derived from, without loading the rest of it.
+
+        Parameters:
+            project_id (UUID): The ID of the project.
+
+        Returns:
+            Optional[int]: The version, or None if there is no such project.
+        """
+        project = await Project.find_one(Project.project_id == project_id).project(ProjectVersion)
+        if project is None:
+            return None
+        return project.version or 0
 
     @classmethod
-    async def update_project(cls, project_id: UUID, data: ProjectUpdate, current_user: User) -> Project:
+    async def update_project(cls, project_id: UUID, data: ProjectUpdate, current_user: User,
+                             expected_version: Optional[int] = None) -> Project:
         """
-        Update a project with the given project ID and data.
+        Update a project with the given project ID and data, in a single find_one_and_update.
 
         Parameters:
             project_id (UUID): The ID of the project to be updated.
             data (ProjectUpdate): The updated data for the project.
             current_user (User): The user making the request.
+            expected_version (Optional[int]): If given, the update only applies if the project is at this version.
 
         Returns:
             Project: The updated project.
 
         Raises:
-            HTTPException: If the project is not found or if the current user is not the owner of the project or doesn't
-            have the "admin" role.
+            HTTPException: If the project is not found, if the current user is neither the owner of the project nor has
+            the "admin" role, or (412) if the project is not at expected_version.
         """
+        conditions = [Project.project_id == project_id]
+        if "admin" not in current_user.roles:
+            conditions.append({"project_owner.$id": current_user.id})
+        if expected_version is not None:
+            conditions.append(version_condition(Project, expected_version))
+
+        project = await Project.find_one(*conditions).update(
+            {"$set": data.dict(exclude_unset=True), "$inc": {"version": 1}},
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        if project is not None:
+            return project
+
+        # only failed updates pay for finding out why
         project = await cls.get_project_by_id(project_id)
-
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
-
-        if project.project_owner != current_user or "admin" not in current_user.roles:
+        if "admin" not in current_user.roles and project.project_owner.ref.id != current_user.id:
             raise HTTPException(
                 status_code=403,
                 detail="You are not the owner of this project.",
             )
-
-        await project.update({"$set": data.dict(exclude_unset=True)})
-        await project.save()
-        return project
+        raise precondition_failed()
 
     @classmethod
     async def delete_project(cls, project_id: UUID, current_user: User) -> None:
@@ -96,6 +150,8 @@ class ProjectService:
         Raises:
         - HTTPException: If the project is not found or if the current user is not the owner of the project or an admin.
 
+        Tasks of the deleted project are kept and detached from it.
+
         Returns:
         - None
         """
@@ -104,10 +160,13 @@ class ProjectService:
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        if project.project_owner != current_user or "admin" not in current_user.roles:
+        if "admin" not in current_user.roles and project.project_owner.ref.id != current_user.id:
             raise HTTPException(
                 status_code=403,
                 detail="You are not the owner of this project.",
             )
 
+        await Task.find(Task.project_id == project.project_id).update(
+            {"$set": {"project_id": None, "updated_at": datetime.utcnow()}, "$inc": {"version": 1}})
         await project.delete()
+        invalidate_task_stats({("project", project.project_id)})
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from beanie.operators import In
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.core.indexes import index_reconciler
+from app.models.task_model import Task
+from app.models.task_reminder_model import RETENTION, ReminderKind, TaskReminder
+from app.models.user_model import User
+from .email_service import EmailService
+from .task_service import OPEN_TASK, TASK_SORT
+from ..utils.pagination import paginate
+from ..utils.projection import projection_model
+
+logger = logging.getLogger(__name__)
+
+# the task fields a reminder digest needs; due_date and id are the keyset the scan pages on
+ReminderTask = projection_model(Task, ("id", "task_id", "title", "due_date", "task_assignee_id"))
+
+SUBJECTS = {
+    ReminderKind.DUE_SOON: "Tasks due soon",
+    ReminderKind.OVERDUE: "Overdue tasks",
+}
+
+
+class ReminderService:
+    """
+    Sends "due soon" and "overdue" reminder digests to task assignees.
+
+    Each run walks the open, assigned tasks whose due_date falls in a reminder window with range scans over the
+    open_due_date partial index, ``batch_size`` tasks at a time, so its cost follows the number of due tasks rather
+    than the size of the collection. Claimed tasks are gathered over the whole scan, so each assignee gets one digest
+    per kind and run. Every reminder is recorded in TaskReminder before its digest is queued, which
+    makes delivery at most once per task and kind, across restarts and across processes; records of a digest that
+    could not be queued are deleted again, so a later run retries it. Records expire after task_reminder_model's
+    RETENTION, which must exceed both windows.
+    """
+
+    def __init__(self, interval_seconds: float, due_soon: timedelta, overdue_lookback: timedelta, batch_size: int):
+        if max(due_soon, overdue_lookback) >= RETENTION:
+            logger.warning("Reminder windows reach past the %s retention of reminder records, reminders for tasks "
+                           "still due by then are sent again", RETENTION)
+        self.interval_seconds = interval_seconds
+        self.due_soon = due_soon
+        self.overdue_lookback = overdue_lookback
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """
+        Start running reminders every ``interval_seconds``.
+        """
+        self._task = asyncio.create_task(self._run_forever(), name="task-reminders")
+
+    async def stop(self) -> None:
+        """
+        Stop the scheduler, abandoning a run in progress. Reminders recorded but not yet queued are not resent.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Send the reminders that are due at ``now``.
+
+        :param now: The reference time, defaults to the current UTC time.
+        :return: The number of tasks reminded about, per reminder kind.
+        """
+        now = now or datetime.utcnow()
+        windows = {
+            ReminderKind.DUE_SOON: (now, now + self.due_soon),
+            ReminderKind.OVERDUE: (now - self.overdue_lookback, now),
+        }
+        sent = {}
+        for kind, (start, end) in windows.items():
+            sent[kind.value] = await self._remind(kind, start, end)
+        return sent
+
+    async def _run_forever(self) -> None:
+        await index_reconciler.wait_initialized()
+        while True:
+            try:
+                sent = await self.run_once()
+                logger.info("Task reminders sent: %s", sent)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Task reminder run failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def _remind(self, kind: ReminderKind, start: datetime, end: datetime) -> int:
+        query = Task.find(
+            Task.due_date >= start,
+            Task.due_date < end,
+            *OPEN_TASK,
+            Task.task_assignee_id != None,  # noqa: E711
+        )
+        # claimed across the whole scan, so an assignee gets one digest per run however many batches their tasks span
+        by_assignee: Dict[UUID, List] = defaultdict(list)
+        users: Dict[UUID, Optional[User]] = {}
+        cursor = None
+        while True:
+            tasks, cursor = await paginate(query, TASK_SORT, cursor, self.batch_size, ReminderTask)
+            if tasks:
+                await self._claim_batch(kind, tasks, by_assignee, users)
+            if cursor is None:
+                break
+        return await self._send_digests(kind, by_assignee, users)
+
+    async def _claim_batch(self, kind: ReminderKind, tasks: list, by_assignee: Dict[UUID, List],
+                           users: Dict[UUID, Optional[User]]) -> None:
+        already_sent = {
+            reminder.task_id
+            for reminder in await TaskReminder.find(
+                TaskReminder.kind == kind, In(TaskReminder.task_id, [task.task_id for task in tasks])
+            ).to_list()
+        }
+        tasks = [task for task in tasks if task.task_id not in already_sent]
+        unknown = list({task.task_assignee_id for task in tasks} - set(users))
+        if unknown:
+            # tasks of disabled or unknown assignees are not claimed, so they are reminded about if that changes;
+            # they are kept as None so later batches do not look them up again
+            users.update(dict.fromkeys(unknown))
+            users.update((user.user_id, user) for user in await User.find(In(User.user_id, unknown)).to_list()
+                         if not user.disabled)
+        tasks = [task for task in tasks if users[task.task_assignee_id] is not None]
+        if not tasks:
+            return
+
+        claimed = await self._claim(kind, tasks)
+        for task in tasks:
+            if task.task_id in claimed:
+                by_assignee[task.task_assignee_id].append(task)
+
+    async def _send_digests(self, kind: ReminderKind, by_assignee: Dict[UUID, List],
+                            users: Dict[UUID, Optional[User]]) -> int:
+        sent = 0
+        for user_id, user_tasks in by_assignee.items():
+            user = users[user_id]
+            try:
+                await EmailService.send_email(user.email, SUBJECTS[kind], self._digest(kind, user_tasks))
+                sent += len(user_tasks)
+            except HTTPException as e:
+                logger.error("Could not queue %s reminder for %s: %s", kind.value, user.email, e.detail)
+                await self._release(kind, [task.task_id for task in user_tasks])
+        return sent
+
+    @staticmethod
+    async def _claim(kind: ReminderKind, tasks: list) -> Set[UUID]:
+        # records the reminders first; a task another run recorded in the meantime fails on the unique index
+        records = [TaskReminder(task_id=task.task_id, kind=kind) for task in tasks]
+        claimed = {task.task_id for task in tasks}
+        try:
+            await TaskReminder.insert_many(records, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                claimed.discard(records[error["index"]].task_id)
+        return claimed
+
+    @staticmethod
+    async def _release(kind: ReminderKind, task_ids: List[UUID]) -> None:
+        # the digest was never queued, so the next run claims and sends these reminders again
+        await TaskReminder.find(TaskReminder.kind == kind, In(TaskReminder.task_id, task_ids)).delete()
+
+    @staticmethod
+    def _digest(kind: ReminderKind, tasks: list) -> str:
+        lines: List[Tuple[datetime, str]] = sorted((task.due_date, task.title) for task in tasks)
+        intro = "These tasks are due soon:" if kind == ReminderKind.DUE_SOON else "These tasks are overdue:"
+        return "\n".join([intro, ""] + [f"- {title} (due {due_date:%Y-%m-%d %H:%M} UTC)" for due_date, title in lines])
+
+
+reminder_service = ReminderService(
+    interval_seconds=settings.REMINDER_INTERVAL_SECONDS,
+    due_soon=timedelta(hours=settings.REMINDER_DUE_SOON_HOURS),
+    overdue_lookback=timedelta(hours=settings.REMINDER_OVERDUE_LOOKBACK_HOURS),
+    batch_size=settings.REMINDER_BATCH_SIZE,
+)
@@ -0,0 +1,353 @@
+import asyncio
+import logging
+import re
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from bson import Binary
+from fastapi import HTTPException, status
+from pymongo.errors import OperationFailure
+
+from app.core.config import settings
+from app.core.indexes import index_reconciler
+from app.models.project_model import Project
+from app.models.task_model import Task
+from app.models.user_model import User
+from app.schemas.task_schema import TaskChange, TaskSnapshot
+from ..utils.projection import projection_model
+from ..utils.streaming import SSE_HEARTBEAT, sse_event
+
+logger = logging.getLogger(__name__)
+
+ProjectKey = projection_model(Project, ("project_id",))
+
+OPERATIONS = ["insert", "update", "replace", "delete"]
+# the task fields a change is routed on; users and projects both have uuid4 ids, so they share one key space
+ROUTING_FIELDS = ("task_creator_id", "task_assignee_id", "project_id")
+# every change stream opened by the feed returns the same trimmed events
+PROJECT_STAGE = {"$project": {
+    "operationType": 1,
+    "documentKey": 1,
+    **{f"fullDocument.{name}": 1 for name in TaskSnapshot.model_fields},
+    **{f"fullDocumentBeforeChange.{name}": 1 for name in ("task_id",) + ROUTING_FIELDS},
+}}
+# the server cannot resume from the token: history lost, invalid token or a fatal error such as a dropped collection
+UNRESUMABLE = {260, 280, 286}
+RESUME_TOKEN = re.compile(r"[0-9A-Fa-f]{1,1024}")
+RESET = b"{}"
+
+
+def resume_token(last_event_id: Optional[str]) -> Optional[dict]:
+    """
+    Return the change stream resume token a client sent back as its Last-Event-ID, or None if it sent none.
+
+    :raises HTTPException: 400 if the value is not a resume token.
+    """
+    if not last_event_id:
+        return None
+    if not RESUME_TOKEN.fullmatch(last_event_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Last-Event-ID")
+    return {"_data": last_event_id}
+
+
+def change_event(change: dict) -> Optional[Tuple[str, Set[UUID], bytes]]:
+    """
+    Return the event id, routing keys and encoded TaskChange of a change stream event, or None if it cannot be routed.
+
+    A change is routed on the creator, assignee and project of the task both after and, where the pre-image is
+    available, before the change, so a task reassigned or moved to another project reaches its old audience too.
+    Deletes only carry the task's fields with a pre-image; without one they cannot be routed.
+    """
+    after = change.get("fullDocument")
+    before = change.get("fullDocumentBeforeChange")
+    snapshot = TaskSnapshot.model_validate(after) if after else None
+    previous = TaskSnapshot.model_validate(before) if before else None
+    source = snapshot or previous
+    if source is None:
+        return None
+    keys = {getattr(task, name) for task in (snapshot, previous) if task is not None for name in ROUTING_FIELDS}
+    keys.discard(None)
+    event = TaskChange(operation=change["operationType"], task_id=source.task_id, task=snapshot)
+    return change["_id"]["_data"], keys, event.model_dump_json().encode()
+
+
+def key_filter(keys: Iterable[UUID]) -> dict:
+    """
+    Return the change stream $match on the changes routed to ``keys``.
+    """
+    values = [Binary.from_uuid(key) for key in keys]
+    return {"$or": [{f"{document}.{name}": {"$in": values}}
+                    for document in ("fullDocument", "fullDocumentBeforeChange") for name in ROUTING_FIELDS]}
+
+
+class Subscription:
+    """
+    The queue of changes waiting to be sent to one client, with the user and project ids it receives changes for.
+    """
+
+    def __init__(self, keys: Set[UUID], queue_size: int):
+        self.keys = keys
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def send(self, event_id: Optional[str], payload: bytes) -> bool:
+        try:
+            self.queue.put_nowait((event_id, payload))
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self) -> None:
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            # the client sees the flag on its next event
+            pass
+
+
+class TaskFeed:
+    """
+    Fans changes to tasks out to the clients streaming them, over one change stream per process.
+
+    A background task watches the tasks collection and routes each change to the subscriptions of the task's
+    creator, assignee and project members, through an index from user and project id to subscriptions, so a change
+    costs one encode and a dictionary lookup per routing key however many clients are connected. The watcher keeps
+    its resume token and reopens the stream from it after an error or a failover.
+
+    Every event carries its change stream resume token as its id. A client reconnecting with the last id it received
+    first catches up on its own change stream, resumed from that token and filtered by the server to its tasks, until
+    it reaches the end of the oplog, then continues on the shared stream; events seen on both are sent once. A client
+    falling ``queue_size`` events behind is disconnected and catches up the same way when it reconnects. When the
+    history is gone, or a catch-up would exceed ``max_catch_up`` events, the client is sent a ``reset`` event and has
+    to reload its tasks.
+
+    Change streams need a replica set; a single-node one is enough.
+    """
+
+    def __init__(self, queue_size: int, heartbeat_seconds: float, retry_seconds: float, max_catch_up: int,
+                 pre_images: bool):
+        self.queue_size = queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.retry_seconds = retry_seconds
+        self.max_catch_up = max_catch_up
+        self.pre_images = pre_images
+        self.running = False
+        self.published = 0
+        self.delivered = 0
+        self.disconnected = 0
+        self._subscriptions: Dict[UUID, Set[Subscription]] = defaultdict(set)
+        self._subscribers = 0
+        self._resume_token: Optional[dict] = None
+        # pre-images need MongoDB 6.0+ and app.migrations.enable_task_pre_images; changes recorded before that ran
+        # simply have none
+        self._full_document_before_change = "whenAvailable" if pre_images else None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """
+        Start watching the tasks collection in the background.
+        """
+        self._task = asyncio.create_task(self._watch_forever(), name="task-feed")
+
+    async def stop(self) -> None:
+        """
+        Stop watching and end every client's stream; clients resume from their last event on another process.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in subscriptions:
+                subscription.close()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return the number of connected clients and the event counters.
+        """
+        return {
+            "running": int(self.running),
+            "subscribers": self._subscribers,
+            "published": self.published,
+            "delivered": self.delivered,
+            "disconnected": self.disconnected,
+        }
+
+    async def stream(self, user: User, resume_after: Optional[dict] = None) -> AsyncIterator[bytes]:
+        """
+        Stream the changes to the tasks ``user`` created, is assigned or belongs to the project of, as server-sent
+        events, until the client disconnects or the feed stops.
+
+        Projects are looked up when the stream opens; a user added to a project receives its tasks from the next
+        reconnect.
+
+        :param user: The subscribing user.
+        :param resume_after: The resume token of the last event the client received, from resume_token.
+        :raises HTTPException: 503 if the feed is not running.
+        """
+        if not self.running:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Task feed unavailable")
+        return self._events(await self.subscription_keys(user), resume_after)
+
+    @staticmethod
+    async def subscription_keys(user: User) -> Set[UUID]:
+        """
+        Return the ids the changes ``user`` receives are routed on: their own and those of their projects.
+        """
+        projects = await Project.find(
+            {"$or": [{"project_owner.$id": user.id}, {"project_members.$id": user.id}]}
+        ).project(ProjectKey).to_list()
+        return {user.user_id, *(project.project_id for project in projects)}
+
+    async def _events(self, keys: Set[UUID], resume_after: Optional[dict]) -> AsyncIterator[bytes]:
+        subscription = self._subscribe(keys)
+        try:
+            # sends the headers straight away
+            yield SSE_HEARTBEAT
+            caught_up: Set[str] = set()
+            if resume_after is not None:
+                async for event_id, payload in self._catch_up(subscription.keys, resume_after):
+                    caught_up.add(event_id)
+                    yield self._encode(event_id, payload)
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield SSE_HEARTBEAT
+                    continue
+                if subscription.closed:
+                    return
+                event_id, payload = item
+                if event_id in caught_up:
+                    continue
+                self.delivered += 1
+                yield self._encode(event_id, payload)
+        finally:
+            self._unsubscribe(subscription)
+
+    async def _catch_up(self, keys: Set[UUID], resume_after: dict) -> AsyncIterator[Tuple[str, bytes]]:
+        pipeline = self._pipeline(key_filter(keys))
+        sent = 0
+        try:
+            async with self._watch(pipeline, resume_after) as stream:
+                while True:
+                    change = await stream.try_next()
+                    if change is None:
+                        # at the end of the oplog, the shared stream has everything from here on
+                        return
+                    event = change_event(change)
+                    if event is None:
+                        continue
+                    sent += 1
+                    if sent > self.max_catch_up:
+                        logger.info("Task feed catch-up passed %s events, resetting the client", self.max_catch_up)
+                        yield self._reset_event()
+                        return
+                    event_id, _, payload = event
+                    yield event_id, payload
+        except OperationFailure as e:
+            if e.code not in UNRESUMABLE:
+                raise
+            logger.info("Task feed client cannot resume from its last event: %s", e)
+            yield self._reset_event()
+
+    def _subscribe(self, keys: Set[UUID]) -> Subscription:
+        subscription = Subscription(keys, self.queue_size)
+        for key in keys:
+            self._subscriptions[key].add(subscription)
+        self._subscribers += 1
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        for key in subscription.keys:
+            subscriptions = self._subscriptions.get(key)
+            if subscriptions is None:
+                continue
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[key]
+        self._subscribers -= 1
+
+    def _publish(self, change: dict) -> None:
+        event = change_event(change)
+        if event is None:
+            return
+        event_id, keys, payload = event
+        self.published += 1
+        subscriptions = set()
+        for key in keys:
+            subscriptions.update(self._subscriptions.get(key, ()))
+        for subscription in subscriptions:
+            if not subscription.closed and not subscription.send(event_id, payload):
+                # too far behind, it catches up from its last event when it reconnects
+                self.disconnected += 1
+                subscription.close()
+
+    def _reset_all(self) -> None:
+        event_id, payload = self._reset_event()
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in subscriptions:
+                if not subscription.closed and not subscription.send(event_id, payload):
+                    subscription.close()
+
+    def _reset_event(self) -> Tuple[Optional[str], bytes]:
+        # points the client at the shared stream's position, so its next reconnect resumes from there
+        return (self._resume_token or {}).get("_data"), RESET
+
+    @staticmethod
+    def _encode(event_id: Optional[str], payload: bytes) -> bytes:
+        if payload is RESET:
+            return sse_event(payload, event="reset", event_id=event_id)
+        return sse_event(payload, event="task", event_id=event_id)
+
+    @staticmethod
+    def _pipeline(*stages: dict) -> List[dict]:
+        return [{"$match": {"operationType": {"$in": OPERATIONS}}}, *({"$match": stage} for stage in stages),
+                PROJECT_STAGE]
+
+    def _watch(self, pipeline: List[dict], resume_after: Optional[dict]):
+        return Task.get_motor_collection().watch(
+            pipeline, full_document="updateLookup", resume_after=resume_after,
+            full_document_before_change=self._full_document_before_change)
+
+    async def _watch_forever(self) -> None:
+        await index_reconciler.wait_initialized()
+        pipeline = self._pipeline()
+        while True:
+            try:
+                async with self._watch(pipeline, self._resume_token) as stream:
+                    self.running = True
+                    logger.info("Task feed watching the tasks collection")
+                    try:
+                        async for change in stream:
+                            self._resume_token = stream.resume_token
+                            self._publish(change)
+                    finally:
+                        # the token also moves on while no task changes, so an idle feed stays within the oplog
+                        self._resume_token = stream.resume_token or self._resume_token
+            except asyncio.CancelledError:
+                self.running = False
+                raise
+            except OperationFailure as e:
+                if e.code in UNRESUMABLE and self._resume_token is not None:
+                    logger.error("Task feed cannot resume its change stream, clients reload their tasks: %s", e)
+                    self._resume_token = None
+                    self._reset_all()
+                else:
+                    logger.warning("Task feed change stream failed: %s", e)
+            except Exception:
+                logger.exception("Task feed change stream failed")
+            self.running = False
+            await asyncio.sleep(self.retry_seconds)
+
+
+task_feed = TaskFeed(
+    queue_size=settings.TASK_FEED_QUEUE_SIZE,
+    heartbeat_seconds=settings.TASK_FEED_HEARTBEAT_SECONDS,
+    retry_seconds=settings.TASK_FEED_RETRY_SECONDS,
+    max_catch_up=settings.TASK_FEED_MAX_CATCH_UP,
+    pre_images=settings.TASK_FEED_PRE_IMAGES,
+)
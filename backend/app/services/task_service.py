@@ -1,15 +1,123 @@
+import asyncio
 from datetime import datetime, time
-from typing import List, Union
+from typing import Any, AsyncIterator, Dict, Hashable, Iterable, List, Optional, Set, Tuple, Type, Union
 from uuid import UUID
 
+import pymongo
+from beanie import UpdateResponse
+from beanie.odm.utils.encoder import Encoder
+from beanie.operators import In, Or, Text
 from fastapi import HTTPException
-
-from app.models.task_model import Task
+from pydantic import BaseModel, ValidationError
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import list_collection
+from app.models.task_listing_model import AssigneeListingVersion
+from app.models.task_model import StatusEnum, Task
 from app.models.user_model import User
-from app.schemas.task_schema import TaskCreate, TaskUpdate
+from app.schemas.pagination_schema import Page
+from app.schemas.task_schema import (BulkItemResult, TaskBulkUpdate, TaskCreate, TaskSearchHit, TaskStats, TaskUpdate,
+                                     UserTaskStats)
 from .user_service import UserService
+from ..utils.pagination import decode_cursor, encode_cursor, paginate
+from ..utils.preconditions import precondition_failed, version_condition
+from ..utils.projection import projection_model
+from ..utils.streaming import iterate_documents
 from ..utils.utils import validate_uuid, validate_date
 
+# keyset order for every task listing; _id makes it unique, and therefore stable across pages
+TASK_SORT = ("due_date", "_id")
+# conditions selecting tasks that are still open; complete == False is the partial filter of the open_* task indexes.
+# Plain filters rather than Task field expressions, which only exist once Beanie is initialised.
+OPEN_TASK = ({"complete": False}, {"status": {"$ne": StatusEnum.COMPLETED.value}})
+
+# keyset order of search results: most relevant first, _id breaks ties
+SEARCH_SORT = ("score", "_id")
+SEARCH_PROJECTION = {name: 1 for name in TaskSearchHit.model_fields}
+# server error code of a $text query without a text index, e.g. while it is still being built
+INDEX_NOT_FOUND = 27
+
+# a page of tasks, or with stream=True an iterator over every matching task
+TaskListing = Union[Page[Task], AsyncIterator[Task]]
+
+# task count rollups keyed by ("user", user_id) or ("project", project_id)
+task_stats_cache = TTLCache(maxsize=settings.TASK_STATS_CACHE_MAX_SIZE, ttl=settings.TASK_STATS_CACHE_TTL_SECONDS)
+
+
+def task_stats_keys(task: Task) -> Set[Hashable]:
+    """
+    Return the task_stats_cache keys whose rollups count ``task``.
+    """
+    keys = {("user", task.task_creator_id), ("user", task.task_assignee_id), ("project", task.project_id)}
+    return {key for key in keys if key[1] is not None}
+
+
+def invalidate_task_stats(keys: Set[Hashable]) -> None:
+    for key in keys:
+        task_stats_cache.invalidate(key)
+
+
+async def record_listing_removals(assignee_ids: Iterable[Optional[UUID]]) -> None:
+    """
+    Count a task leaving the assigned-task listing of each of ``assignee_ids``, by deletion or reassignment, so the
+    listing's ETag changes even though the latest updated_at among its remaining tasks does not.
+    """
+    operations = [UpdateOne(AssigneeListingVersion.find(AssigneeListingVersion.assignee_id == assignee_id)
+                            .get_filter_query(), {"$inc": {"removals": 1}}, upsert=True)
+                  for assignee_id in set(assignee_ids) if assignee_id is not None]
+    if operations:
+        await AssigneeListingVersion.get_motor_collection().bulk_write(operations, ordered=False)
+
+
+def sync_complete(update: dict) -> dict:
+    """
+    Keep ``complete`` in step with the status an update writes, so completed tasks leave the open_* partial indexes
+    and reopened tasks return to them.
+    """
+    if "status" in update:
+        update["complete"] = update["status"] == StatusEnum.COMPLETED
+    return update
+
+
+# the task fields bulk writes need for authorization and stats invalidation
+TaskKeys = projection_model(Task, ("id", "task_id", "task_creator_id", "task_assignee_id", "project_id"))
+# the task fields its ETag and Last-Modified are derived from
+TaskValidator = projection_model(Task, ("version", "updated_at"))
+
+
+def _validation_errors(error: ValidationError) -> List[dict]:
+    return [{"loc": err["loc"], "msg": err["msg"], "type": err["type"]} for err in error.errors()]
+
+
+def _write_errors(error: BulkWriteError) -> Dict[int, dict]:
+    # keyed by the position of the failed operation in the batch
+    return {err["index"]: err for err in error.details.get("writeErrors", [])}
+
+
+def _stats_facets(name: str, match: dict, now: datetime) -> Dict[str, list]:
+    overdue = Task.find(*OPEN_TASK, Task.due_date < now).get_filter_query()
+    return {
+        f"{name}_by_status": [{"$match": match}, {"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+        f"{name}_overdue": [{"$match": {"$and": [match, overdue]}}, {"$count": "count"}],
+    }
+
+
+def _stats_from_facets(name: str, facets: dict) -> TaskStats:
+    stats = TaskStats()
+    for row in facets[f"{name}_by_status"]:
+        stats.total += row["count"]
+        try:
+            stats.by_status[StatusEnum(row["_id"])] = row["count"]
+        except ValueError:
+            # tasks without a known status still count towards the total
+            pass
+    stats.overdue = facets[f"{name}_overdue"][0]["count"] if facets[f"{name}_overdue"] else 0
+    stats.not_overdue = stats.total - stats.overdue
+    return stats
+
 
 class TaskService:
     """
@@ -23,39 +131,104 @@ class TaskService:
 
     """
     @staticmethod
-    async def list_tasks_by_creator(creator_id: UUID) -> List[Task]:
+    async def list_tasks_by_creator(creator_id: UUID, cursor: Optional[str] = None,
+                                    limit: int = settings.DEFAULT_PAGE_SIZE,
+                                    stream: bool = False,
+                                    projection: Optional[Type[BaseModel]] = None) -> TaskListing:
         """
-            Retrieves a list of tasks created by a specific user.
+            Retrieves a page of tasks created by a specific user, ordered by due date.
 
             Parameters:
                 - creator_id: The UUID of the user who created the tasks.
+                - cursor: The next_cursor of the previous page, or None for the first page.
+                - limit: The maximum number of tasks to return.
+                - stream: If True, return an iterator over every matching task instead of a page.
+                - projection: Optional model to project the tasks to.
 
             Returns:
-                - List[Task]: A list of Task objects created by the specified user.
+                - Page[Task]: A page of Task objects created by the specified user.
 
         """
         validate_uuid(creator_id)
-        user = await UserService.get_user_by_id(creator_id)
-        tasks = await Task.find(Task.task_creator.id == user.id).to_list()
-        return tasks
+        query = Task.find(Task.task_creator_id == creator_id)
+        if stream:
+            return iterate_documents(query, TASK_SORT)
+        tasks, next_cursor = await paginate(query, TASK_SORT, cursor, limit, projection)
+        return Page(items=tasks, next_cursor=next_cursor)
 
     @staticmethod
-    async def list_tasks_by_assignee_id(assignee_id: UUID) -> List[Task]:
+    async def list_tasks_by_assignee_id(assignee_id: UUID, cursor: Optional[str] = None,
+                                        limit: int = settings.DEFAULT_PAGE_SIZE,
+                                        stream: bool = False,
+                                        projection: Optional[Type[BaseModel]] = None) -> TaskListing:
         """
-        Retrieve a list of tasks based on the assignee ID.
+        Retrieve a page of tasks based on the assignee ID, ordered by due date.
 
         :param assignee_id: The ID of the assignee.
         :type assignee_id: UUID
-        :return: A list of tasks assigned to the specified assignee.
-        :rtype: List[Task]
+        :param cursor: The next_cursor of the previous page, or None for the first page.
+        :param limit: The maximum number of tasks to return.
+        :param stream: If True, return an iterator over every matching task instead of a page.
+        :param projection: Optional model to project the tasks to.
+        :return: A page of tasks assigned to the specified assignee.
+        :rtype: Page[Task]
         """
         validate_uuid(assignee_id)
-        user = await UserService.get_user_by_id(assignee_id)
-        tasks = await Task.find(Task.task_assignee.id == user.id).to_list()
-        return tasks
+        query = Task.find(Task.task_assignee_id == assignee_id)
+        if stream:
+            return iterate_documents(query, TASK_SORT)
+        tasks, next_cursor = await paginate(query, TASK_SORT, cursor, limit, projection)
+        return Page(items=tasks, next_cursor=next_cursor)
 
     @staticmethod
-    async def create_task(user: User, data: TaskCreate) -> Task:
+    async def get_assignee_listing_validator(assignee_id: UUID) -> Tuple[int, Optional[datetime]]:
+        """
+        Return what the ETag of an assignee's task listing is derived from: the number of tasks that ever left it,
+        from AssigneeListingVersion, and the latest updated_at among the tasks still in it, which every other write
+        moves.
+
+        Each is a single index seek, whatever the number of tasks, and both use the listing read preference so they
+        describe the same data the listing is read from.
+
+        :param assignee_id: The ID of the assignee.
+        :return: The removal count and the latest updated_at, None if there are no tasks.
+        """
+        validate_uuid(assignee_id)
+        listing, latest = await asyncio.gather(
+            list_collection(AssigneeListingVersion).find_one(
+                AssigneeListingVersion.find(AssigneeListingVersion.assignee_id == assignee_id).get_filter_query(),
+                {"_id": 0, "removals": 1}),
+            list_collection(Task).find_one(
+                Task.find(Task.task_assignee_id == assignee_id).get_filter_query(), {"_id": 0, "updated_at": 1},
+                sort=[("updated_at", pymongo.DESCENDING)]))
+        return listing["removals"] if listing else 0, latest["updated_at"] if latest else None
+
+    @staticmethod
+    async def list_tasks_by_project(project_id: UUID, cursor: Optional[str] = None,
+                                    limit: int = settings.DEFAULT_PAGE_SIZE,
+                                    stream: bool = False,
+                                    projection: Optional[Type[BaseModel]] = None) -> TaskListing:
+        """
+        Retrieve a page of the tasks that belong to a project, ordered by due date.
+
+        :param project_id: The ID of the project.
+        :type project_id: UUID
+        :param cursor: The next_cursor of the previous page, or None for the first page.
+        :param limit: The maximum number of tasks to return.
+        :param stream: If True, return an iterator over every matching task instead of a page.
+        :param projection: Optional model to project the tasks to.
+        :return: A page of tasks in the project.
+        :rtype: Page[Task]
+        """
+        validate_uuid(project_id)
+        query = Task.find(Task.project_id == project_id)
+        if stream:
+            return iterate_documents(query, TASK_SORT)
+        tasks, next_cursor = await paginate(query, TASK_SORT, cursor, limit, projection)
+        return Page(items=tasks, next_cursor=next_cursor)
+
+    @classmethod
+    async def create_task(cls, user: User, data: TaskCreate) -> Task:
         """
         Creates a new task with the provided data and associates it with the specified user.
 
@@ -66,45 +239,162 @@ class TaskService:
         Returns:
         - Task: The newly created task.
         """
-        task = Task(**data.dict(exclude_unset=True), task_creator=user)
-        return await task.insert()
+        task = Task(
+            **data.dict(exclude_unset=True),
+            task_creator=user,
+            task_creator_id=user.user_id,
+            task_assignee_id=await UserService.get_user_id_by_link(data.task_assignee)
+        )
+        task = await task.insert()
+        invalidate_task_stats(task_stats_keys(task))
+        return task
 
     @classmethod
-    async def get_task_by_id(cls, task_id: UUID):
+    async def get_task_by_id(cls, task_id: UUID, projection: Optional[Type[BaseModel]] = None):
         """
         Retrieve a task by its ID.
 
         Parameters:
         - task_id (UUID): The unique identifier of the task.
+        - projection (Optional[Type[BaseModel]]): Optional model to project the task to.
 
         Returns:
         - Task: The task with the specified ID.
         """
         validate_uuid(task_id)
-        task = await Task.find_one(Task.task_id == task_id)
+        query = Task.find_one(Task.task_id == task_id)
+        task = await (query.project(projection) if projection is not None else query)
         return task
 
+    @staticmethod
+    async def search_tasks(user_id: UUID, text: str, project_id: Optional[UUID] = None,
+                           status: Optional[StatusEnum] = None, cursor: Optional[str] = None,
+                           limit: int = settings.DEFAULT_PAGE_SIZE) -> Page[TaskSearchHit]:
+        """
+        Search the tasks a user created or is assigned to for ``text``, most relevant first.
+
+        Matches come from the title_description_text index, where a title match weighs ten times a description
+        match. Pages are keyed on (score, _id), so paging stays stable while tasks elsewhere change. Only the
+        TaskSearchHit fields are read back.
+
+        Parameters:
+        - user_id (UUID): The user whose tasks are searched.
+        - text (str): The search terms, in Mongo $text syntax ("quoted phrases", -excluded terms).
+        - project_id (Optional[UUID]): Only search the tasks of this project.
+        - status (Optional[StatusEnum]): Only search tasks with this status.
+        - cursor (Optional[str]): The next_cursor of the previous page, or None for the first page.
+        - limit (int): The maximum number of tasks to return.
+
+        Returns:
+        - Page[TaskSearchHit]: A page of matching tasks with their relevance score.
+
+        Raises:
+        - HTTPException: 503 while the text index is still being built.
+        """
+        validate_uuid(user_id)
+        conditions = [Text(text), Or(Task.task_creator_id == user_id, Task.task_assignee_id == user_id)]
+        if project_id is not None:
+            conditions.append(Task.project_id == project_id)
+        if status is not None:
+            conditions.append(Task.status == status)
+
+        pipeline = [
+            # a $text match has to be the first stage
+            {"$match": Task.find(*conditions).get_filter_query()},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+        ]
+        if cursor:
+            last = decode_cursor(cursor, SEARCH_SORT)
+            pipeline.append({"$match": {"$or": [{"score": {"$lt": last["score"]}},
+                                                {"score": last["score"], "_id": {"$gt": last["_id"]}}]}})
+        pipeline += [
+            {"$sort": {"score": pymongo.DESCENDING, "_id": pymongo.ASCENDING}},
+            {"$limit": limit + 1},
+            {"$project": SEARCH_PROJECTION},
+        ]
+        try:
+            found = await list_collection(Task).aggregate(pipeline).to_list(None)
+        except OperationFailure as e:
+            if e.code == INDEX_NOT_FOUND:
+                raise HTTPException(status_code=503, detail="Task search is not available yet, try again later")
+            raise
+
+        next_cursor = None
+        if len(found) > limit:
+            found = found[:limit]
+            next_cursor = encode_cursor({"score": found[-1]["score"], "_id": found[-1]["_id"]})
+        return Page[TaskSearchHit](items=[TaskSearchHit.model_validate(raw) for raw in found], next_cursor=next_cursor)
+
+    @staticmethod
+    async def get_task_validator(task_id: UUID) -> Optional[Tuple[int, datetime]]:
+        """
+        Return the version and updated_at of a task, what its ETag and Last-Modified are derived from, without
+        loading the rest of it.
+
+        Parameters:
+        - task_id (UUID): The unique identifier of the task.
+
+        Returns:
+        - Optional[Tuple[int, datetime]]: The version and updated_at, or None if there is no such task.
+        """
+        validate_uuid(task_id)
+        task = await Task.find_one(Task.task_id == task_id).project(TaskValidator)
+        if task is None:
+            return None
+        return task.version or 0, task.updated_at
+
     @classmethod
-    async def update_task(cls, task_id: UUID, data: TaskUpdate) -> Task:
+    async def update_task(cls, task_id: UUID, data: TaskUpdate, current_user: User,
+                          expected_version: Optional[int] = None) -> Task:
         """
-        Updates a task with the given task_id and data.
+        Updates a task with the given task_id and data, in a single find_one_and_update.
+
+        Only the task's creator or an admin may change its due date; that is a condition of the update rather than a
+        check against an earlier read. The task is only read again when the update matches nothing, to tell the
+        failures apart.
 
         Parameters:
             task_id (UUID): The unique identifier of the task to update.
             data (TaskUpdate): The data to update the task with.
+            current_user (User): The user making the request.
+            expected_version (Optional[int]): If given, the update only applies if the task is at this version.
 
         Returns:
             Task: The updated task.
 
         Raises:
-            HTTPException: If the task with the given task_id is not found.
+            HTTPException: 404 if the task with the given task_id is not found, 403 if the user may not apply the
+            update, 412 if it is not at expected_version.
         """
         validate_uuid(task_id)
-        task = await cls.get_task_by_id(task_id=task_id)
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
-        await task.update({"$set": data.dict(exclude_unset=True)})
-        await task.save()
+        update = data.dict(exclude_unset=True)
+        conditions = [Task.task_id == task_id]
+        if "due_date" in update and "admin" not in current_user.roles:
+            conditions.append(Task.task_creator_id == current_user.user_id)
+        if expected_version is not None:
+            conditions.append(version_condition(Task, expected_version))
+
+        if "task_assignee" in update:
+            update["task_assignee"] = data.task_assignee
+            update["task_assignee_id"] = await UserService.get_user_id_by_link(data.task_assignee)
+        sync_complete(update)
+        update["updated_at"] = datetime.utcnow()
+
+        # the task as it was, so the stats and listing it leaves are known too
+        previous = await Task.find_one(*conditions).update({"$set": update, "$inc": {"version": 1}},
+                                                           response_type=UpdateResponse.OLD_DOCUMENT)
+        if previous is None:
+            task = await Task.find_one(Task.task_id == task_id).project(TaskKeys)
+            if task is None:
+                raise HTTPException(status_code=404, detail="Task not found")
+            cls.check_update_allowed(task, data, current_user)
+            raise precondition_failed()
+
+        # the task as written, without reading it back
+        task = previous.model_copy(update={**update, "version": (previous.version or 0) + 1})
+        invalidate_task_stats(task_stats_keys(task) | task_stats_keys(previous))
+        if previous.task_assignee_id != task.task_assignee_id:
+            await record_listing_removals([previous.task_assignee_id])
         return task
 
     @classmethod
@@ -124,46 +414,290 @@ class TaskService:
         task = await cls.get_task_by_id(task_id=task_id)
         if task:
             await task.delete()
+            invalidate_task_stats(task_stats_keys(task))
+            await record_listing_removals([task.task_assignee_id])
         return None
 
     @staticmethod
-    async def list_all_overdue_tasks() -> List[Task]:
-        """List all overdue tasks.
+    def check_update_allowed(task: Task, data: TaskUpdate, current_user: User) -> None:
+        """
+        Check that a user may apply an update to a task: only the task's creator or an admin may change its due date.
+
+        Parameters:
+            task (Task): The task to update, at least with task_creator_id loaded.
+            data (TaskUpdate): The update.
+            current_user (User): The user making the request.
+
+        Raises:
+            HTTPException: 403 if the user may not apply the update.
+        """
+        if "due_date" in data.dict(exclude_unset=True) and task.task_creator_id != current_user.user_id \
+                and "admin" not in current_user.roles:
+            raise HTTPException(status_code=403,
+                                detail="You do not have permission to update the due date of this task")
+
+    @staticmethod
+    async def bulk_create_tasks(user: User, items: List[Any]) -> List[BulkItemResult]:
+        """
+        Create many tasks with a single unordered insert_many.
+
+        Every item is validated on its own; invalid items are reported and the valid ones are still created.
+
+        Parameters:
+            user (User): The user creating the tasks.
+            items (List[Any]): The tasks to create, each in the shape of TaskCreate.
 
         Returns:
-            A list of Task objects that are overdue.
+            List[BulkItemResult]: One result per item, in item order: 201 with the new task_id, 422 with the
+            validation errors, or the status of a failed write.
+        """
+        results: List[Optional[BulkItemResult]] = [None] * len(items)
+        valid: List[Tuple[int, TaskCreate]] = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, TaskCreate.model_validate(item)))
+            except ValidationError as e:
+                results[index] = BulkItemResult(index=index, status_code=422, detail=_validation_errors(e))
+
+        assignee_ids = await UserService.get_user_ids_by_links(
+            data.task_assignee for _, data in valid if data.task_assignee is not None)
+        created: List[Tuple[int, Task]] = []
+        for index, data in valid:
+            try:
+                created.append((index, Task(
+                    **data.dict(exclude_unset=True),
+                    task_creator=user,
+                    task_creator_id=user.user_id,
+                    task_assignee_id=assignee_ids.get(data.task_assignee.ref.id) if data.task_assignee else None
+                )))
+            except ValidationError as e:
+                results[index] = BulkItemResult(index=index, status_code=422, detail=_validation_errors(e))
+
+        failed: Dict[int, dict] = {}
+        if created:
+            try:
+                await Task.insert_many([task for _, task in created], ordered=False)
+            except BulkWriteError as e:
+                failed = _write_errors(e)
+
+        stale = set()
+        for position, (index, task) in enumerate(created):
+            error = failed.get(position)
+            if error is not None:
+                results[index] = BulkItemResult(index=index, status_code=409 if error["code"] == 11000 else 500,
+                                                task_id=task.task_id, detail=error["errmsg"])
+            else:
+                results[index] = BulkItemResult(index=index, status_code=201, task_id=task.task_id)
+                stale |= task_stats_keys(task)
+        invalidate_task_stats(stale)
+        return results
 
+    @classmethod
+    async def bulk_update_tasks(cls, current_user: User, items: List[Any]) -> List[BulkItemResult]:
         """
-        tasks = await Task.find(Task.due_date < datetime.utcnow()).to_list()
-        return tasks
+        Update many tasks with a single unordered bulk_write.
+
+        The targeted tasks are loaded with one query and each item is authorized like a single update. Items that
+        are invalid, target a missing task or are not allowed are reported and the others are still applied.
+
+        Parameters:
+            current_user (User): The user making the request.
+            items (List[Any]): The updates, each in the shape of TaskBulkUpdate.
+
+        Returns:
+            List[BulkItemResult]: One result per item, in item order: 200, 403, 404, 422 with the validation
+            errors, or 500 if the write failed.
+        """
+        results: List[Optional[BulkItemResult]] = [None] * len(items)
+        valid: List[Tuple[int, TaskBulkUpdate]] = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, TaskBulkUpdate.model_validate(item)))
+            except ValidationError as e:
+                results[index] = BulkItemResult(index=index, status_code=422, detail=_validation_errors(e))
+
+        task_ids = list({data.task_id for _, data in valid})
+        tasks = {task.task_id: task for task in await Task.find(In(Task.task_id, task_ids)).project(TaskKeys).to_list()}
+        assignee_ids = await UserService.get_user_ids_by_links(
+            data.task_assignee for _, data in valid if data.task_assignee is not None)
+
+        operations = []
+        applied: List[Tuple[int, UUID, Set[Hashable], Optional[UUID]]] = []
+        for index, data in valid:
+            task = tasks.get(data.task_id)
+            if task is None:
+                results[index] = BulkItemResult(index=index, status_code=404, task_id=data.task_id,
+                                                detail="Task not found")
+                continue
+            try:
+                cls.check_update_allowed(task, data, current_user)
+            except HTTPException as e:
+                results[index] = BulkItemResult(index=index, status_code=e.status_code, task_id=data.task_id,
+                                                detail=e.detail)
+                continue
+
+            update = data.dict(exclude_unset=True)
+            update.pop("task_id")
+            stale = task_stats_keys(task)
+            # the assignee whose listing the task leaves, if it is reassigned
+            removed_from = None
+            if "task_assignee" in update:
+                update["task_assignee"] = data.task_assignee
+                update["task_assignee_id"] = assignee_ids.get(data.task_assignee.ref.id) if data.task_assignee \
+                    else None
+                stale.add(("user", update["task_assignee_id"]))
+                if task.task_assignee_id != update["task_assignee_id"]:
+                    removed_from = task.task_assignee_id
+            if update.get("project_id") is not None:
+                stale.add(("project", update["project_id"]))
+            sync_complete(update)
+            update["updated_at"] = datetime.utcnow()
+            operations.append(UpdateOne(Task.find(Task.task_id == data.task_id).get_filter_query(),
+                                        {"$set": Encoder().encode(update), "$inc": {"version": 1}}))
+            applied.append((index, data.task_id, stale, removed_from))
+
+        failed: Dict[int, dict] = {}
+        if operations:
+            try:
+                await Task.get_motor_collection().bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                failed = _write_errors(e)
+
+        stale = set()
+        removed_from = set()
+        for position, (index, task_id, keys, assignee_id) in enumerate(applied):
+            error = failed.get(position)
+            if error is not None:
+                results[index] = BulkItemResult(index=index, status_code=500, task_id=task_id, detail=error["errmsg"])
+            else:
+                results[index] = BulkItemResult(index=index, status_code=200, task_id=task_id)
+                stale |= keys
+                removed_from.add(assignee_id)
+        invalidate_task_stats(stale)
+        await record_listing_removals(removed_from)
+        return results
 
     @staticmethod
-    async def list_overdue_tasks_by_assignee(assignee_id: UUID) -> List[Task]:
+    async def bulk_delete_tasks(items: List[Any]) -> List[BulkItemResult]:
         """
-            Retrieves a list of overdue tasks assigned to a specific assignee.
+        Delete many tasks with a single unordered bulk_write.
+
+        Parameters:
+            items (List[Any]): The task_ids of the tasks to delete.
+
+        Returns:
+            List[BulkItemResult]: One result per item, in item order: 200, 404, 422 for an invalid task_id, or 500
+            if the write failed.
+        """
+        results: List[Optional[BulkItemResult]] = [None] * len(items)
+        valid: List[Tuple[int, UUID]] = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, UUID(str(item))))
+            except ValueError:
+                results[index] = BulkItemResult(index=index, status_code=422, detail="Invalid task id provided.")
+
+        task_ids = list({task_id for _, task_id in valid})
+        tasks = {task.task_id: task for task in await Task.find(In(Task.task_id, task_ids)).project(TaskKeys).to_list()}
+
+        operations = []
+        applied: List[Tuple[int, UUID]] = []
+        for index, task_id in valid:
+            if task_id not in tasks:
+                results[index] = BulkItemResult(index=index, status_code=404, task_id=task_id, detail="Task not found")
+                continue
+            operations.append(DeleteOne({"_id": tasks[task_id].id}))
+            applied.append((index, task_id))
+
+        failed: Dict[int, dict] = {}
+        if operations:
+            try:
+                await Task.get_motor_collection().bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                failed = _write_errors(e)
+
+        stale = set()
+        removed_from = set()
+        for position, (index, task_id) in enumerate(applied):
+            error = failed.get(position)
+            if error is not None:
+                results[index] = BulkItemResult(index=index, status_code=500, task_id=task_id, detail=error["errmsg"])
+            else:
+                results[index] = BulkItemResult(index=index, status_code=200, task_id=task_id)
+                stale |= task_stats_keys(tasks[task_id])
+                removed_from.add(tasks[task_id].task_assignee_id)
+        invalidate_task_stats(stale)
+        await record_listing_removals(removed_from)
+        return results
+
+    @staticmethod
+    async def list_all_overdue_tasks(cursor: Optional[str] = None,
+                                     limit: int = settings.DEFAULT_PAGE_SIZE,
+                                     stream: bool = False,
+                                     projection: Optional[Type[BaseModel]] = None) -> TaskListing:
+        """List a page of open overdue tasks, ordered by due date. Completed tasks are not overdue.
+
+        Args:
+            cursor: The next_cursor of the previous page, or None for the first page.
+            limit: The maximum number of tasks to return.
+            stream: If True, return an iterator over every matching task instead of a page.
+            projection: Optional model to project the tasks to.
+
+        Returns:
+            A page of open Task objects that are overdue.
+
+        """
+        query = Task.find(*OPEN_TASK, Task.due_date < datetime.utcnow())
+        if stream:
+            return iterate_documents(query, TASK_SORT)
+        tasks, next_cursor = await paginate(query, TASK_SORT, cursor, limit, projection)
+        return Page(items=tasks, next_cursor=next_cursor)
+
+    @staticmethod
+    async def list_overdue_tasks_by_assignee(assignee_id: UUID, cursor: Optional[str] = None,
+                                             limit: int = settings.DEFAULT_PAGE_SIZE,
+                                             stream: bool = False,
+                                             projection: Optional[Type[BaseModel]] = None) -> TaskListing:
+        """
+            Retrieves a page of open overdue tasks assigned to a specific assignee, ordered by due date. Completed
+            tasks are not overdue.
 
             Parameters:
                 assignee_id (UUID): The ID of the assignee.
+                cursor (Optional[str]): The next_cursor of the previous page, or None for the first page.
+                limit (int): The maximum number of tasks to return.
+                stream (bool): If True, return an iterator over every matching task instead of a page.
+                projection (Optional[Type[BaseModel]]): Optional model to project the tasks to.
 
             Returns:
-                List[Task]: A list of overdue Task objects.
+                Page[Task]: A page of open overdue Task objects.
 
         """
         validate_uuid(assignee_id)
-        user = await UserService.get_user_by_id(assignee_id)
-        tasks = await Task.find(
-            Task.task_assignee.id == user.id,
+        query = Task.find(
+            *OPEN_TASK,
+            Task.task_assignee_id == assignee_id,
             Task.due_date < datetime.utcnow()
-        ).to_list()
-        return tasks
+        )
+        if stream:
+            return iterate_documents(query, TASK_SORT)
+        tasks, next_cursor = await paginate(query, TASK_SORT, cursor, limit, projection)
+        return Page(items=tasks, next_cursor=next_cursor)
 
     @staticmethod
-    async def get_tasks_by_due_date(date: Union[str, datetime]) -> List[Task]:
+    async def get_tasks_by_due_date(date: Union[str, datetime], cursor: Optional[str] = None,
+                                    limit: int = settings.DEFAULT_PAGE_SIZE,
+                                    stream: bool = False,
+                                    projection: Optional[Type[BaseModel]] = None) -> TaskListing:
         """
-        Retrieve a list of tasks by their due date.
+        Retrieve a page of tasks by their due date.
 
         :param date: The due date of the tasks to retrieve.
-        :return: A list of tasks that are due on the specified date.
+        :param cursor: The next_cursor of the previous page, or None for the first page.
+        :param limit: The maximum number of tasks to return.
+        :param stream: If True, return an iterator over every matching task instead of a page.
+        :param projection: Optional model to project the tasks to.
+        :return: A page of tasks that are due on the specified date.
         """
         # Validate the date
         validated_date = validate_date(date)
@@ -173,34 +707,107 @@ class TaskService:
         end_of_day = datetime.combine(validated_date, time.max)
 
         # Query the database to find tasks that are due on the specified date, regardless of time
-        tasks = await Task.find(Task.due_date >= start_of_day, Task.due_date <= end_of_day).to_list()
+        query = Task.find(Task.due_date >= start_of_day, Task.due_date <= end_of_day)
+        if stream:
+            return iterate_documents(query, TASK_SORT)
+        tasks, next_cursor = await paginate(query, TASK_SORT, cursor, limit, projection)
 
-        return tasks
+        return Page(items=tasks, next_cursor=next_cursor)
 
     @staticmethod
-    async def get_tasks_by_due_date_and_assignee(date: Union[str, datetime], assignee_id: UUID) -> List[Task]:
+    async def get_tasks_by_due_date_and_assignee(date: Union[str, datetime], assignee_id: UUID,
+                                                 cursor: Optional[str] = None,
+                                                 limit: int = settings.DEFAULT_PAGE_SIZE,
+                                                 stream: bool = False,
+                                                 projection: Optional[Type[BaseModel]] = None) -> TaskListing:
         """
-        Returns a list of tasks filtered by due date and assignee.
+        Returns a page of tasks filtered by due date and assignee.
 
         Parameters:
         - date (Union[str, datetime]): The due date to search for tasks.
           It can be either a string in the format 'YYYY-MM-DD' or a datetime object.
         - assignee_id (UUID): The ID of the assignee to filter tasks by.
+        - cursor (Optional[str]): The next_cursor of the previous page, or None for the first page.
+        - limit (int): The maximum number of tasks to return.
+        - stream (bool): If True, return an iterator over every matching task instead of a page.
+        - projection (Optional[Type[BaseModel]]): Optional model to project the tasks to.
 
         Returns:
-        - List[Task]: A list of Task objects that match the given due date and assignee.
+        - Page[Task]: A page of Task objects that match the given due date and assignee.
 
         """
         validated_date = validate_date(date)
         validate_uuid(assignee_id)
 
-        user = await UserService.get_user_by_id(assignee_id)
-
         # Construct a datetime range for the entire day
         start_of_day = datetime.combine(validated_date, time.min)
         end_of_day = datetime.combine(validated_date, time.max)
 
-        tasks = await Task.find((Task.due_date >= start_of_day) & (Task.due_date <= end_of_day) & (
-                Task.task_assignee.id == user.id)).to_list()
+        query = Task.find((Task.due_date >= start_of_day) & (Task.due_date <= end_of_day) & (
+                Task.task_assignee_id == assignee_id))
+        if stream:
+            return iterate_documents(query, TASK_SORT)
+        tasks, next_cursor = await paginate(query, TASK_SORT, cursor, limit, projection)
+
+        return Page(items=tasks, next_cursor=next_cursor)
+
+    @staticmethod
+    async def get_user_task_stats(user_id: UUID) -> UserTaskStats:
+        """
+        Count the tasks assigned to and created by a user, by status and by overdue or not.
 
-        return tasks
+        The counts come from one $facet aggregation and are cached per user until one of the user's tasks is
+        created, updated or deleted, or settings.TASK_STATS_CACHE_TTL_SECONDS pass.
+
+        Parameters:
+        - user_id (UUID): The public user_id of the user.
+
+        Returns:
+        - UserTaskStats: The counts for the tasks assigned to and created by the user.
+        """
+        key = ("user", user_id)
+        stats = task_stats_cache.get(key)
+        if stats is not None:
+            return stats
+
+        now = datetime.utcnow()
+        assigned = Task.find(Task.task_assignee_id == user_id).get_filter_query()
+        created = Task.find(Task.task_creator_id == user_id).get_filter_query()
+        pipeline = [
+            {"$match": {"$or": [assigned, created]}},
+            {"$facet": {**_stats_facets("assigned", assigned, now), **_stats_facets("created", created, now)}},
+        ]
+        facets = (await Task.get_motor_collection().aggregate(pipeline).to_list(length=1))[0]
+        stats = UserTaskStats(assigned=_stats_from_facets("assigned", facets),
+                              created=_stats_from_facets("created", facets))
+        task_stats_cache.set(key, stats)
+        return stats
+
+    @staticmethod
+    async def get_project_task_stats(project_id: UUID) -> TaskStats:
+        """
+        Count the tasks of a project, by status and by overdue or not.
+
+        The counts come from one $facet aggregation and are cached per project until one of its tasks is created,
+        updated or deleted, or settings.TASK_STATS_CACHE_TTL_SECONDS pass.
+
+        Parameters:
+        - project_id (UUID): The ID of the project.
+
+        Returns:
+        - TaskStats: The counts for the project's tasks.
+        """
+        key = ("project", project_id)
+        stats = task_stats_cache.get(key)
+        if stats is not None:
+            return stats
+
+        match = Task.find(Task.project_id == project_id).get_filter_query()
+        pipeline = [
+            {"$match": match},
+            {"$facet": _stats_facets("project", {}, datetime.utcnow())},
+        ]
+        facets = (await Task.get_motor_collection().aggregate(pipeline).to_list(length=1))[0]
+        stats = _stats_from_facets("project", facets)
+        task_stats_cache.set(key, stats)
+        return stats
@@ -1,17 +1,25 @@
-from typing import Optional, List
+from typing import Dict, Iterable, Optional, List, Type, Union
 from uuid import UUID
 
+from beanie import Link, UpdateResponse
+from beanie.operators import In
+from bson import ObjectId
 from fastapi import HTTPException, Depends
+from pydantic import BaseModel
 
 from app.core.security import get_password, verify_password
 from app.models.user_model import User
 from app.schemas.user_schema import UserAuth, UserUpdate
 from .email_service import EmailService
 from ..api.deps.user_deps import get_current_user
+from ..core.cache import TTLCache
 from ..core.config import settings
 from ..models.password_reset_model import PasswordReset
+from ..utils.preconditions import precondition_failed, version_condition
 from ..utils.utils import validate_uuid, generate_password_reset_token
 
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
 
 class UserService:
     @staticmethod
@@ -26,7 +34,7 @@ class UserService:
         """
         user_in = User(
             email=user.email,
-            hashed_password=get_password(user.password),
+            hashed_password=await get_password(user.password),
             roles=user.roles
         )
         await user_in.save()
@@ -44,18 +52,81 @@ class UserService:
         return user
 
     @staticmethod
-    async def get_user_by_id(user_id: UUID) -> Optional[User]:
+    async def get_user_by_id(user_id: UUID, projection: Optional[Type[BaseModel]] = None) -> Optional[User]:
         """
         Return a user object based on the provided user ID.
 
         :param user_id: Unique identifier for the user.
         :type user_id: UUID
+        :param projection: Optional model to project the user to, e.g. UserOut to leave hashed_password in the database.
         :return: User object if user is found, otherwise None.
         :rtype: Optional[User]
         """
-        user = await User.find_one(User.user_id == user_id)
+        query = User.find_one(User.user_id == user_id)
+        user = await (query.project(projection) if projection is not None else query)
         return user
 
+    @classmethod
+    async def get_cached_user_by_id(cls, user_id: UUID) -> Optional[User]:
+        """
+        Return a user object based on the provided user ID, serving it from the in-process user cache when possible.
+
+        Every caller gets its own copy, so nothing it changes on the user leaks into the cache or other requests.
+
+        :param user_id: Unique identifier for the user.
+        :type user_id: UUID
+        :return: User object if user is found, otherwise None.
+        :rtype: Optional[User]
+        """
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await cls.get_user_by_id(user_id)
+            if not user:
+                return None
+            user_cache.set(user_id, user)
+        return user.model_copy(deep=True)
+
+    @staticmethod
+    def invalidate_cached_user(user_id: UUID) -> None:
+        """
+        Drop a user from the in-process user cache so the next request reloads it from the database.
+
+        :param user_id: Unique identifier for the user.
+        :type user_id: UUID
+        """
+        user_cache.invalidate(user_id)
+
+    @staticmethod
+    async def get_user_id_by_link(user: Union[User, Link[User], None]) -> Optional[UUID]:
+        """
+        Return the public user_id of a user referenced by a document link.
+
+        :param user: A User, a Link to a User, or None.
+        :return: The user's user_id, or None if there is no user or it does not exist.
+        :rtype: Optional[UUID]
+        """
+        if user is None:
+            return None
+        if isinstance(user, User):
+            return user.user_id
+
+        linked_user = await User.get(user.ref.id)
+        return linked_user.user_id if linked_user else None
+
+    @staticmethod
+    async def get_user_ids_by_links(links: Iterable[Link[User]]) -> Dict[ObjectId, UUID]:
+        """
+        Return the public user_ids of the users referenced by ``links``, with one query.
+
+        :param links: Links to users.
+        :return: The user_id of every linked user that exists, keyed by the user's _id.
+        :rtype: Dict[ObjectId, UUID]
+        """
+        ids = list({link.ref.id for link in links})
+        if not ids:
+            return {}
+        return {user.id: user.user_id for user in await User.find(In(User.id, ids)).to_list()}
+
     @staticmethod
     async def authenticate(email: str, password: str) -> Optional[User]:
         """
@@ -68,40 +139,49 @@ class UserService:
         user = await UserService.get_user_by_email(email=email)
         if not user:
             return None
-        if not verify_password(password=password, hashed_password=user.hashed_password):
+        if not await verify_password(password=password, hashed_password=user.hashed_password):
             return None
 
         return user
 
     @classmethod
     async def update_user_by_id(cls, user_id: UUID, user_update: UserUpdate,
-                                current_user: User = Depends(get_current_user)) -> User:
+                                current_user: User = Depends(get_current_user),
+                                expected_version: Optional[int] = None) -> User:
 
         """
-        Updates a user by their ID.
+        Updates a user by their ID, in a single find_one_and_update.
 
         Parameters:
         - user_id: UUID - The ID of the user to update.
         - user_update: UserUpdate - The updated user data to apply.
         - current_user (optional): Depends - The current user making the request. Defaults to the result of the `get_current_user` function.
+        - expected_version: Optional[int] - If given, the update only applies if the user is at this version.
 
         Returns:
         - User - The updated user object.
 
         Raises:
-        - HTTPException - If the user with the given ID is not found or if the current user is unauthorized.
+        - HTTPException - If the user with the given ID is not found, if the current user is unauthorized, or (412) if
+          the user is not at expected_version.
         """
         validate_uuid(user_id)
-        user = await cls.get_user_by_id(user_id=user_id)
+        if current_user.user_id != user_id and "admin" not in current_user.roles:
+            raise HTTPException(status_code=401, detail="Unauthorized")
+
+        conditions = [User.user_id == user_id]
+        if expected_version is not None:
+            conditions.append(version_condition(User, expected_version))
+        user = await User.find_one(*conditions).update(
+            {"$set": user_update.dict(exclude_unset=True), "$inc": {"version": 1}},
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
         if not user:
+            if expected_version is not None and await User.find(User.user_id == user_id).count():
+                raise precondition_failed()
             raise HTTPException(status_code=404, detail="User not found")
 
-        if user is current_user or "admin" in current_user.roles:
-            await user.update({"$set": user_update.dict(exclude_unset=True)})
-            await user.save()
-        else:
-            raise HTTPException(status_code=401, detail="Unauthorized")
-
+        cls.invalidate_cached_user(user.user_id)
         return user
 
     @classmethod
@@ -122,16 +202,16 @@ class UserService:
             - HTTPException - 404: If the user is not found.
             - HTTPException - 401: If the current user does not have admin privileges.
         """
-        user = await cls.get_user_by_id(user_id=user_id)
+        if "admin" not in current_user.roles:
+            raise HTTPException(status_code=401, detail="Unauthorized")
+
+        user = await User.find_one(User.user_id == user_id).update(
+            {"$set": {"roles": user_roles}, "$inc": {"version": 1}},
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-
-        if "admin" in current_user.roles:
-            user.roles = user_roles
-            await user.save()
-
-        else:
-            raise HTTPException(status_code=401, detail="Unauthorized")
+        cls.invalidate_cached_user(user.user_id)
 
         return user
 
@@ -150,16 +230,22 @@ class UserService:
 
         Raises:
         - HTTPException: If the old password does not match the user's hashed password (status_code: 401, detail:
-        "Old password is incorrect").
+        "Old password is incorrect"), or 404 if the user no longer exists.
         """
-        if not verify_password(old_password, current_user.hashed_password):
+        if not await verify_password(old_password, current_user.hashed_password):
             raise HTTPException(status_code=401, detail="Old password is incorrect")
 
-        hashed_password = get_password(new_password)
-        current_user.hashed_password = hashed_password
-        await current_user.save()
+        hashed_password = await get_password(new_password)
+        # only the password changes; saving current_user would write back whatever else it holds, however stale
+        user = await User.find_one(User.user_id == current_user.user_id).update(
+            {"$set": {"hashed_password": hashed_password}, "$inc": {"version": 1}},
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        cls.invalidate_cached_user(user.user_id)
 
-        return current_user
+        return user
 
     @staticmethod
     async def send_password_reset_email(email: str):
@@ -199,13 +285,14 @@ class UserService:
         if not stored_token:
             raise HTTPException(status_code=404, detail="Invalid token")
 
-        user = await cls.get_user_by_email(email=stored_token.email)
+        hashed_password = await get_password(new_password)
+        user = await User.find_one(User.email == stored_token.email).update(
+            {"$set": {"hashed_password": hashed_password}, "$inc": {"version": 1}},
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
 
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-
-        hashed_password = get_password(new_password)
-        user.hashed_password = hashed_password
-        await user.save()
+        cls.invalidate_cached_user(user.user_id)
 
         return user
@@ -0,0 +1,210 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from beanie import Document, Link
+from beanie.operators import In
+from bson import ObjectId
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+
+from app.models.project_model import Project
+from app.models.task_model import Task
+from app.models.user_model import User
+from app.schemas.pagination_schema import Page
+from app.schemas.user_schema import UserOut
+from app.utils.projection import projection_model
+from app.utils.responses import FastJSONResponse, model_response
+
+# ?expand= names accepted per document model, mapped to the Link fields they resolve
+EXPANSIONS: Dict[Type[Document], Dict[str, str]] = {
+    Task: {"assignee": "task_assignee", "creator": "task_creator", "comments": "comments"},
+    Project: {"owner": "project_owner", "members": "project_members"},
+}
+
+# always fetched, even when not asked for: the keyset sort keys that next_cursor is built from
+ALWAYS_PROJECTED: Dict[Type[Document], Tuple[str, ...]] = {
+    Task: ("id", "due_date"),
+    Project: ("id",),
+}
+
+# linked documents are exposed through these schemas instead of being dumped whole, e.g. to keep hashed_password out
+PUBLIC_SCHEMAS: Dict[Type[Document], Type[BaseModel]] = {
+    User: UserOut,
+}
+
+
+class LinkLoader:
+    """
+    Resolves Beanie links in batches, with one ``$in`` query per target collection.
+
+    Ids are de-duplicated and every document loaded (or found missing) is memoized, so a loader should live for the
+    duration of a single request.
+    """
+
+    def __init__(self):
+        self._loaded: Dict[Tuple[Type[Document], ObjectId], Optional[Document]] = {}
+
+    async def load(self, links: Iterable[Link]) -> Dict[Tuple[Type[Document], ObjectId], Optional[Document]]:
+        """
+        Fetch the documents behind ``links`` that were not loaded yet.
+
+        :param links: The links to resolve.
+        :return: Every document loaded so far, keyed by (document class, _id); None for links whose target is gone.
+        """
+        missing: Dict[Type[Document], set] = {}
+        for link in links:
+            key = (link.document_class, link.ref.id)
+            if key not in self._loaded:
+                missing.setdefault(link.document_class, set()).add(link.ref.id)
+
+        for document_class, ids in missing.items():
+            for document in await document_class.find(In(document_class.id, list(ids))).to_list():
+                self._loaded[(document_class, document.id)] = document
+            for _id in ids:
+                self._loaded.setdefault((document_class, _id), None)
+
+        return self._loaded
+
+
+def _dump_linked(value: Any, loaded: Dict[Tuple[Type[Document], ObjectId], Optional[Document]]) -> Any:
+    if isinstance(value, list):
+        return [_dump_linked(item, loaded) for item in value]
+    if not isinstance(value, Link):
+        return value
+
+    document = loaded.get((value.document_class, value.ref.id))
+    if document is None:
+        return value.to_dict()
+    schema = PUBLIC_SCHEMAS.get(type(document))
+    if schema is not None:
+        return schema.model_validate(document, from_attributes=True).model_dump(mode="json")
+    return document.model_dump(mode="json", by_alias=True)
+
+
+class Expansion:
+    """
+    How a request asked for its documents to be shaped: the link fields to expand and the sparse field set to return,
+    together with the Mongo projection model the read should use and the request's LinkLoader.
+
+    Responses that need no reshaping are encoded with model_response as ``model`` (or the endpoint's response model),
+    straight to JSON bytes.
+    """
+
+    def __init__(self, model: Type[Document], fields: List[str], sparse_fields: Optional[List[str]] = None,
+                 projection: Optional[Type[BaseModel]] = None):
+        self.model = model
+        self.fields = fields
+        self.sparse_fields = sparse_fields
+        self.projection = projection
+        self.loader = LinkLoader()
+
+    @property
+    def reshaped(self) -> bool:
+        """
+        True if the request asked for links to be expanded or for a sparse field set.
+        """
+        return bool(self.fields or self.sparse_fields)
+
+    async def dump(self, documents: List[Document], response_model: Optional[Type[BaseModel]] = None) -> List[dict]:
+        """
+        Dump documents to JSON-ready dicts with the requested link fields replaced by the linked documents.
+
+        :param documents: The documents to dump.
+        :param response_model: Optional model each document is converted to before dumping, e.g. TaskOut.
+        :return: The dumped documents.
+        """
+        include = set(self.sparse_fields) | set(self.fields) if self.sparse_fields else None
+        if include is not None:
+            # the projected documents only hold the sparse fields, which the response model may not accept
+            response_model = None
+
+        links = []
+        for document in documents:
+            for field in self.fields:
+                value = getattr(document, field, None)
+                links.extend(item for item in (value if isinstance(value, list) else [value]) if isinstance(item, Link))
+        loaded = await self.loader.load(links)
+
+        dumped = []
+        for document in documents:
+            source = response_model.model_validate(document, from_attributes=True) if response_model else document
+            data = source.model_dump(mode="json", by_alias=True, include=include)
+            for field in self.fields:
+                if field in data:
+                    data[field] = _dump_linked(getattr(source, field), loaded)
+            dumped.append(data)
+        return dumped
+
+    async def page(self, page: Page, response_model: Optional[Type[BaseModel]] = None) -> Any:
+        """
+        Return a JSON response of ``page`` as a Page of ``response_model`` (the document model by default), or of the
+        expanded or sparse page.
+        """
+        if not self.reshaped:
+            return model_response(Page[response_model or self.model], page)
+        items = await self.dump(page.items, response_model)
+        return FastJSONResponse({"items": items, "next_cursor": page.next_cursor})
+
+    async def one(self, document: Optional[Document], response_model: Optional[Type[BaseModel]] = None) -> Any:
+        """
+        Return a JSON response of ``document`` as ``response_model`` (the document model by default), or of the
+        expanded or sparse document. A missing document is returned as is.
+        """
+        if document is None:
+            return document
+        if not self.reshaped:
+            return model_response(response_model or self.model, document)
+        return FastJSONResponse((await self.dump([document], response_model))[0])
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip())) if value else []
+
+
+def expand_query(model: Type[Document], response_model: Optional[Type[BaseModel]] = None) -> Callable[..., Expansion]:
+    """
+    Build a dependency that parses the ``expand`` and ``fields`` query parameters for responses made of ``model``
+    documents.
+
+    The read is projected down to the requested ``fields`` or, when none are given and the endpoint responds with a
+    narrower ``response_model``, to that model's fields. Links the response model does not carry cannot be expanded
+    and are answered with 422.
+
+    :param model: The document model being read.
+    :param response_model: The endpoint's response model, if it is not ``model`` itself.
+    :return: A FastAPI dependency returning the request's Expansion.
+    """
+    # only links the response carries can be expanded; asking for any other is an error, not silently ignored
+    response_fields = (response_model or model).model_fields
+    allowed = {name: field for name, field in EXPANSIONS[model].items() if field in response_fields}
+    selectable = [name for name in (response_model or model).model_fields if name in model.model_fields]
+    default_projection = None
+    if response_model is not None:
+        default_projection = projection_model(model, tuple(dict.fromkeys(ALWAYS_PROJECTED[model] + tuple(selectable))))
+
+    def dependency(
+            expand: Optional[str] = Query(None, description=f"Comma separated links to resolve: {', '.join(allowed)}"),
+            fields: Optional[str] = Query(None,
+                                          description=f"Comma separated fields to return: {', '.join(selectable)}")
+    ) -> Expansion:
+        names = _split(expand)
+        unknown = sorted(set(names) - set(allowed))
+        if unknown:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                detail=f"Cannot expand: {', '.join(unknown)}")
+
+        sparse_fields = _split(fields)
+        unknown = sorted(set(sparse_fields) - set(selectable))
+        if unknown:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                detail=f"Unknown fields: {', '.join(unknown)}")
+
+        expanded = [allowed[name] for name in names]
+        if not sparse_fields:
+            return Expansion(model, expanded, projection=default_projection)
+
+        # sorted, so every ordering of the same fields shares one cached projection model
+        always = ALWAYS_PROJECTED[model]
+        projected = always + tuple(sorted((set(sparse_fields) | set(expanded)) - set(always)))
+        return Expansion(model, expanded, sparse_fields, projection_model(model, projected))
+
+    return dependency
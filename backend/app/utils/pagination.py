@@ -0,0 +1,94 @@
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+import pymongo
+from beanie.odm.queries.find import FindMany
+from beanie.odm.utils.parsing import parse_obj
+from beanie.odm.utils.projection import get_projection
+from bson import json_util
+from bson.errors import InvalidBSON
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+from app.core.database import list_collection
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """
+    Encode the sort key of the last document of a page into an opaque cursor.
+
+    :param values: The sort field values, keyed by Mongo field name.
+    :return: A URL-safe cursor string.
+    """
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort_fields: Sequence[str]) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    :param cursor: The cursor string sent by the client.
+    :param sort_fields: The sort fields the cursor must contain.
+    :return: The sort field values, keyed by Mongo field name.
+    :raises HTTPException: 400 if the cursor is malformed or was issued for a different sort.
+    """
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError, InvalidBSON):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if not isinstance(values, dict) or set(values) != set(sort_fields):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def keyset_filter(values: Dict[str, Any], sort_fields: Sequence[str]) -> Dict[str, Any]:
+    """
+    Build the filter matching every document that sorts strictly after ``values`` on ``sort_fields`` (all ascending).
+
+    For ``("due_date", "_id")`` this is ``due_date > d OR (due_date == d AND _id > i)``.
+    """
+    clauses = []
+    for i, field in enumerate(sort_fields):
+        clause = {prefix: values[prefix] for prefix in sort_fields[:i]}
+        clause[field] = {"$gt": values[field]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+async def paginate(query: FindMany, sort_fields: Sequence[str], cursor: Optional[str], limit: int,
+                   projection: Optional[Type[BaseModel]] = None) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of ``query`` using keyset pagination.
+
+    The query is sorted ascending on ``sort_fields``, which must end with a unique field (normally ``_id``) so the
+    order is stable. Each page costs a single indexed range scan regardless of how deep the client has paged. Pages are
+    read with the listing read preference, settings.MONGO_LIST_READ_PREFERENCE.
+
+    :param query: The Beanie find query to paginate.
+    :param sort_fields: The Mongo field names to sort and page on.
+    :param cursor: The cursor returned with the previous page, or None for the first page.
+    :param limit: The maximum number of documents to return.
+    :param projection: Optional projection model; it must include the sort fields.
+    :return: The documents of the page and the cursor of the next page, or None if this is the last page.
+    """
+    query_filter = query.get_filter_query()
+    if cursor:
+        query_filter = {"$and": [query_filter, keyset_filter(decode_cursor(cursor, sort_fields), sort_fields)]}
+
+    found = list_collection(query.document_model).find(
+        query_filter,
+        projection=get_projection(projection) if projection is not None else None,
+        sort=[(field, pymongo.ASCENDING) for field in sort_fields],
+        limit=limit + 1
+    )
+    model = projection or query.document_model
+    documents = [parse_obj(model, raw) async for raw in found]
+    if len(documents) <= limit:
+        return documents, None
+
+    documents = documents[:limit]
+    last = documents[-1]
+    next_cursor = encode_cursor({field: getattr(last, "id" if field == "_id" else field) for field in sort_fields})
+    return documents, next_cursor
@@ -0,0 +1,134 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Type
+
+from beanie import Document
+from beanie.operators import In
+from fastapi import Header, HTTPException, Query, Request, Response, status
+
+
+def version_etag(version: int) -> str:
+    """
+    Return the ETag of a document version, e.g. ``"3"``.
+    """
+    return f'"{version}"'
+
+
+def listing_etag(removals: int, last_modified: Optional[datetime], *variant: object) -> str:
+    """
+    Return the ETag of a listing from the number of documents that ever left it and the latest updated_at of those in
+    it.
+
+    Adding or updating a document moves the latest updated_at and removing one changes the removal count, so the tag
+    changes whenever the listing does. ``variant`` holds whatever else selects the representation, e.g. the page
+    cursor and limit.
+    """
+    parts = [str(removals), last_modified.isoformat() if last_modified else "", *(str(part) for part in variant)]
+    return f'"{hashlib.sha1("|".join(parts).encode()).hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    """
+    Return a naive UTC datetime, as Mongo stores them, in the HTTP date format of Last-Modified.
+    """
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    """
+    Return the ETag and, if known, Last-Modified headers of a response, with Cache-Control telling clients to
+    revalidate before reusing it.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Return True if the client's cached copy, named by If-None-Match or else If-Modified-Since, is still current.
+
+    If-None-Match uses the weak comparison GET requests call for; If-Modified-Since has a resolution of one second.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {_opaque_tag(tag) for tag in if_none_match.split(",")}
+        return "*" in tags or _opaque_tag(etag) in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def is_conditional(request: Request) -> bool:
+    """
+    Return True if the request carries If-None-Match or If-Modified-Since.
+    """
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """
+    Return an empty 304 Not Modified response carrying the current validators.
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, last_modified))
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """
+    Return the document version an If-Match header asks for.
+
+    :param if_match: The header value: an ETag from version_etag, optionally weak, or ``*``.
+    :return: The version, or None if the header is missing or ``*``.
+    :raises HTTPException: 412 if the header does not name a version.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Invalid If-Match header")
+
+
+def expected_version(
+        if_match: Optional[str] = Header(None, description="ETag of the version being updated"),
+        version: Optional[int] = Query(None, description="Version being updated, if If-Match is not sent")
+) -> Optional[int]:
+    """
+    FastAPI dependency returning the version an update is conditional on, from If-Match or the version parameter.
+    """
+    expected = parse_if_match(if_match)
+    return expected if expected is not None else version
+
+
+def version_condition(model: Type[Document], version: int):
+    """
+    Return a query condition matching documents of ``model`` at ``version``.
+
+    Documents written before versioning have no version field and count as version 0.
+    """
+    if version == 0:
+        return In(model.version, [0, None])
+    return model.version == version
+
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED,
+                         detail="The resource was modified, reload it and retry")
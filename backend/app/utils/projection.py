@@ -0,0 +1,28 @@
+from functools import lru_cache
+from typing import Optional, Tuple, Type
+
+from pydantic import BaseModel, ConfigDict, Field, create_model
+
+
+# bounded, as ?fields= lets clients ask for any subset of fields; module-level models keep their own reference
+@lru_cache(maxsize=256)
+def projection_model(document_model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Build (once per field set) a Beanie projection model holding only ``fields`` of ``document_model``.
+
+    Passing the result to ``FindMany.project`` makes Mongo return just those fields, so the rest of the document is
+    never sent over the wire, decoded or validated. Every field is optional on the projection model.
+
+    :param document_model: The document model to project.
+    :param fields: The field names to keep.
+    :return: The projection model.
+    """
+    definitions = {}
+    for name in fields:
+        field = document_model.model_fields[name]
+        definitions[name] = (Optional[field.annotation], Field(None, alias=field.alias))
+    return create_model(
+        f"{document_model.__name__}Projection",
+        __config__=ConfigDict(populate_by_name=True, arbitrary_types_allowed=True),
+        **definitions
+    )
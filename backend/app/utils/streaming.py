@@ -0,0 +1,96 @@
+from typing import AsyncIterator, Optional, Sequence, Type
+
+import pymongo
+from beanie import Document
+from beanie.odm.queries.find import FindMany
+from beanie.odm.utils.parsing import parse_obj
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.database import list_collection
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+# a comment line, ignored by clients, keeping idle connections open through proxies
+SSE_HEARTBEAT = b": keep-alive\n\n"
+
+
+def wants_ndjson(request: Request) -> bool:
+    """
+    Return True if the client asked for a streamed NDJSON listing through its Accept header.
+
+    :param request: The incoming request.
+    """
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def iterate_documents(query: FindMany, sort_fields: Sequence[str],
+                            batch_size: int = settings.STREAM_BATCH_SIZE) -> AsyncIterator[Document]:
+    """
+    Iterate every document matched by ``query`` straight off the Motor cursor.
+
+    Documents are decoded one at a time as batches of ``batch_size`` arrive, so memory stays flat regardless of the
+    number of matches. The listing read preference, settings.MONGO_LIST_READ_PREFERENCE, applies.
+
+    :param query: The Beanie find query to iterate.
+    :param sort_fields: The Mongo field names to sort on, ascending.
+    :param batch_size: The number of documents requested per round trip.
+    """
+    document_model = query.document_model
+    cursor = list_collection(document_model).find(
+        query.get_filter_query(),
+        sort=[(field, pymongo.ASCENDING) for field in sort_fields],
+        batch_size=batch_size
+    )
+    async for raw in cursor:
+        yield parse_obj(document_model, raw)
+
+
+async def _encode_ndjson(documents: AsyncIterator[Document],
+                         response_model: Optional[Type[BaseModel]]) -> AsyncIterator[bytes]:
+    async for document in documents:
+        if response_model is not None:
+            document = response_model.model_validate(document, from_attributes=True)
+        yield document.model_dump_json().encode() + b"\n"
+
+
+def ndjson_response(documents: AsyncIterator[Document],
+                    response_model: Optional[Type[BaseModel]] = None) -> StreamingResponse:
+    """
+    Stream documents to the client as newline-delimited JSON, one line per document.
+
+    :param documents: The documents to send, usually from iterate_documents.
+    :param response_model: Optional model each document is converted to before encoding, e.g. TaskOut.
+    :return: The streaming response.
+    """
+    return StreamingResponse(_encode_ndjson(documents, response_model), media_type=NDJSON_MEDIA_TYPE)
+
+
+def sse_event(data: bytes, event: Optional[str] = None, event_id: Optional[str] = None) -> bytes:
+    """
+    Encode one server-sent event. ``data`` must not contain newlines, which compact JSON never does.
+
+    :param data: The event data, e.g. a model dumped to JSON.
+    :param event: The event type, "message" on the client if omitted.
+    :param event_id: The event id, sent back by the client as Last-Event-ID when it reconnects.
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(b"id: " + event_id.encode())
+    if event is not None:
+        lines.append(b"event: " + event.encode())
+    lines.append(b"data: " + data)
+    return b"\n".join(lines) + b"\n\n"
+
+
+def sse_response(events: AsyncIterator[bytes]) -> StreamingResponse:
+    """
+    Stream server-sent events, encoded with sse_event, to the client.
+
+    :param events: The encoded events.
+    :return: The streaming response, with proxy buffering turned off.
+    """
+    return StreamingResponse(events, media_type=SSE_MEDIA_TYPE,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
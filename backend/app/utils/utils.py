@@ -15,6 +15,8 @@ def validate_uuid(id: UUID):
     :param id: The task ID to be validated.
     :raises ValueError: If an invalid task_id is provided.
     """
+    if isinstance(id, UUID):
+        return
     try:
         uuid.UUID(id)
     except ValueError:
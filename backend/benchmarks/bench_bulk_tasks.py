@@ -0,0 +1,104 @@
+"""
+Cost of changing a sprint of tasks: one TaskService call per task vs. the bulk methods.
+
+Seeds a scratch database with a creator, two assignees and ``--tasks`` tasks, then times, ``--repeat`` times each:
+
+* single: ``TaskService.create_task`` / ``update_task`` / ``delete_task`` once per task, as the per-task endpoints do;
+* bulk: ``TaskService.bulk_create_tasks`` / ``bulk_update_tasks`` / ``bulk_delete_tasks`` once for all tasks.
+
+Updates move every task to the other assignee and a new status. The figures exclude HTTP and auth overhead, which
+the single path pays once per task on top of this.
+
+Run from the backend directory against a local mongod (BENCH_MONGO_URI overrides the address)::
+
+    python -m benchmarks.bench_bulk_tasks --tasks 200
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import common
+from app.core.indexes import INDEXED_MODELS
+from app.models.task_model import StatusEnum, Task
+from app.models.user_model import User
+from app.schemas.task_schema import TaskCreate, TaskUpdate
+from app.services.task_service import TaskService
+
+DATABASE = "kakari_bench_bulk_tasks"
+
+
+async def timed(repeat: int, setup, func) -> list:
+    latencies = []
+    for _ in range(repeat):
+        state = await setup()
+        started = time.perf_counter()
+        await func(state)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def main(task_count: int, repeat: int) -> None:
+    client = AsyncIOMotorClient(common.bench_mongo_uri(), uuidRepresentation="standard")
+    await client.drop_database(DATABASE)
+    await init_beanie(database=client[DATABASE], document_models=INDEXED_MODELS)
+
+    creator, first, second = [await User(email=f"{name}@example.com", hashed_password="x", roles=["admin"]).insert()
+                               for name in ("creator", "first", "second")]
+    now = datetime.utcnow()
+    payloads = [{"title": f"task {i}", "description": "benchmark task", "due_date": now + timedelta(hours=i),
+                 "task_assignee": {"id": str(first.id), "collection": "users"}} for i in range(task_count)]
+    moves = [{"task_assignee": {"id": str(second.id), "collection": "users"}, "status": StatusEnum.UNDER_PROCESS}
+             for _ in range(task_count)]
+
+    async def fresh():
+        await Task.find_all().delete()
+        return []
+
+    async def seeded():
+        await fresh()
+        await TaskService.bulk_create_tasks(creator, payloads)
+        return [task.task_id for task in await Task.find_all().to_list()]
+
+    async def single_create(_):
+        for payload in payloads:
+            await TaskService.create_task(user=creator, data=TaskCreate.model_validate(payload))
+
+    async def bulk_create(_):
+        await TaskService.bulk_create_tasks(creator, payloads)
+
+    async def single_update(task_ids):
+        for task_id, move in zip(task_ids, moves):
+            await TaskService.update_task(task_id=task_id, data=TaskUpdate.model_validate(move),
+                                          current_user=creator)
+
+    async def bulk_update(task_ids):
+        await TaskService.bulk_update_tasks(creator, [{"task_id": str(task_id), **move}
+                                                      for task_id, move in zip(task_ids, moves)])
+
+    async def single_delete(task_ids):
+        for task_id in task_ids:
+            await TaskService.delete_task(task_id=task_id)
+
+    async def bulk_delete(task_ids):
+        await TaskService.bulk_delete_tasks([str(task_id) for task_id in task_ids])
+
+    print(f"{task_count} tasks per operation")
+    common.print_summary("create, single", await timed(repeat, fresh, single_create))
+    common.print_summary("create, bulk", await timed(repeat, fresh, bulk_create))
+    common.print_summary("update, single", await timed(repeat, seeded, single_update))
+    common.print_summary("update, bulk", await timed(repeat, seeded, bulk_update))
+    common.print_summary("delete, single", await timed(repeat, seeded, single_delete))
+    common.print_summary("delete, bulk", await timed(repeat, seeded, bulk_delete))
+    await client.drop_database(DATABASE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.repeat))
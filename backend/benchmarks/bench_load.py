@@ -0,0 +1,321 @@
+"""
+HTTP load test of the API with mixed traffic, with a regression check against a stored baseline.
+
+Seeds a scratch database with ``--users`` users, ``--projects`` projects, ``--tasks`` tasks and ``--comments``
+comments, starts the API under uvicorn against it (or targets ``--url``), then runs ``--concurrency`` simulated users
+for ``--duration`` seconds. Each one logs in and then loops over a weighted mix of requests:
+
+* ``/user/me``;
+* the task listings: created by, assigned to, overdue (all and per assignee), due on a date (all and per assignee)
+  and a single task;
+* project reads: a project and the first page of its tasks;
+* a new login now and then.
+
+Throughput and p50/p95/p99 latency are reported per route template. ``--save-baseline`` stores them as JSON;
+``--baseline`` compares a run to a stored one and exits with status 1 if the ``--metric`` latency of any route grew
+by more than ``--threshold`` (a fraction, 0.2 = 20%) and by more than ``--min-regression-ms``.
+
+Needs httpx (``pip install httpx``). Run from the backend directory against a local mongod (BENCH_MONGO_URI
+overrides the address)::
+
+    python -m benchmarks.bench_load --tasks 100000 --save-baseline load_baseline.json
+    python -m benchmarks.bench_load --tasks 100000 --baseline load_baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import httpx
+from beanie import init_beanie
+from bson import DBRef, ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import common
+from app.core.indexes import INDEXED_MODELS
+from app.core.security import get_password
+from app.models.project_model import Project
+from app.models.task_comment_model import TaskComment
+from app.models.task_model import StatusEnum, Task
+from app.models.user_model import User
+
+DATABASE = "kakari_bench_load"
+PASSWORD = "benchmark-password"
+API = "/api/v1"
+CHUNK = 10000
+MEMBERS_PER_PROJECT = 5
+
+
+class Dataset:
+    """
+    The ids of the seeded documents the traffic picks from.
+    """
+
+    def __init__(self, emails: List[str], user_ids: List[UUID], project_ids: List[UUID], task_ids: List[UUID],
+                 due_dates: List[datetime]):
+        self.emails = emails
+        self.user_ids = user_ids
+        self.project_ids = project_ids
+        self.task_ids = task_ids
+        self.due_dates = due_dates
+
+
+async def seed(user_count: int, project_count: int, task_count: int, comment_count: int,
+               rng: random.Random) -> Dataset:
+    # every user shares one password, so seeding hashes it once
+    hashed_password = await get_password(PASSWORD)
+    users = [User(id=ObjectId(), email=f"user{i}@bench.kakari.dev", hashed_password=hashed_password,
+                  full_name=f"User {i}", activated=True) for i in range(user_count)]
+    for start in range(0, user_count, CHUNK):
+        await User.insert_many(users[start:start + CHUNK])
+
+    projects = []
+    for i in range(project_count):
+        members = rng.sample(users, min(MEMBERS_PER_PROJECT, user_count))
+        projects.append(Project(project_name=f"project {i}", description="benchmark project",
+                                project_owner=DBRef("users", members[0].id),
+                                project_members=[DBRef("users", member.id) for member in members]))
+    for start in range(0, project_count, CHUNK):
+        await Project.insert_many(projects[start:start + CHUNK])
+
+    comment_links: Dict[int, List[DBRef]] = defaultdict(list)
+    for start in range(0, comment_count, CHUNK):
+        comments = [TaskComment(id=ObjectId(), content=f"comment {i}",
+                                author=DBRef("users", rng.choice(users).id))
+                    for i in range(start, min(start + CHUNK, comment_count))]
+        await TaskComment.insert_many(comments)
+        for comment in comments:
+            comment_links[rng.randrange(task_count)].append(DBRef("task_comments", comment.id))
+
+    # due dates spread over two months around now, so overdue and due soon tasks both exist
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    task_ids, due_dates = [], []
+    for start in range(0, task_count, CHUNK):
+        tasks = []
+        for i in range(start, min(start + CHUNK, task_count)):
+            creator, assignee = rng.choice(users), rng.choice(users)
+            status = rng.choice(list(StatusEnum))
+            tasks.append(Task(
+                title=f"task {i}", description="benchmark task", status=status,
+                complete=status == StatusEnum.COMPLETED,
+                due_date=today + timedelta(days=rng.randint(-30, 30), minutes=rng.randrange(24 * 60)),
+                task_creator=DBRef("users", creator.id), task_creator_id=creator.user_id,
+                task_assignee=DBRef("users", assignee.id), task_assignee_id=assignee.user_id,
+                project_id=rng.choice(projects).project_id if projects else None, comments=comment_links.get(i, [])))
+        await Task.insert_many(tasks)
+        task_ids.extend(task.task_id for task in tasks)
+        due_dates.extend(task.due_date.replace(hour=0, minute=0) for task in tasks)
+
+    return Dataset(emails=[user.email for user in users], user_ids=[user.user_id for user in users],
+                   project_ids=[project.project_id for project in projects], task_ids=task_ids, due_dates=due_dates)
+
+
+def request_mix(data: Dataset, user_id: UUID, rng: random.Random) -> List[Tuple[int, str, Callable[[], str]]]:
+    """
+    Return the weighted requests of the traffic mix as (weight, route template, path factory) tuples.
+    """
+    def due_date() -> str:
+        return rng.choice(data.due_dates).isoformat()
+
+    mix = [
+        (10, "/user/me", lambda: "/user/me"),
+        (10, "/task/created/{user_id}", lambda: f"/task/created/{user_id}"),
+        (15, "/task/assigned/{user_id}", lambda: f"/task/assigned/{user_id}"),
+        (5, "/task/overdue", lambda: "/task/overdue"),
+        (10, "/task/overdue/{assignee_id}", lambda: f"/task/overdue/{user_id}"),
+        (5, "/task/due/{date}", lambda: f"/task/due/{due_date()}"),
+        (10, "/task/due/{date}/{assignee_id}", lambda: f"/task/due/{due_date()}/{user_id}"),
+        (10, "/task/tasks/{task_id}", lambda: f"/task/tasks/{rng.choice(data.task_ids)}"),
+    ]
+    if data.project_ids:
+        mix += [
+            (8, "/project/{project_id}", lambda: f"/project/{rng.choice(data.project_ids)}"),
+            (7, "/project/tasks/{project_id}", lambda: f"/project/tasks/{rng.choice(data.project_ids)}"),
+        ]
+    return mix
+
+
+class Recorder:
+    """
+    Latencies in milliseconds and failed requests, per route template.
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def timed(self, route: str, request) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.errors[route] += 1
+            return None
+        self.latencies[route].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[route] += 1
+        return response
+
+
+async def login(client: httpx.AsyncClient, recorder: Recorder, email: str) -> Optional[str]:
+    response = await recorder.timed("/auth/login", client.post(f"{API}/auth/login",
+                                                               data={"username": email, "password": PASSWORD}))
+    if response is None or response.status_code != 200:
+        return None
+    return response.json()["access_token"]
+
+
+async def simulated_user(client: httpx.AsyncClient, recorder: Recorder, data: Dataset, deadline: float,
+                         login_weight: int, seed_value: int) -> None:
+    rng = random.Random(seed_value)
+    index = rng.randrange(len(data.emails))
+    token = await login(client, recorder, data.emails[index])
+    mix = request_mix(data, data.user_ids[index], rng)
+    weights = [weight for weight, _, _ in mix] + [login_weight]
+    while time.perf_counter() < deadline:
+        choice = rng.choices(range(len(weights)), weights=weights)[0]
+        if choice == len(mix):
+            token = await login(client, recorder, data.emails[index]) or token
+            continue
+        _, route, path = mix[choice]
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        await recorder.timed(route, client.get(API + path(), headers=headers))
+
+
+def report(recorder: Recorder, duration: float) -> Dict[str, Dict[str, float]]:
+    results = {}
+    print(f"{'route':<34} {'requests':>8} {'errors':>7} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for route in sorted(recorder.latencies.keys() | recorder.errors.keys()):
+        latencies = recorder.latencies.get(route, [])
+        stats = common.summarize(latencies)
+        results[route] = {"requests": len(latencies), "errors": recorder.errors.get(route, 0),
+                          "rps": len(latencies) / duration, "p50": stats["p50"], "p95": stats["p95"],
+                          "p99": stats["p99"]}
+        row = results[route]
+        print(f"{route:<34} {row['requests']:>8} {row['errors']:>7} {row['rps']:>8.1f} {row['p50']:>7.2f}ms "
+              f"{row['p95']:>7.2f}ms {row['p99']:>7.2f}ms")
+    total = sum(row["requests"] for row in results.values())
+    print(f"total: {total} requests, {total / duration:.1f} req/s, "
+          f"{sum(row['errors'] for row in results.values())} errors")
+    return results
+
+
+def regressions(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], metric: str,
+                threshold: float, min_regression_ms: float) -> List[str]:
+    """
+    Return a line per route whose ``metric`` latency grew past the baseline by more than ``threshold`` and
+    ``min_regression_ms``, or that has errors the baseline did not.
+    """
+    found = []
+    for route, before in sorted(baseline.items()):
+        after = results.get(route)
+        if after is None:
+            found.append(f"{route}: no requests in this run")
+            continue
+        growth = after[metric] - before[metric]
+        if growth > min_regression_ms and after[metric] > before[metric] * (1 + threshold):
+            found.append(f"{route}: {metric} {before[metric]:.2f}ms -> {after[metric]:.2f}ms")
+        if after["errors"] and not before["errors"]:
+            found.append(f"{route}: {after['errors']} errors, none in the baseline")
+    return found
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = dict(os.environ, MONGO_URI=common.bench_mongo_uri(), MONGO_DATABASE=DATABASE, MONGO_SERVER_API_VERSION="",
+               DEFER_INDEX_BUILDS="false", REMINDERS_ENABLED="false")
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "app.app:app", "--port", str(port), "--no-access-log"],
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/readyz")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.1)
+    raise TimeoutError(f"The API was not ready after {timeout} seconds")
+
+
+async def main(args) -> int:
+    rng = random.Random(args.seed)
+    mongo = AsyncIOMotorClient(common.bench_mongo_uri())
+    await mongo.drop_database(DATABASE)
+    await init_beanie(database=mongo[DATABASE], document_models=INDEXED_MODELS)
+    started = time.perf_counter()
+    data = await seed(args.users, args.projects, args.tasks, args.comments, rng)
+    print(f"seeded {args.users} users, {args.projects} projects, {args.tasks} tasks and {args.comments} comments "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    server = None if args.url else start_server(args.port)
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+            await wait_ready(client, args.ready_timeout)
+            if args.warmup:
+                await asyncio.gather(*(simulated_user(client, Recorder(), data, time.perf_counter() + args.warmup,
+                                                      args.login_weight, rng.randrange(2 ** 32))
+                                       for _ in range(args.concurrency)))
+            recorder = Recorder()
+            deadline = time.perf_counter() + args.duration
+            await asyncio.gather(*(simulated_user(client, recorder, data, deadline, args.login_weight,
+                                                  rng.randrange(2 ** 32))
+                                   for _ in range(args.concurrency)))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if not args.keep_data:
+            await mongo.drop_database(DATABASE)
+
+    results = report(recorder, args.duration)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.metric, args.threshold, args.min_regression_ms)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            return 1
+        print(f"no regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--comments", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    # logins cost a bcrypt verification, so they are a small share of the mix
+    parser.add_argument("--login-weight", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", help="Load an API that is already running instead of starting one; it must use "
+                                      f"the {DATABASE} database")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--ready-timeout", type=float, default=600.0)
+    parser.add_argument("--keep-data", action="store_true", help="Do not drop the seeded database afterwards")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--save-baseline", help="Where to write this run's results as JSON")
+    parser.add_argument("--metric", choices=("p50", "p95", "p99"), default="p95")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--min-regression-ms", type=float, default=1.0)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,101 @@
+"""
+Overhead of the metrics instrumentation: MetricsMiddleware per request, CommandMetrics per Mongo command, and
+rendering /metrics.
+
+Requests are driven straight through the ASGI interface of a small FastAPI app with one templated route, with and
+without MetricsMiddleware, so the difference is the middleware alone. No database or network is involved.
+
+Run from the backend directory::
+
+    python -m benchmarks.bench_metrics_overhead --requests 20000
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+
+from benchmarks import common
+from app.core.metrics import CommandMetrics, MetricsMiddleware, registry
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"item_id": item_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def call(app, path: str) -> None:
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": [],
+             "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80)}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def time_requests(app, count: int) -> list:
+    latencies = []
+    for i in range(count):
+        started = time.perf_counter()
+        await call(app, f"/items/{i}")
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return latencies
+
+
+def time_commands(count: int) -> list:
+    listener = CommandMetrics()
+    latencies = []
+    for i in range(count):
+        started_event = SimpleNamespace(request_id=i, connection_id=("localhost", 27017), command_name="find",
+                                        command={"find": "tasks", "filter": {}})
+        succeeded_event = SimpleNamespace(request_id=i, connection_id=("localhost", 27017), command_name="find",
+                                          duration_micros=1500)
+        started = time.perf_counter()
+        listener.started(started_event)
+        listener.succeeded(succeeded_event)
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return latencies
+
+
+async def main(request_count: int, command_count: int) -> None:
+    plain, instrumented = build_app(False), build_app(True)
+    # warm up routing and validation caches before timing
+    await time_requests(plain, 1000)
+    await time_requests(instrumented, 1000)
+
+    bare = await time_requests(plain, request_count)
+    metered = await time_requests(instrumented, request_count)
+    common.print_summary("request, no middleware", bare, unit="us")
+    common.print_summary("request, MetricsMiddleware", metered, unit="us")
+    overhead = common.summarize(metered)["p50"] - common.summarize(bare)["p50"]
+    print(f"middleware overhead at p50: {overhead:.2f}us")
+
+    common.print_summary("Mongo command started+succeeded", time_commands(command_count), unit="us")
+
+    renders = []
+    for _ in range(100):
+        started = time.perf_counter()
+        registry.render()
+        renders.append((time.perf_counter() - started) * 1000)
+    common.print_summary("render /metrics", renders)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--commands", type=int, default=100000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.commands))
@@ -0,0 +1,124 @@
+"""
+How overdue queries scale with closed history: the open_* partial indexes vs. the full due_date indexes.
+
+Seeds a scratch database with ``--closed`` completed tasks and ``--open`` open tasks, all past their due date and
+spread over ``--assignees`` assignees, then times the first page of
+
+* ``TaskService.list_all_overdue_tasks`` and ``TaskService.list_overdue_tasks_by_assignee``, which the planner
+  answers from the open_* partial indexes;
+* the same queries hinted onto the full due_date / assignee_id_due_date indexes, which is what open-only overdue
+  queries cost without the partial indexes: every closed task past its due date is read and filtered out.
+
+It also prints the keys and documents each plan examines and the size of every index.
+
+Run from the backend directory against a local mongod (BENCH_MONGO_URI overrides the address)::
+
+    python -m benchmarks.bench_overdue_tasks --closed 2000000 --open 5000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from beanie import init_beanie
+from bson import Binary, DBRef, ObjectId, UuidRepresentation
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import common
+from app.core.indexes import INDEXED_MODELS
+from app.models.task_model import Task
+from app.services.task_service import OPEN_TASK, TASK_SORT, TaskService
+
+DATABASE = "kakari_bench_overdue_tasks"
+CHUNK = 10000
+
+
+def _uuid(value):
+    return Binary.from_uuid(value, UuidRepresentation.STANDARD)
+
+
+async def seed(database, closed: int, open_: int, assignee_count: int):
+    assignees = [uuid4() for _ in range(assignee_count)]
+    creator = DBRef("users", ObjectId())
+    now = datetime.utcnow()
+
+    def task(i: int, complete: bool) -> dict:
+        return {
+            "task_id": _uuid(uuid4()), "title": f"task {i}", "description": "benchmark task",
+            "complete": complete, "status": "Completed" if complete else "Not Started",
+            "created_at": now, "updated_at": now, "due_date": now - timedelta(minutes=i + 1),
+            "task_creator": creator, "task_creator_id": None, "task_assignee_id": _uuid(assignees[i % assignee_count]),
+            "project_id": None, "comments": [],
+        }
+
+    # raw inserts, building millions of Task models would dominate the run
+    for complete, count in ((True, closed), (False, open_)):
+        for start in range(0, count, CHUNK):
+            await database["tasks"].insert_many([task(i, complete) for i in range(start, min(start + CHUNK, count))],
+                                                ordered=False)
+    return assignees[0]
+
+
+async def timed(repeat: int, func) -> list:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def examined(collection, query_filter: dict, hint: str = None) -> str:
+    cursor = collection.find(query_filter).sort([(field, 1) for field in TASK_SORT]).limit(51)
+    if hint:
+        cursor = cursor.hint(hint)
+    stats = (await cursor.explain())["executionStats"]
+    return f"keys={stats['totalKeysExamined']} docs={stats['totalDocsExamined']}"
+
+
+async def main(closed: int, open_: int, assignee_count: int, repeat: int) -> None:
+    client = AsyncIOMotorClient(common.bench_mongo_uri(), uuidRepresentation="standard")
+    await client.drop_database(DATABASE)
+    database = client[DATABASE]
+    await init_beanie(database=database, document_models=INDEXED_MODELS)
+    assignee_id = await seed(database, closed, open_, assignee_count)
+    collection = database["tasks"]
+    now = datetime.utcnow()
+
+    all_filter = Task.find(*OPEN_TASK, Task.due_date < now).get_filter_query()
+    assignee_filter = Task.find(*OPEN_TASK, Task.task_assignee_id == assignee_id, Task.due_date < now) \
+        .get_filter_query()
+
+    async def full_index(query_filter: dict, hint: str):
+        await collection.find(query_filter).sort([(field, 1) for field in TASK_SORT]).hint(hint).limit(51) \
+            .to_list(None)
+
+    print(f"{closed} closed and {open_} open overdue tasks over {assignee_count} assignees")
+    common.print_summary("all overdue, open_due_date", await timed(repeat, TaskService.list_all_overdue_tasks))
+    common.print_summary("all overdue, due_date",
+                         await timed(repeat, lambda: full_index(all_filter, "due_date")))
+    common.print_summary("assignee overdue, open_assignee_id_due_date",
+                         await timed(repeat, lambda: TaskService.list_overdue_tasks_by_assignee(assignee_id)))
+    common.print_summary("assignee overdue, assignee_id_due_date",
+                         await timed(repeat, lambda: full_index(assignee_filter, "assignee_id_due_date")))
+
+    print(f"all overdue plan, partial: {await examined(collection, all_filter)}")
+    print(f"all overdue plan, full:    {await examined(collection, all_filter, 'due_date')}")
+    print(f"assignee plan, partial:    {await examined(collection, assignee_filter)}")
+    print(f"assignee plan, full:       {await examined(collection, assignee_filter, 'assignee_id_due_date')}")
+
+    sizes = (await database.command("collStats", "tasks"))["indexSizes"]
+    for name, size in sorted(sizes.items()):
+        print(f"index {name:<28} {size / 2 ** 20:.1f} MiB")
+    await client.drop_database(DATABASE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--closed", type=int, default=2000000)
+    parser.add_argument("--open", type=int, default=5000)
+    parser.add_argument("--assignees", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.closed, args.open, args.assignees, args.repeat))
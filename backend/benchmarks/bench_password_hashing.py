@@ -0,0 +1,74 @@
+"""
+Latency of unrelated requests while a burst of logins is hashing passwords.
+
+A probe coroutine stands in for an unrelated endpoint: it repeatedly sleeps for a short interval and records how late
+it was woken up, which is exactly the delay any other request on the same event loop would see. The probe runs once
+while the logins call bcrypt inline on the loop (the old behaviour) and once while they go through
+``app.core.security.verify_password`` and its worker pool.
+
+Run from the backend directory::
+
+    python -m benchmarks.bench_password_hashing --logins 200
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import HTTPException
+
+from benchmarks import common
+from app.core import security
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append((time.perf_counter() - started - PROBE_INTERVAL) * 1000)
+
+
+async def inline_login(password: str, hashed: str) -> None:
+    security.password_context.verify(password, hashed)
+    await asyncio.sleep(0)
+
+
+async def pooled_login(password: str, hashed: str) -> None:
+    try:
+        await security.verify_password(password, hashed)
+    except HTTPException:
+        # shed by the admission limit, which is the behaviour under test
+        pass
+
+
+async def run(login, logins: int, concurrency: int, hashed: str) -> list:
+    lags = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(stop, lags))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await login("correct horse battery staple", hashed)
+
+    await asyncio.gather(*(one() for _ in range(logins)))
+    stop.set()
+    await probe_task
+    return lags
+
+
+async def main(logins: int, concurrency: int) -> None:
+    hashed = security.password_context.hash("correct horse battery staple")
+
+    common.print_summary("unrelated request lag, inline bcrypt", await run(inline_login, logins, concurrency, hashed))
+    common.print_summary("unrelated request lag, worker pool", await run(pooled_login, logins, concurrency, hashed))
+    security.shutdown_password_executor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency))
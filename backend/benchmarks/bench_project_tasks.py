@@ -0,0 +1,92 @@
+"""
+Cost of reading a large project's tasks: embedded link array vs. indexed Task.project_id pages.
+
+Seeds one project with ``--tasks`` tasks in a scratch database, stored both ways, then times:
+
+* legacy: loading the project document with its embedded ``tasks`` link array, then resolving the links with one
+  ``$in`` query (the best case of what the frontend did one link at a time);
+* paged: ``TaskService.list_tasks_by_project`` reading the first page and a page deep into the project.
+
+Run from the backend directory against a local mongod (BENCH_MONGO_URI overrides the address)::
+
+    python -m benchmarks.bench_project_tasks --tasks 10000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from beanie import init_beanie
+from bson import DBRef, ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import common
+from app.core.indexes import INDEXED_MODELS
+from app.models.task_model import Task
+from app.services.task_service import TaskService
+
+DATABASE = "kakari_bench_project_tasks"
+
+
+async def seed(database, task_count: int):
+    project_id = uuid4()
+    creator = ObjectId()
+    now = datetime.utcnow()
+    tasks = [
+        Task(title=f"task {i}", description="benchmark task", due_date=now + timedelta(minutes=i),
+             task_creator=DBRef("users", creator), project_id=project_id)
+        for i in range(task_count)
+    ]
+    await Task.insert_many(tasks)
+    task_ids = [task["_id"] async for task in database["tasks"].find({}, {"_id": 1})]
+    await database["legacy_projects"].insert_one({
+        "project_name": "legacy", "tasks": [DBRef("tasks", task_id) for task_id in task_ids]
+    })
+    return project_id
+
+
+async def timed(repeat: int, func) -> list:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def main(task_count: int, repeat: int) -> None:
+    client = AsyncIOMotorClient(common.bench_mongo_uri())
+    await client.drop_database(DATABASE)
+    database = client[DATABASE]
+    await init_beanie(database=database, document_models=INDEXED_MODELS)
+    project_id = await seed(database, task_count)
+
+    async def legacy():
+        project = await database["legacy_projects"].find_one({"project_name": "legacy"})
+        await database["tasks"].find({"_id": {"$in": [link.id for link in project["tasks"]]}}).to_list(None)
+
+    async def first_page():
+        await TaskService.list_tasks_by_project(project_id)
+
+    deep_cursor = None
+    page = await TaskService.list_tasks_by_project(project_id)
+    for _ in range(task_count // (2 * len(page.items) or 1)):
+        deep_cursor = page.next_cursor
+        page = await TaskService.list_tasks_by_project(project_id, cursor=deep_cursor)
+
+    async def deep_page():
+        await TaskService.list_tasks_by_project(project_id, cursor=deep_cursor)
+
+    common.print_summary(f"legacy embedded array ({task_count} links)", await timed(repeat, legacy))
+    common.print_summary("project_id first page", await timed(repeat, first_page))
+    common.print_summary("project_id page at the middle", await timed(repeat, deep_page))
+    await client.drop_database(DATABASE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.repeat))
@@ -0,0 +1,92 @@
+"""
+Cost of encoding a large task listing: FastAPI's default response path vs. model_response.
+
+Builds ``--tasks`` Task documents in memory, with assignee, creator and comment links, then times encoding them as a
+Page[Task] and as a Page[TaskOut]:
+
+* default: what FastAPI does for a ``response_model`` endpoint, validating against the response field, dumping to
+  JSON-ready Python values and rendering those with JSONResponse (stdlib json);
+* fast: app.utils.responses.model_response, dumping straight to JSON bytes with a cached TypeAdapter.
+
+Both bodies are checked to be byte for byte identical. Beanie needs a database to initialise against, but no
+documents or indexes are read or written. Run from the backend directory against a local mongod (BENCH_MONGO_URI
+overrides the address)::
+
+    python -m benchmarks.bench_serialization --tasks 10000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from bson import DBRef, ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import common
+from app.core.indexes import INDEXED_MODELS, _DeferredIndexInitializer
+from app.models.task_model import StatusEnum, Task
+from app.schemas.pagination_schema import Page
+from app.schemas.task_schema import TaskOut
+from app.utils.responses import model_response
+
+DATABASE = "kakari_bench_serialization"
+
+
+def build_tasks(task_count: int) -> list:
+    now = datetime.utcnow()
+    users = [ObjectId() for _ in range(100)]
+    return [
+        Task(id=ObjectId(), title=f"task {i} – résumé", description="benchmark task",
+             status=list(StatusEnum)[i % 3], due_date=now + timedelta(minutes=i),
+             task_creator=DBRef("users", users[i % 100]), task_assignee=DBRef("users", users[(i + 1) % 100]),
+             comments=[DBRef("task_comments", ObjectId()) for _ in range(i % 3)])
+        for i in range(task_count)
+    ]
+
+
+async def default_path(response_type, content) -> bytes:
+    field = create_response_field(name="Response_bench", type_=response_type)
+    return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+
+async def timed(repeat: int, func) -> list:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def main(task_count: int, repeat: int) -> None:
+    client = AsyncIOMotorClient(common.bench_mongo_uri())
+    # registers the models without building indexes, so nothing is written to the database
+    await _DeferredIndexInitializer(database=client[DATABASE], document_models=INDEXED_MODELS)
+    page = Page[Task](items=build_tasks(task_count), next_cursor="cursor")
+
+    print(f"{task_count} tasks")
+    for response_type in (Page[Task], Page[TaskOut]):
+        default_body = await default_path(response_type, page)
+        fast_body = model_response(response_type, page).body
+        name = response_type.__name__
+        print(f"{name}: {len(default_body)} bytes, identical bodies: {default_body == fast_body}")
+
+        async def default():
+            await default_path(response_type, page)
+
+        async def fast():
+            model_response(response_type, page)
+
+        common.print_summary(f"{name} default", await timed(repeat, default))
+        common.print_summary(f"{name} model_response", await timed(repeat, fast))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.repeat))
@@ -0,0 +1,106 @@
+"""
+Time from process start to first served request, with index builds deferred to the background vs. done at startup.
+
+Seeds a scratch database with ``--tasks`` tasks, then for each mode and each of ``--repeat`` runs drops the task
+indexes, starts the API under uvicorn (DEFER_INDEX_BUILDS=true or false) and polls
+
+* ``/healthz`` until it answers: time to first served request;
+* ``/readyz`` until it answers 200: time until the database is reachable and every index is built.
+
+Run from the backend directory against a local mongod (BENCH_MONGO_URI overrides the address)::
+
+    python -m benchmarks.bench_startup --tasks 1000000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from bson import Binary, DBRef, ObjectId, UuidRepresentation
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import common
+
+DATABASE = "kakari_bench_startup"
+CHUNK = 10000
+
+
+async def seed(database, task_count: int) -> None:
+    creator = DBRef("users", ObjectId())
+    now = datetime.utcnow()
+    for start in range(0, task_count, CHUNK):
+        await database["tasks"].insert_many([{
+            "task_id": Binary.from_uuid(uuid4(), UuidRepresentation.STANDARD), "title": f"task {i}",
+            "description": "benchmark task", "complete": False, "status": "Not Started", "created_at": now,
+            "updated_at": now, "due_date": now + timedelta(minutes=i), "task_creator": creator, "comments": [],
+            "task_assignee_id": Binary.from_uuid(uuid4(), UuidRepresentation.STANDARD),
+        } for i in range(start, min(start + CHUNK, task_count))], ordered=False)
+
+
+def status_of(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def start_and_time(port: int, defer: bool, ready_timeout: float) -> tuple:
+    env = dict(os.environ, MONGO_URI=common.bench_mongo_uri(), MONGO_DATABASE=DATABASE, MONGO_SERVER_API_VERSION="",
+               DEFER_INDEX_BUILDS=str(defer).lower(), REMINDERS_ENABLED="false")
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.app:app", "--port", str(port)], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first_request = ready = None
+        while time.perf_counter() - started < ready_timeout:
+            if first_request is None and status_of(f"http://127.0.0.1:{port}/healthz") == 200:
+                first_request = time.perf_counter() - started
+            if first_request is not None and status_of(f"http://127.0.0.1:{port}/readyz") == 200:
+                ready = time.perf_counter() - started
+                break
+            time.sleep(0.01)
+        return first_request, ready
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main(task_count: int, repeat: int, port: int, ready_timeout: float) -> None:
+    client = AsyncIOMotorClient(common.bench_mongo_uri())
+    await client.drop_database(DATABASE)
+    database = client[DATABASE]
+    await seed(database, task_count)
+
+    print(f"{task_count} tasks")
+    for defer in (False, True):
+        first_requests, readies = [], []
+        for _ in range(repeat):
+            await database["tasks"].drop_indexes()
+            first_request, ready = await asyncio.to_thread(start_and_time, port, defer, ready_timeout)
+            if first_request is not None:
+                first_requests.append(first_request * 1000)
+            if ready is not None:
+                readies.append(ready * 1000)
+        mode = "deferred" if defer else "at startup"
+        common.print_summary(f"indexes {mode}: first request", first_requests)
+        common.print_summary(f"indexes {mode}: ready", readies)
+    await client.drop_database(DATABASE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ready-timeout", type=float, default=600.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.repeat, args.port, args.ready_timeout))
@@ -0,0 +1,271 @@
+"""
+Delivery latency and completeness of the task change feed at /task/feed, including clients that reconnect.
+
+Seeds a scratch database with ``--users`` users, ``--projects`` projects and ``--tasks`` tasks, starts the API under
+uvicorn against it (or targets ``--url``) and opens ``--subscribers`` feeds, one per user. A writer then updates
+random tasks at ``--rate`` writes per second for ``--duration`` seconds, reassigning ``--reassign`` of them to
+another user, while ``--reconnect`` of the subscribers drop their connection once, stay away for a second and
+reconnect with the id of the last event they received. Subscribers connect the way browsers do, with a token from
+POST /task/feed/token and the last event id in the query string.
+
+Each write must reach every subscriber who is the task's creator or assignee or a member of its project afterwards,
+exactly once; the previous assignee of a reassigned task may receive it too, which needs change stream pre-images
+(MongoDB 6.0+, ``python -m app.migrations.enable_task_pre_images`` and TASK_FEED_PRE_IMAGES=True). Write to delivery
+latency is reported, and the run exits with status 1 if any event was missing, duplicated or sent to a user it should
+not reach.
+
+Change streams need a replica set. A single node is enough::
+
+    mongod --replSet rs0 --dbpath /tmp/kakari-rs0
+    mongosh --eval 'rs.initiate()'
+
+Needs httpx (``pip install httpx``). Run from the backend directory (BENCH_MONGO_URI overrides the address)::
+
+    BENCH_MONGO_URI="mongodb://localhost:27017/?replicaSet=rs0" python -m benchmarks.bench_task_feed
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+import httpx
+from beanie import init_beanie
+from bson import DBRef, ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+
+from benchmarks import common
+from app.core.indexes import INDEXED_MODELS
+from app.core.security import create_access_token
+from app.models.project_model import Project
+from app.models.task_model import Task
+from app.models.user_model import User
+
+DATABASE = "kakari_bench_task_feed"
+API = "/api/v1"
+CHUNK = 10000
+MEMBERS_PER_PROJECT = 5
+
+
+class Feed:
+    """
+    One subscriber's connection to the feed, recording the events it receives.
+    """
+
+    def __init__(self, user_id: UUID):
+        self.user_id = user_id
+        self.token = create_access_token(str(user_id))
+        self.last_event_id: Optional[str] = None
+        self.received: Dict[Tuple[UUID, int], int] = defaultdict(int)
+        self.latencies: List[float] = []
+        self.resets = 0
+        self.connected = asyncio.Event()
+
+    async def run(self, client: httpx.AsyncClient, written: Dict[Tuple[UUID, int], float],
+                  stop: asyncio.Event, drop_at: Optional[float]) -> None:
+        while not stop.is_set():
+            issued = await client.post(f"{API}/task/feed/token", headers={"Authorization": f"Bearer {self.token}"})
+            issued.raise_for_status()
+            params = {"token": issued.json()["token"]}
+            if self.last_event_id is not None:
+                params["last_event_id"] = self.last_event_id
+            async with client.stream("GET", f"{API}/task/feed", params=params) as response:
+                response.raise_for_status()
+                self.connected.set()
+                event: Dict[str, str] = {}
+                async for line in response.aiter_lines():
+                    if line:
+                        field, _, value = line.partition(": ")
+                        event[field] = value
+                        continue
+                    self._receive(event, written)
+                    event = {}
+                    if stop.is_set() or (drop_at is not None and time.perf_counter() >= drop_at):
+                        break
+            if drop_at is not None and not stop.is_set():
+                drop_at = None
+                await asyncio.sleep(1.0)
+
+    def _receive(self, event: Dict[str, str], written: Dict[Tuple[UUID, int], float]) -> None:
+        if "id" in event:
+            self.last_event_id = event["id"]
+        if event.get("event") == "reset":
+            self.resets += 1
+        elif event.get("event") == "task":
+            change = json.loads(event["data"])
+            key = (UUID(change["task_id"]), change["task"]["version"])
+            self.received[key] += 1
+            if key in written:
+                self.latencies.append((time.perf_counter() - written[key]) * 1000)
+
+
+async def seed(user_count: int, project_count: int, task_count: int, rng: random.Random):
+    users = [User(id=ObjectId(), email=f"user{i}@bench.kakari.dev", hashed_password="-", full_name=f"User {i}",
+                  activated=True) for i in range(user_count)]
+    for start in range(0, user_count, CHUNK):
+        await User.insert_many(users[start:start + CHUNK])
+
+    members: Dict[UUID, Set[UUID]] = {}
+    projects = []
+    for i in range(project_count):
+        chosen = rng.sample(users, min(MEMBERS_PER_PROJECT, user_count))
+        projects.append(Project(project_name=f"project {i}", description="benchmark project",
+                                project_owner=DBRef("users", chosen[0].id),
+                                project_members=[DBRef("users", user.id) for user in chosen]))
+        members[projects[-1].project_id] = {user.user_id for user in chosen}
+    await Project.insert_many(projects)
+
+    tasks = []
+    for start in range(0, task_count, CHUNK):
+        batch = []
+        for i in range(start, min(start + CHUNK, task_count)):
+            creator, assignee = rng.choice(users), rng.choice(users)
+            batch.append(Task(title=f"task {i}", description="benchmark task", due_date=datetime.utcnow(),
+                              task_creator=DBRef("users", creator.id), task_creator_id=creator.user_id,
+                              task_assignee=DBRef("users", assignee.id), task_assignee_id=assignee.user_id,
+                              project_id=rng.choice(projects).project_id if projects else None))
+        await Task.insert_many(batch)
+        tasks.extend(batch)
+    return [user.user_id for user in users], members, [task.task_id for task in tasks]
+
+
+def audience(task: dict, members: Dict[UUID, Set[UUID]]) -> Set[UUID]:
+    return {task["task_creator_id"], task["task_assignee_id"], *members.get(task.get("project_id"), ())}
+
+
+async def write(collection, user_ids: List[UUID], members: Dict[UUID, Set[UUID]], task_ids: List[UUID],
+                rate: float, duration: float, reassign: float, rng: random.Random,
+                written: Dict[Tuple[UUID, int], float]) -> List[Tuple[Tuple[UUID, int], Set[UUID], Set[UUID]]]:
+    # (task_id, version), the users it must reach and the users it may also reach
+    expected = []
+    # updates carry the task as read when the change is, so each task is written at most once per pass over them all
+    order: List[UUID] = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        if not order:
+            order = rng.sample(task_ids, len(task_ids))
+        task_id = order.pop()
+        update = {"$set": {"title": f"edited {rng.random():.6f}", "updated_at": datetime.utcnow()},
+                  "$inc": {"version": 1}}
+        if rng.random() < reassign:
+            update["$set"]["task_assignee_id"] = rng.choice(user_ids)
+        started = time.perf_counter()
+        before = await collection.find_one_and_update({"task_id": task_id}, update,
+                                                      return_document=ReturnDocument.BEFORE)
+        version = before["version"] + 1
+        written[(task_id, version)] = started
+        after = dict(before, **update["$set"])
+        required = audience(after, members)
+        expected.append(((task_id, version), required, required | audience(before, members)))
+        await asyncio.sleep(1 / rate)
+    return expected
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = dict(os.environ, MONGO_URI=common.bench_mongo_uri(), MONGO_DATABASE=DATABASE, MONGO_SERVER_API_VERSION="",
+               DEFER_INDEX_BUILDS="false", REMINDERS_ENABLED="false")
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", "app.app:app", "--port", str(port), "--no-access-log"],
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float, token: str) -> None:
+    # the feed answers 503 until its change stream is open
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            async with client.stream("GET", f"{API}/task/feed",
+                                     headers={"Authorization": f"Bearer {token}"}) as response:
+                if response.status_code == 200:
+                    return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"The task feed was not ready after {timeout} seconds")
+
+
+async def main(args) -> int:
+    rng = random.Random(args.seed)
+    mongo = AsyncIOMotorClient(common.bench_mongo_uri(), uuidRepresentation="standard")
+    await mongo.drop_database(DATABASE)
+    await init_beanie(database=mongo[DATABASE], document_models=INDEXED_MODELS)
+    user_ids, members, task_ids = await seed(args.users, args.projects, args.tasks, rng)
+    print(f"seeded {args.users} users, {args.projects} projects and {args.tasks} tasks")
+
+    server = None if args.url else start_server(args.port)
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    feeds = [Feed(user_id) for user_id in rng.sample(user_ids, min(args.subscribers, len(user_ids)))]
+    written: Dict[Tuple[UUID, int], float] = {}
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=len(feeds) + 10)
+    timeout = httpx.Timeout(30.0, read=None)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+            await wait_ready(client, args.ready_timeout, feeds[0].token)
+            drop_at = time.perf_counter() + args.duration / 2
+            runs = [asyncio.create_task(feed.run(client, written, stop,
+                                                 drop_at if rng.random() < args.reconnect else None))
+                    for feed in feeds]
+            await asyncio.wait_for(asyncio.gather(*(feed.connected.wait() for feed in feeds)), args.ready_timeout)
+            expected = await write(mongo[DATABASE]["tasks"], user_ids, members, task_ids, args.rate, args.duration,
+                                   args.reassign, rng, written)
+            # lets the last events and the reconnected subscribers' catch-up arrive
+            await asyncio.sleep(args.drain)
+            stop.set()
+            for run in runs:
+                run.cancel()
+            await asyncio.gather(*runs, return_exceptions=True)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if not args.keep_data:
+            await mongo.drop_database(DATABASE)
+
+    missing = duplicated = unexpected = old_audience = 0
+    by_user = {feed.user_id: feed for feed in feeds}
+    for key, required, allowed in expected:
+        for user_id, feed in by_user.items():
+            count = feed.received.get(key, 0)
+            if user_id in required and count == 0:
+                missing += 1
+            elif count > 1:
+                duplicated += 1
+            elif count and user_id not in allowed:
+                unexpected += 1
+            elif count and user_id not in required:
+                old_audience += 1
+    latencies = [latency for feed in feeds for latency in feed.latencies]
+    print(f"{len(expected)} writes, {len(feeds)} subscribers, {len(latencies)} events delivered, "
+          f"{sum(feed.resets for feed in feeds)} resets")
+    common.print_summary("write to delivery", latencies)
+    print(f"missing {missing}, duplicated {duplicated}, unexpected {unexpected}, "
+          f"delivered to a previous assignee {old_audience}")
+    return 1 if missing or duplicated or unexpected else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--subscribers", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=100.0)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--reassign", type=float, default=0.1)
+    parser.add_argument("--reconnect", type=float, default=0.25)
+    parser.add_argument("--drain", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", help="Target an API that is already running instead of starting one; it must use "
+                                      f"the {DATABASE} database")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument("--keep-data", action="store_true", help="Do not drop the seeded database afterwards")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,139 @@
+"""
+Latency of TaskService.search_tasks on a large corpus, for frequent, rare and combined search terms.
+
+Seeds a scratch database with ``--tasks`` tasks spread over ``--users`` users, with titles and descriptions drawn
+from a Zipf-distributed vocabulary so some words appear in a large share of tasks and others in very few, then builds
+the indexes (timing the text index) and times, for one user:
+
+* search_tasks for a frequent word, a mid-frequency word, a rare word, two words and a quoted phrase;
+* the same frequent word scoped to a project and to a status;
+* following next_cursor five pages deep;
+* for comparison, a case-insensitive $regex on title over the user's tasks, which is what keyword filtering without
+  a text index comes down to.
+
+Run from the backend directory against a local mongod (BENCH_MONGO_URI overrides the address)::
+
+    python -m benchmarks.bench_task_search --tasks 1000000
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from beanie import init_beanie
+from beanie.operators import Or, RegEx
+from bson import Binary, DBRef, ObjectId, UuidRepresentation
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks import common
+from app.core.indexes import INDEXED_MODELS
+from app.models.task_model import StatusEnum, Task
+from app.services.task_service import TaskService
+
+DATABASE = "kakari_bench_task_search"
+CHUNK = 10000
+VOCABULARY = 5000
+PROJECTS = 100
+
+
+def words(count: int, rng: random.Random) -> list:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = set()
+    while len(vocabulary) < count:
+        vocabulary.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 9))))
+    return sorted(vocabulary)
+
+
+async def seed(database, task_count: int, user_count: int, vocabulary: list, rng: random.Random):
+    users = [uuid4() for _ in range(user_count)]
+    projects = [uuid4() for _ in range(PROJECTS)]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    creator = DBRef("users", ObjectId())
+    now = datetime.utcnow()
+
+    def binary(value):
+        return Binary.from_uuid(value, UuidRepresentation.STANDARD)
+
+    for start in range(0, task_count, CHUNK):
+        batch = []
+        for i in range(start, min(start + CHUNK, task_count)):
+            status = rng.choice(list(StatusEnum))
+            batch.append({
+                "task_id": binary(uuid4()), "title": " ".join(rng.choices(vocabulary, weights, k=4)),
+                "description": " ".join(rng.choices(vocabulary, weights, k=20)),
+                "complete": status == StatusEnum.COMPLETED, "status": status.value, "created_at": now,
+                "updated_at": now, "due_date": now + timedelta(minutes=i), "task_creator": creator, "comments": [],
+                "task_creator_id": binary(rng.choice(users)), "task_assignee_id": binary(rng.choice(users)),
+                "project_id": binary(rng.choice(projects)), "version": 0,
+            })
+        await database["tasks"].insert_many(batch, ordered=False)
+    return users, projects
+
+
+async def timed(repeat: int, func) -> list:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def main(task_count: int, user_count: int, repeat: int, seed_value: int) -> None:
+    rng = random.Random(seed_value)
+    client = AsyncIOMotorClient(common.bench_mongo_uri())
+    await client.drop_database(DATABASE)
+    database = client[DATABASE]
+    vocabulary = words(VOCABULARY, rng)
+    users, projects = await seed(database, task_count, user_count, vocabulary, rng)
+
+    started = time.perf_counter()
+    await init_beanie(database=database, document_models=INDEXED_MODELS)
+    print(f"{task_count} tasks, {user_count} users; indexes built in {time.perf_counter() - started:.1f}s")
+
+    user_id = users[0]
+    frequent, mid, rare = vocabulary[0], vocabulary[100], vocabulary[4000]
+    example = await Task.find(Or(Task.task_creator_id == user_id, Task.task_assignee_id == user_id)).first_or_none()
+    phrase = " ".join(example.title.split()[:2]) if example else f"{frequent} {mid}"
+    searches = {
+        f"frequent word ({frequent})": dict(text=frequent),
+        f"mid-frequency word ({mid})": dict(text=mid),
+        f"rare word ({rare})": dict(text=rare),
+        "two words": dict(text=f"{frequent} {mid}"),
+        "quoted phrase": dict(text=f'"{phrase}"'),
+        "frequent word, one project": dict(text=frequent, project_id=projects[0]),
+        "frequent word, completed only": dict(text=frequent, status=StatusEnum.COMPLETED),
+    }
+    for label, arguments in searches.items():
+        page = await TaskService.search_tasks(user_id, **arguments)
+        latencies = await timed(repeat, lambda: TaskService.search_tasks(user_id, **arguments))
+        common.print_summary(f"{label}: {len(page.items)} hits", latencies)
+
+    async def five_pages():
+        cursor = None
+        for _ in range(5):
+            page = await TaskService.search_tasks(user_id, frequent, cursor=cursor)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+    common.print_summary("frequent word, five pages", await timed(repeat, five_pages))
+
+    async def regex_scan():
+        await Task.find(Or(Task.task_creator_id == user_id, Task.task_assignee_id == user_id),
+                        RegEx(Task.title, frequent, options="i")).limit(50).to_list()
+
+    common.print_summary("$regex on title, user's tasks", await timed(repeat, regex_scan))
+    await client.drop_database(DATABASE)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.tasks, args.users, args.repeat, args.seed))
@@ -0,0 +1,46 @@
+import os
+import statistics
+from typing import Dict, Sequence
+
+# app.core.config reads these through decouple and fails if they are missing; benchmarks never talk to the real
+# Atlas cluster or mail server, so placeholder values are enough.
+for _name in ("JWT_SECRET_KEY", "JWT_REFRESH_SECRET_KEY", "MONGO_USERNAME", "MONGO_PASSWORD", "MAILTRAP_USERNAME",
+              "MAILTRAP_PASSWORD", "BASE_URL", "DOMAIN"):
+    os.environ.setdefault(_name, "benchmark")
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Return the ``pct`` percentile of ``values`` using nearest-rank, or 0.0 for an empty sequence.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """
+    Return count, mean and p50/p95/p99 of a sequence of latencies, in the unit they were given in.
+    """
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+def print_summary(label: str, values: Sequence[float], unit: str = "ms") -> None:
+    stats = summarize(values)
+    print(f"{label:<40} n={stats['count']:<7} mean={stats['mean']:.2f}{unit} p50={stats['p50']:.2f}{unit} "
+          f"p95={stats['p95']:.2f}{unit} p99={stats['p99']:.2f}{unit}")
+
+
+def bench_mongo_uri() -> str:
+    """
+    Return the MongoDB URI benchmarks seed and query, from BENCH_MONGO_URI (a local mongod by default).
+    """
+    return os.environ.get("BENCH_MONGO_URI", "mongodb://localhost:27017")
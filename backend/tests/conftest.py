@@ -0,0 +1,7 @@
+import os
+
+# app.core.config reads these through decouple and fails if they are missing; tests never talk to the real Atlas
+# cluster or mail server, so placeholder values are enough.
+for _name in ("JWT_SECRET_KEY", "JWT_REFRESH_SECRET_KEY", "MONGO_USERNAME", "MONGO_PASSWORD", "MAILTRAP_USERNAME",
+              "MAILTRAP_PASSWORD", "BASE_URL", "DOMAIN"):
+    os.environ.setdefault(_name, "test")
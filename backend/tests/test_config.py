@@ -0,0 +1,26 @@
+from typing import get_args
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import ReadPreferenceName, Settings
+from app.core.database import READ_PREFERENCES
+
+
+def test_every_read_preference_setting_maps_to_a_read_preference():
+    assert set(get_args(ReadPreferenceName)) == set(READ_PREFERENCES)
+
+
+def test_misspelt_read_preference_fails_at_startup():
+    with pytest.raises(ValidationError):
+        Settings(MONGO_LIST_READ_PREFERENCE="secondaryPrefered")
+    with pytest.raises(ValidationError):
+        Settings(MONGO_READ_PREFERENCE="Primary")
+
+
+def test_read_preference_is_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv("MONGO_LIST_READ_PREFERENCE", "secondaryPreferred")
+    assert Settings().MONGO_LIST_READ_PREFERENCE == "secondaryPreferred"
+    monkeypatch.setenv("MONGO_LIST_READ_PREFERENCE", "secondary-preferred")
+    with pytest.raises(ValidationError):
+        Settings()
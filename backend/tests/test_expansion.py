@@ -0,0 +1,31 @@
+from itertools import permutations
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.task_model import Task
+from app.schemas.task_schema import TaskOut
+from app.utils.expansion import expand_query
+from app.utils.projection import projection_model
+
+
+def test_field_orderings_share_one_projection_model():
+    dependency = expand_query(Task)
+    projections = {dependency(expand=None, fields=",".join(order)).projection
+                   for order in permutations(["title", "status", "due_date", "complete", "description"])}
+    assert len(projections) == 1
+    assert list(projections.pop().model_fields)[:2] == ["id", "due_date"]
+
+
+def test_projection_model_cache_is_bounded():
+    assert projection_model.cache_info().maxsize is not None
+
+
+def test_links_missing_from_the_response_model_cannot_be_expanded():
+    dependency = expand_query(Task, TaskOut)
+    assert dependency(expand="assignee", fields=None).fields == ["task_assignee"]
+    for name in ("creator", "comments"):
+        with pytest.raises(HTTPException) as error:
+            dependency(expand=name, fields=None)
+        assert error.value.status_code == 422
+    assert expand_query(Task)(expand="creator,comments", fields=None).fields == ["task_creator", "comments"]
@@ -0,0 +1,24 @@
+import pytest
+
+# TestClient needs httpx, which is not in requirements.txt
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.app import app  # noqa: E402
+from app.core.indexes import index_reconciler  # noqa: E402
+
+
+def test_routes_wait_for_the_models_but_liveness_does_not():
+    # the lifespan does not run without the context manager, as if the cluster were still out of reach
+    assert not index_reconciler.initialized
+    client = TestClient(app)
+
+    assert client.get("/healthz").status_code == 200
+
+    readiness = client.get("/readyz")
+    assert readiness.status_code == 503
+    assert readiness.json()["initialized"] is False
+
+    response = client.post("/api/v1/auth/login", data={"username": "a@example.com", "password": "x"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,35 @@
+import asyncio
+import os
+
+import pytest
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+from app.core.indexes import INDEXED_MODELS, find_collection_scans
+
+# a local mongod by default; the test is skipped if none answers
+MONGO_URI = os.environ.get("TEST_MONGO_URI", "mongodb://localhost:27017")
+DATABASE = "kakari_test_indexes"
+
+
+async def _collection_scans():
+    client = AsyncIOMotorClient(MONGO_URI, serverSelectionTimeoutMS=1000)
+    try:
+        await client.admin.command("ping")
+    except PyMongoError as e:
+        client.close()
+        pytest.skip(f"no mongod at {MONGO_URI}: {e}")
+
+    await client.drop_database(DATABASE)
+    try:
+        # empty collections are enough: the planner only falls back to a collection scan when no index fits
+        await init_beanie(database=client[DATABASE], document_models=INDEXED_MODELS)
+        return await find_collection_scans()
+    finally:
+        await client.drop_database(DATABASE)
+        client.close()
+
+
+def test_no_task_query_is_a_collection_scan():
+    assert asyncio.run(_collection_scans()) == []
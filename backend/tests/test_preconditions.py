@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from app.utils.preconditions import listing_etag
+
+
+def test_listing_etag_changes_when_a_task_leaves_the_listing():
+    latest = datetime(2026, 1, 1)
+    # removing a task that is not the latest leaves the latest updated_at where it was
+    assert listing_etag(0, latest, None, 50) != listing_etag(1, latest, None, 50)
+
+
+def test_listing_etag_changes_when_a_task_is_added_or_updated():
+    assert listing_etag(0, datetime(2026, 1, 1), None, 50) != listing_etag(0, datetime(2026, 1, 2), None, 50)
+    assert listing_etag(0, None, None, 50) != listing_etag(0, datetime(2026, 1, 1), None, 50)
+
+
+def test_listing_etag_depends_on_the_page():
+    latest = datetime(2026, 1, 1)
+    assert listing_etag(0, latest, None, 50) != listing_etag(0, latest, "cursor", 50)
+    assert listing_etag(0, latest, None, 50) != listing_etag(0, latest, None, 20)
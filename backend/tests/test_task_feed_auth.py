@@ -0,0 +1,56 @@
+from uuid import uuid4
+
+import pytest
+
+# TestClient needs httpx, which is not in requirements.txt
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.app import app  # noqa: E402
+from app.core.indexes import index_reconciler  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.models.user_model import User  # noqa: E402
+from app.services.user_service import user_cache  # noqa: E402
+
+FEED = "/api/v1/task/feed"
+
+
+@pytest.fixture
+def user():
+    user_id = uuid4()
+    # model_construct skips Beanie's collection check and the cache spares a database lookup
+    user_cache.set(user_id, User.model_construct(user_id=user_id, email="a@example.com", hashed_password="x",
+                                                 roles=[], version=0))
+    yield user_id
+    user_cache.invalidate(user_id)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # without the context manager the lifespan does not run, so the feed is never started and answers 503
+    monkeypatch.setattr(index_reconciler, "initialized", True)
+    return TestClient(app)
+
+
+def feed_token(client: TestClient, user_id) -> str:
+    response = client.post(f"{FEED}/token", headers={"Authorization": f"Bearer {create_access_token(str(user_id))}"})
+    assert response.status_code == 200
+    return response.json()["token"]
+
+
+def test_feed_accepts_a_feed_token_in_the_query_string(client, user):
+    assert client.get(FEED, params={"token": feed_token(client, user)}).status_code == 503
+
+
+def test_feed_needs_a_token(client, user):
+    assert client.get(FEED).status_code == 401
+
+
+def test_feed_token_is_not_an_access_token(client, user):
+    headers = {"Authorization": f"Bearer {feed_token(client, user)}"}
+    assert client.get("/api/v1/user/me", headers=headers).status_code == 401
+    assert client.get(FEED, headers=headers).status_code == 401
+
+
+def test_access_token_is_not_a_feed_token(client, user):
+    assert client.get(FEED, params={"token": create_access_token(str(user))}).status_code == 401
@@ -0,0 +1,16 @@
+from app.models.task_model import StatusEnum
+from app.services.task_service import sync_complete
+
+
+def test_completing_a_task_marks_it_complete():
+    assert sync_complete({"status": StatusEnum.COMPLETED}) == {"status": StatusEnum.COMPLETED, "complete": True}
+
+
+def test_reopening_a_task_clears_complete():
+    for status in (StatusEnum.NOT_STARTED, StatusEnum.UNDER_PROCESS):
+        assert sync_complete({"status": status}) == {"status": status, "complete": False}
+
+
+def test_update_without_status_leaves_complete_alone():
+    assert sync_complete({"title": "renamed"}) == {"title": "renamed"}
+    assert sync_complete({"complete": True}) == {"complete": True}
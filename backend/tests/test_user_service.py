@@ -0,0 +1,23 @@
+import asyncio
+from uuid import uuid4
+
+from app.models.user_model import User
+from app.services.user_service import UserService, user_cache
+
+
+def test_cached_users_are_handed_out_as_copies():
+    user_id = uuid4()
+    # model_construct skips Beanie's collection check, so no database is needed
+    user_cache.set(user_id, User.model_construct(user_id=user_id, email="a@example.com", hashed_password="x",
+                                                 roles=["user"], version=3))
+    try:
+        first = asyncio.run(UserService.get_cached_user_by_id(user_id))
+        first.roles.append("admin")
+        first.hashed_password = "changed"
+
+        second = asyncio.run(UserService.get_cached_user_by_id(user_id))
+        assert second is not first
+        assert second.roles == ["user"]
+        assert second.hashed_password == "x"
+    finally:
+        user_cache.invalidate(user_id)
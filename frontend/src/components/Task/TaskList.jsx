@@ -1,4 +1,4 @@
-import {Box, Center, Container, Spinner} from "@chakra-ui/react";
+import {Box, Button, Center, Container, Spinner} from "@chakra-ui/react";
 import {useEffect, useRef, useState} from "react";
 import axiosInstance from "../../services/axios";
 import {AddUpdateTaskModal} from "./AddUpdateTaskModal";
@@ -8,6 +8,8 @@ import jwtDecode from 'jwt-decode';
 export const TaskList = () => {
     const [tasks, setTasks] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const isMounted = useRef(false);
 
     const user = useSelector
@@ -23,7 +25,8 @@ export const TaskList = () => {
         axiosInstance
             .get("/task/assigned/{user_id}")
             .then((res) => {
-                setTasks(res.data);
+                setTasks(res.data.items);
+                setNextCursor(res.data.next_cursor);
             })
             .catch((error) => {
                 console.error(error);
@@ -33,6 +36,22 @@ export const TaskList = () => {
             });
     };
 
+    const fetchMoreTasks = () => {
+        setLoadingMore(true);
+        axiosInstance
+            .get("/task/assigned/{user_id}", {params: {cursor: nextCursor}})
+            .then((res) => {
+                setTasks((loaded) => [...loaded, ...res.data.items]);
+                setNextCursor(res.data.next_cursor);
+            })
+            .catch((error) => {
+                console.error(error);
+            })
+            .finally(() => {
+                setLoadingMore(false);
+            });
+    };
+
     return (
         <Container mt={9}>
             <AddUpdateTaskModal onSuccess={fetchTasks}/>
@@ -51,6 +70,14 @@ export const TaskList = () => {
                     {tasks?.map((task) => (
                         <TaskCard task={task} key={task.id}/>
                     ))}
+                    {nextCursor && (
+                        <Center mt={4}>
+                            <Button isLoading={loadingMore} colorScheme="green" variant="outline"
+                                    onClick={fetchMoreTasks}>
+                                LOAD MORE
+                            </Button>
+                        </Center>
+                    )}
                 </Box>
             )}
         </Container>